@@ -1,5 +1,7 @@
 import React from 'react';
+import type { PoolClient } from 'pg';
 import pool from '@/lib/db';
+import { decodeSparkline } from '@/lib/utils';
 import FishbowlTable from '@/components/business/fishbowl-table';
 import { EtfCardProps } from '@/components/EtfCard';
 import ProjectIntro from '@/components/business/project-intro';
@@ -9,43 +11,89 @@ import Footer from '@/components/footer';
 // 强制动态渲染，因为数据每天会变，我们需要获取最新 DB 状态
 export const dynamic = 'force-dynamic';
 
+// v7.3: 判断迁移脚本创建的表是否存在（未执行迁移的数据库回退到原有查询）
+async function hasTable(client: PoolClient, table: string): Promise<boolean> {
+  const result = await client.query('SELECT to_regclass($1) IS NOT NULL AS found', [table]);
+  return Boolean(result.rows[0]?.found);
+}
+
 async function getLatestMarketData(): Promise<EtfCardProps[]> {
   const client = await pool.connect();
   try {
+    const hasLatest = await hasTable(client, 'fishbowl_latest');
+    const hasSeries = await hasTable(client, 'fishbowl_series');
+
     // 核心查询逻辑：
-    // 1. 联表 monitor_config 获取名称 (c.name)
-    // 2. 使用 DISTINCT ON (symbol) 获取每个代码最新的一条记录
+    // 1. v7.3: 从 fishbowl_latest 读取每个代码最新的一条记录（由 ETL 维护，每个代码一行），
+    //    不再对整张 fishbowl_daily 做 DISTINCT ON；未执行迁移的数据库仍使用 DISTINCT ON
+    // 2. 联表 monitor_config 获取名称/类别/排序等展示字段（以配置表为准，修改配置后立即生效）
+    //    以及 is_active、持仓等由其他脚本维护的字段
     // 3. 筛选 is_active = true 的配置
-    // 4. 按日期降序排列，确保最新的日期排在前面
-    // 5. v4.6: 包含 investment_logic 投资逻辑说明
-    // 6. v5.4: 包含 top_holdings 核心持仓数据
-    // 7. v5.9: 包含 sparkline_json 趋势图数据
+    // 4. v4.6: 包含 investment_logic 投资逻辑说明
+    // 5. v5.4: 包含 top_holdings 核心持仓数据
+    // 6. v5.9: 包含 sparkline_json 趋势图数据
+    // 7. v7.3: 趋势图优先读取 fishbowl_series 最近 250 个数据点（sparkline_json 仅作为迁移前的兼容），
+    //    未执行 add_fishbowl_series.sql 的数据库不联表，只使用 sparkline_json
+    const seriesQuery = hasSeries ? `
+      SELECT latest.*, series.points AS series_points
+      FROM latest
+      LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_object(
+                 'date', TO_CHAR(p.date, 'YYYY-MM-DD'),
+                 'price', p.price,
+                 'ma20', p.ma20,
+                 'change', p.change
+               ) ORDER BY p.date) AS points
+        FROM (
+          SELECT date, price, ma20, change
+          FROM fishbowl_series s
+          WHERE s.symbol = latest.symbol
+          ORDER BY date DESC
+          LIMIT 250
+        ) p
+      ) series ON true
+    ` : `
+      SELECT latest.*, NULL AS series_points
+      FROM latest
+    `;
+
+    const latestSource = hasLatest ? `
+        FROM fishbowl_latest d
+        JOIN monitor_config c ON d.symbol = c.symbol
+        WHERE c.is_active = true
+    ` : `
+        FROM fishbowl_daily d
+        JOIN monitor_config c ON d.symbol = c.symbol
+        WHERE c.is_active = true
+        ORDER BY d.symbol, d.date DESC
+    `;
+
     const query = `
-      SELECT DISTINCT ON (d.symbol)
-        TO_CHAR(d.date, 'YYYY-MM-DD') as date,
-        d.symbol,
-        d.close_price,
-        d.ma20_price,
-        d.status,
-        d.deviation_pct,
-        d.duration_days,
-        d.trend_rank,
-        d.signal_tag,
-        d.change_pct,
-        d.trend_pct,
-        d.sparkline_json,
-        c.name,
-        c.category,
-        c.industry_level,
-        c.dominant_etf,
-        c.sort_rank,
-        c.investment_logic,
-        c.top_holdings,
-        c.holdings_updated_at
-      FROM fishbowl_daily d
-      JOIN monitor_config c ON d.symbol = c.symbol
-      WHERE c.is_active = true
-      ORDER BY d.symbol, d.date DESC;
+      WITH latest AS (
+        SELECT ${hasLatest ? '' : 'DISTINCT ON (d.symbol)'}
+          TO_CHAR(d.date, 'YYYY-MM-DD') as date,
+          d.symbol,
+          d.close_price,
+          d.ma20_price,
+          d.status,
+          d.deviation_pct,
+          d.duration_days,
+          d.trend_rank,
+          d.signal_tag,
+          d.change_pct,
+          d.trend_pct,
+          d.sparkline_json,
+          c.name,
+          c.category,
+          c.industry_level,
+          c.dominant_etf,
+          c.sort_rank,
+          c.investment_logic,
+          c.top_holdings,
+          c.holdings_updated_at
+        ${latestSource}
+      )
+      ${seriesQuery};
     `;
 
     const result = await client.query(query);
@@ -64,13 +112,15 @@ async function getLatestMarketData(): Promise<EtfCardProps[]> {
       }
 
       // v5.9: 解析 sparkline_json 数据
+      // v7.3: 优先使用 fishbowl_series 序列（json_agg 结果已是数组）
       let sparklineData = undefined;
-      if (row.sparkline_json) {
+      if (row.series_points) {
+        sparklineData = row.series_points;
+      } else if (row.sparkline_json) {
         try {
           // PostgreSQL JSONB 字段可能已经是对象或字符串
-          sparklineData = typeof row.sparkline_json === 'string'
-            ? JSON.parse(row.sparkline_json)
-            : row.sparkline_json;
+          // v7.3: 兼容 v2 列式格式
+          sparklineData = decodeSparkline(row.sparkline_json);
         } catch (e) {
           console.error(`Failed to parse sparkline_json for ${row.symbol}:`, e);
         }
@@ -119,9 +169,11 @@ export default async function Home() {
   let latestDate = new Date().toISOString().split('T')[0];
   const client = await pool.connect();
   try {
+    // v7.3: 优先读取 fishbowl_latest（每个代码一行），未执行迁移时读取 fishbowl_daily
+    const dailyTable = await hasTable(client, 'fishbowl_latest') ? 'fishbowl_latest' : 'fishbowl_daily';
     const result = await client.query(`
-      SELECT TO_CHAR(MAX(date), 'YYYY-MM-DD') as latest_date
-      FROM fishbowl_daily d
+      SELECT TO_CHAR(MAX(d.date), 'YYYY-MM-DD') as latest_date
+      FROM ${dailyTable} d
       JOIN monitor_config c ON d.symbol = c.symbol
       WHERE c.is_active = true
     `);
@@ -1,6 +1,60 @@
 import { type ClassValue, clsx } from "clsx"
 import { twMerge } from "tailwind-merge"
+import type { SparklineDataPoint } from "@/types"
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
-}
\ No newline at end of file
+}
+/**
+ * v7.3: sparkline v2 列式格式（见 scripts/etl.py FishbowlCalculator.encode_sparkline）
+ * - d: 与前一点相差的天数（首项为 0，日期 = base + 累计天数）
+ * - p / m: 价格 / MA20 乘以 10^4 后的差分（首项为绝对值）
+ * - c: 涨幅乘以 100 后的整数
+ */
+interface CompactSparkline {
+  v: 2;
+  base: string | null;
+  d: number[];
+  p: number[];
+  m: number[];
+  c: number[];
+}
+
+const SPARKLINE_PRICE_SCALE = 10000;
+const SPARKLINE_CHANGE_SCALE = 100;
+
+function isCompactSparkline(value: unknown): value is CompactSparkline {
+  return typeof value === "object" && value !== null && (value as { v?: unknown }).v === 2;
+}
+
+/**
+ * v7.3: 解析 sparkline_json，兼容 JSON 字符串 / v1 对象数组 / v2 列式格式
+ * 解析失败时返回 undefined
+ */
+export function decodeSparkline(raw: unknown): SparklineDataPoint[] | undefined {
+  const value = typeof raw === "string" ? JSON.parse(raw) : raw;
+  if (Array.isArray(value)) {
+    return value as SparklineDataPoint[];
+  }
+  if (!isCompactSparkline(value) || !value.base) {
+    return undefined;
+  }
+
+  // 按 UTC 计算日期，避免本地时区导致的日期偏移
+  const [year, month, day] = value.base.split("-").map(Number);
+  let time = Date.UTC(year, month - 1, day);
+  let price = 0;
+  let ma20 = 0;
+
+  return value.d.map((offset, i) => {
+    time += offset * 86400000;
+    price += value.p[i];
+    ma20 += value.m[i];
+    return {
+      date: new Date(time).toISOString().slice(0, 10),
+      price: Number((price / SPARKLINE_PRICE_SCALE).toFixed(4)),
+      ma20: Number((ma20 / SPARKLINE_PRICE_SCALE).toFixed(4)),
+      change: Number((value.c[i] / SPARKLINE_CHANGE_SCALE).toFixed(2)),
+    };
+  });
+}
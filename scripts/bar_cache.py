@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 本地行情缓存 v7.3
+功能：
+1. 按标的在本地磁盘缓存原始日线（OHLCV_COLUMNS 中接口实际返回的列），以日期为键追加写入
+2. manifest.json 记录每个标的的覆盖区间及其对应的请求起点（since），无需读取数据文件即可判断缺口
+3. 使用 Parquet 列式存储（pyarrow 已列入 requirements.txt），未安装时回退为 CSV
+4. 重叠区间的收盘价与网络数据不一致（复权调整等）时，由调用方整体失效重建
+
+配置：
+    BAR_CACHE_DIR   缓存目录（默认仓库根目录下 .cache/bars）
+    BAR_CACHE       设为 false 关闭缓存
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'bars')
+
+# 校验重叠区间时允许的相对误差
+PRICE_TOLERANCE = 1e-6
+
+# 缓存的原始行情列（不同接口返回的列不同，缺失的列不保留）
+OHLCV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'vol', 'amount', 'pct_chg']
+
+
+class BarCache:
+    """按标的划分的本地日线缓存（线程安全）"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv('BAR_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.format = 'parquet' if PARQUET_AVAILABLE else 'csv'
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_path = os.path.join(self.root, 'manifest.json')
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    @classmethod
+    def from_env(cls) -> Optional['BarCache']:
+        """根据环境变量创建缓存，BAR_CACHE=false 时返回 None"""
+        if os.getenv('BAR_CACHE', 'true').lower() in ('0', 'false', 'no'):
+            return None
+        try:
+            return cls()
+        except OSError as e:
+            print(f"  ⚠️  本地行情缓存不可用: {str(e)}")
+            return None
+
+    # ------------------------------------------------
+    # manifest
+    # ------------------------------------------------
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            print("  ⚠️  行情缓存 manifest 损坏，重新建立")
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _path(self, symbol: str, fmt: str) -> str:
+        safe_name = re.sub(r'[^0-9A-Za-z._-]', '_', symbol)
+        return os.path.join(self.root, f"{safe_name}.{fmt}")
+
+    def coverage(self, symbol: str) -> Optional[Tuple[str, str]]:
+        """返回缓存覆盖区间 (first, last)，格式 YYYY-MM-DD；无缓存时返回 None"""
+        entry = self._manifest.get(symbol)
+        if not entry:
+            return None
+        return entry['first'], entry['last']
+
+    def covers(self, symbol: str, start_date: str) -> bool:
+        """
+        缓存是否包含自 start_date（YYYYMMDD）起请求返回的全部历史
+
+        since 为建立缓存时的请求起点（旧 manifest 没有该字段时按首个交易日计）。
+        """
+        entry = self._manifest.get(symbol)
+        if not entry:
+            return False
+        return entry.get('since', entry['first'].replace('-', '')) <= start_date
+
+    # ------------------------------------------------
+    # 读写
+    # ------------------------------------------------
+    def load(self, symbol: str) -> pd.DataFrame:
+        """读取缓存的日线，返回缓存的 OHLCV 列（按日期升序），无缓存时返回空 DataFrame"""
+        entry = self._manifest.get(symbol)
+        if not entry:
+            return pd.DataFrame()
+
+        path = self._path(symbol, entry.get('format', 'csv'))
+        try:
+            if entry.get('format') == 'parquet':
+                df = pd.read_parquet(path)
+            else:
+                df = pd.read_csv(path)
+        except Exception as e:
+            print(f"  ⚠️  读取 {symbol} 行情缓存失败: {str(e)}，忽略缓存")
+            self.invalidate(symbol)
+            return pd.DataFrame()
+
+        df['date'] = pd.to_datetime(df['date'])
+        for col in df.columns.drop('date'):
+            df[col] = pd.to_numeric(df[col])
+        return df.sort_values('date').reset_index(drop=True)
+
+    def conflicts(self, symbol: str, df: pd.DataFrame) -> bool:
+        """判断新数据与缓存在重叠日期上的收盘价是否不一致（例如发生了复权调整）"""
+        cached = self.load(symbol)
+        if cached.empty or df.empty:
+            return False
+
+        merged = cached.merge(df[['date', 'close']], on='date', suffixes=('_cached', '_new'))
+        if merged.empty:
+            return False
+        diff = (merged['close_cached'] - merged['close_new']).abs()
+        return bool((diff > merged['close_new'].abs() * PRICE_TOLERANCE).any())
+
+    def append(self, symbol: str, df: pd.DataFrame, since: Optional[str] = None):
+        """
+        追加新数据（同日期以新数据为准）并更新 manifest
+
+        Args:
+            symbol: 标的代码
+            df: 包含 ['date', 'close'] 及可选 OHLCV 列的新数据（需与已缓存区间相接或重叠）
+            since: 新数据对应的请求起点（YYYYMMDD），早于已记录的起点时向前扩展覆盖区间
+        """
+        if df is None or df.empty:
+            return
+
+        new_bars = df[[col for col in OHLCV_COLUMNS if col in df.columns]].copy()
+        new_bars['date'] = pd.to_datetime(new_bars['date'])
+        cached = self.load(symbol)
+        merged = pd.concat([cached, new_bars], ignore_index=True) if not cached.empty else new_bars
+        merged = merged.drop_duplicates(subset='date', keep='last').sort_values('date').reset_index(drop=True)
+
+        entry = self._manifest.get(symbol, {})
+        starts = [s for s in (entry.get('since'), since) if s]
+        self._write(symbol, merged, min(starts) if starts else None)
+
+    def replace(self, symbol: str, df: pd.DataFrame, since: Optional[str] = None):
+        """用新数据整体重建某个标的的缓存"""
+        self.invalidate(symbol)
+        self.append(symbol, df, since)
+
+    def invalidate(self, symbol: str):
+        """删除某个标的的缓存"""
+        with self._lock:
+            entry = self._manifest.pop(symbol, None)
+            if entry:
+                path = self._path(symbol, entry.get('format', 'csv'))
+                if os.path.exists(path):
+                    os.remove(path)
+                self._save_manifest()
+
+    def _write(self, symbol: str, df: pd.DataFrame, since: Optional[str] = None):
+        path = self._path(symbol, self.format)
+        tmp_path = path + '.tmp'
+        if self.format == 'parquet':
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False, date_format='%Y-%m-%d')
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._manifest[symbol] = {
+                'first': df['date'].iloc[0].strftime('%Y-%m-%d'),
+                'last': df['date'].iloc[-1].strftime('%Y-%m-%d'),
+                'since': since or df['date'].iloc[0].strftime('%Y%m%d'),
+                'rows': int(len(df)),
+                'format': self.format,
+                'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            self._save_manifest()
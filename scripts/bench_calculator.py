@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 指标计算基准测试 & 黄金输出校验 v7.3
+功能：
+1. 用合成价格序列（1k ~ 1M 行、1 ~ 5000 个标的、±1% 缓冲带边界用例）测量
+   calculate_all_metrics / calculate_panel / advance_state / sparkline 构建的耗时与峰值内存
+2. 黄金输出校验：把当前实现与固定在本文件中的参考实现（v7.2 逐行循环版本）逐项比对
+3. 完全离线运行，输出 JSON 报告，可与其他提交的报告对比
+
+用法：
+    python scripts/bench_calculator.py                          # 完整基准 + 校验
+    python scripts/bench_calculator.py --quick                  # 小规模快速运行
+    python scripts/bench_calculator.py --output bench.json      # 保存报告
+    python scripts/bench_calculator.py --compare base.json      # 与基线报告对比
+    python scripts/bench_calculator.py --golden-only            # 只做黄金输出校验
+
+校验失败时以退出码 1 结束，可直接用于 CI。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from etl import FishbowlCalculator, process_symbol
+
+# 参考（逐行循环）实现太慢，超过该行数的基准只测当前实现
+REFERENCE_MAX_ROWS = 20000
+
+SERIES_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PANEL_SHAPES = [(250, 1), (250, 100), (250, 1000), (250, 5000), (2500, 1000)]
+QUICK_SERIES_SIZES = [1_000, 10_000]
+QUICK_PANEL_SHAPES = [(250, 1), (250, 100)]
+
+METRIC_COLUMNS = ['ma20_price', 'deviation_pct', 'change_pct', 'trend_pct']
+LABEL_COLUMNS = ['status', 'duration_days', 'signal_tag']
+
+
+# ================================================
+# 参考实现（v7.2 语义，请勿随优化一起修改）
+# ================================================
+class ReferenceCalculator:
+    """v7.2 逐行循环版本的指标计算与 sparkline 构建，作为黄金输出基准"""
+
+    @staticmethod
+    def calculate_all_metrics(df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+
+        df = df.copy()
+        df['ma20_price'] = df['close'].rolling(window=20, min_periods=1).mean()
+
+        statuses = []
+        durations = []
+        for i in range(len(df)):
+            close = df.loc[i, 'close']
+            ma20 = df.loc[i, 'ma20_price']
+            upper_band = ma20 * 1.01
+            lower_band = ma20 * 0.99
+
+            if i == 0:
+                status = 'YES' if close >= ma20 else 'NO'
+                duration = 1
+            else:
+                prev_status = statuses[-1]
+                prev_duration = durations[-1]
+                if close > upper_band:
+                    status = 'YES'
+                elif close < lower_band:
+                    status = 'NO'
+                else:
+                    status = prev_status
+                duration = 1 if prev_status != status else prev_duration + 1
+
+            statuses.append(status)
+            durations.append(duration)
+
+        df['status'] = statuses
+        df['duration_days'] = durations
+        df['deviation_pct'] = (df['close'] - df['ma20_price']) / df['ma20_price']
+        df['change_pct'] = df['close'].pct_change()
+
+        trend_pcts = []
+        for i in range(len(df)):
+            duration = df.loc[i, 'duration_days']
+            current_close = df.loc[i, 'close']
+            start_index = i - duration
+            if start_index >= 0:
+                start_price = df.loc[start_index, 'close']
+                trend_pcts.append((current_close - start_price) / start_price)
+            else:
+                trend_pcts.append(None)
+        df['trend_pct'] = trend_pcts
+
+        signal_tags = []
+        for _, row in df.iterrows():
+            status = row['status']
+            duration = row['duration_days']
+            deviation = row['deviation_pct']
+            if deviation > 0:
+                if duration <= 3 and status == 'YES':
+                    tag = 'BREAKOUT'
+                elif deviation > 0.15:
+                    tag = 'OVERHEAT'
+                else:
+                    tag = 'STRONG'
+            else:
+                if deviation < -0.15:
+                    tag = 'EXTREME_BEAR'
+                else:
+                    tag = 'SLUMP'
+            signal_tags.append(tag)
+        df['signal_tag'] = signal_tags
+
+        return df
+
+    @staticmethod
+    def generate_sparkline_json(df: pd.DataFrame, days: int = 250, today_date: str = None,
+                                today_price: float = None, today_ma20: float = None) -> str:
+        if df.empty:
+            return json.dumps([])
+
+        sparkline_data = []
+        for _, row in df.tail(days).iterrows():
+            date_str = row['date'].strftime('%Y-%m-%d') if hasattr(row['date'], 'strftime') else str(row['date'])
+            change_value = round(float(row['change_pct'] * 100), 2) if pd.notna(row['change_pct']) else 0.0
+            sparkline_data.append({
+                "date": date_str,
+                "price": round(float(row['close']), 4),
+                "ma20": round(float(row['ma20_price']), 4),
+                "change": change_value
+            })
+
+        if today_date and today_price is not None and today_ma20 is not None:
+            if not sparkline_data or sparkline_data[-1]['date'] != today_date:
+                sparkline_data.append({
+                    "date": today_date,
+                    "price": round(float(today_price), 4),
+                    "ma20": round(float(today_ma20), 4),
+                    "change": 0.0
+                })
+
+        return json.dumps(sparkline_data)
+
+    @staticmethod
+    def append_to_sparkline(current_chart_json: str, today_date: str, today_price: float,
+                            today_ma20: float, today_change: float = 0.0, max_days: int = 250) -> str:
+        try:
+            current_chart = json.loads(current_chart_json) if current_chart_json else []
+            if not isinstance(current_chart, list):
+                current_chart = []
+        except (json.JSONDecodeError, TypeError):
+            current_chart = []
+
+        new_point = {
+            "date": today_date,
+            "price": round(float(today_price), 4),
+            "ma20": round(float(today_ma20), 4),
+            "change": round(float(today_change), 2)
+        }
+        if current_chart and current_chart[-1].get('date', '') == today_date:
+            current_chart[-1] = new_point
+        else:
+            current_chart.append(new_point)
+
+        return json.dumps(current_chart[-max_days:])
+
+
+# ================================================
+# 合成数据
+# ================================================
+def make_series(rows: int, seed: int = 0, volatility: float = 0.01) -> pd.DataFrame:
+    """生成几何随机游走收盘价序列（工作日日期）"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, rows)))
+    dates = pd.bdate_range('1990-01-01', periods=rows)
+    return pd.DataFrame({'date': dates, 'close': np.round(close, 4)})
+
+
+def make_panel(days: int, symbols: int, seed: int = 0, holiday_ratio: float = 0.03) -> pd.DataFrame:
+    """生成 dates × symbols 收盘价矩阵，随机挖掉部分交易日并模拟晚上市的标的"""
+    rng = np.random.default_rng(seed)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, symbols)), axis=0))
+    values = np.round(values, 4)
+    values[rng.random((days, symbols)) < holiday_ratio] = np.nan
+    late = rng.random(symbols) < 0.1
+    listing_day = rng.integers(0, days, symbols)
+    for j in np.nonzero(late)[0]:
+        values[:listing_day[j], j] = np.nan
+    dates = pd.bdate_range('2015-01-01', periods=days)
+    return pd.DataFrame(values, index=dates, columns=[f"S{j:05d}" for j in range(symbols)])
+
+
+def band_edge_cases() -> Dict[str, pd.DataFrame]:
+    """±1% 缓冲带附近的边界用例"""
+    cases = {}
+
+    def frame(values):
+        return pd.DataFrame({'date': pd.bdate_range('2024-01-01', periods=len(values)),
+                             'close': np.asarray(values, dtype=float)})
+
+    cases['single_row'] = frame([100.0])
+    cases['flat'] = frame([100.0] * 60)
+    cases['first_day_equal_ma'] = frame([50.0, 50.0, 50.0])
+
+    # 在缓冲带内来回震荡（状态不应翻转）
+    cases['inside_band'] = frame([100.0] * 20 + [100.5, 99.5] * 20)
+
+    # 收盘价恰好落在上/下沿（严格大于/小于才切换）
+    base = [100.0] * 19
+    upper = (sum(base) * 1.01) / (20 - 1.01)     # close == MA20 * 1.01 的解析解
+    lower = (sum(base) * 0.99) / (20 - 0.99)
+    cases['exact_upper_band'] = frame(base + [upper])
+    cases['exact_lower_band'] = frame(base + [lower])
+    cases['just_above_upper'] = frame(base + [upper * (1 + 1e-12)])
+    cases['just_below_lower'] = frame(base + [lower * (1 - 1e-12)])
+
+    # 频繁穿越缓冲带（持续天数反复重置）
+    cases['whipsaw'] = frame([100.0] * 20 + [103.0, 97.0] * 30)
+
+    # 极端偏离（OVERHEAT / EXTREME_BEAR）与小数值价格
+    cases['overheat'] = frame([100.0] * 20 + [100.0 * 1.05 ** k for k in range(1, 15)])
+    cases['extreme_bear'] = frame([100.0] * 20 + [100.0 * 0.95 ** k for k in range(1, 15)])
+    cases['tiny_prices'] = make_series(300, seed=7).assign(close=lambda d: d['close'] / 1e4)
+
+    for seed in range(5):
+        cases[f'random_walk_{seed}'] = make_series(2000, seed=seed, volatility=0.004 * (seed + 1))
+    return cases
+
+
+# ================================================
+# 测量工具
+# ================================================
+def measure(func: Callable, repeat: int = 3) -> Dict[str, float]:
+    """返回最佳耗时（秒）与峰值内存（MB，tracemalloc 统计，包含 NumPy 分配）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(best, 6), 'peak_mb': round(peak / 1024 / 1024, 3)}
+
+
+def quiet(func: Callable, *args, **kwargs):
+    """屏蔽被测函数的 print 日志"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# ================================================
+# 基准测试
+# ================================================
+def run_benchmarks(series_sizes: List[int], panel_shapes: List[tuple], repeat: int) -> List[Dict]:
+    results = []
+
+    def record(name: str, rows: int, symbols: int, func: Callable, reps: int = repeat):
+        stats = measure(func, reps)
+        results.append({'name': name, 'rows': rows, 'symbols': symbols, **stats})
+        print(f"  {name:<32} rows={rows:>9,} symbols={symbols:>5}  "
+              f"{stats['seconds'] * 1000:>10.2f} ms  peak {stats['peak_mb']:>9.2f} MB")
+
+    print("\n⏱️  单序列指标计算")
+    for rows in series_sizes:
+        df = make_series(rows)
+        record('calculate_all_metrics', rows, 1, lambda: FishbowlCalculator.calculate_all_metrics(df))
+        if rows <= REFERENCE_MAX_ROWS:
+            record('reference.calculate_all_metrics', rows, 1,
+                   lambda: ReferenceCalculator.calculate_all_metrics(df), reps=1)
+
+    print("\n⏱️  多标的：面板模式 vs 逐个计算")
+    for days, symbols in panel_shapes:
+        panel = make_panel(days, symbols)
+        rows = int(panel.notna().sum().sum())
+        record('calculate_panel', rows, symbols, lambda: FishbowlCalculator.calculate_panel(panel))
+        frames = [pd.DataFrame({'date': panel[c].dropna().index, 'close': panel[c].dropna().to_numpy()})
+                  for c in panel.columns]
+        record('per_symbol.calculate_all_metrics', rows, symbols,
+               lambda: [FishbowlCalculator.calculate_all_metrics(f) for f in frames], reps=1)
+
+    print("\n⏱️  增量状态推进")
+    for symbols in sorted({s for _, s in panel_shapes}):
+        base = FishbowlCalculator.calculate_all_metrics(make_series(300)).assign(symbol='X')
+        state = FishbowlCalculator.build_state(base.iloc[:-1])
+        states = [dict(state, symbol=f'S{i}') for i in range(symbols)]
+        bar = base.iloc[-1:][['date', 'close']]
+        record('advance_state (1 bar)', symbols, symbols,
+               lambda: FishbowlCalculator.advanced_frames(
+                   {s['symbol']: FishbowlCalculator.advance_state(s, bar) for s in states}))
+
+    print("\n⏱️  Sparkline 构建")
+    metrics = FishbowlCalculator.calculate_all_metrics(make_series(1000))
+    sparkline = FishbowlCalculator.generate_sparkline_json(metrics, days=250)
+    record('generate_sparkline_json', 250, 1,
+           lambda: FishbowlCalculator.generate_sparkline_json(metrics, days=250))
+    record('append_to_sparkline', 250, 1,
+           lambda: quiet(FishbowlCalculator.append_to_sparkline, sparkline, '2099-01-01', 1.0, 1.0, 0.5))
+
+    return results
+
+
+# ================================================
+# 黄金输出校验
+# ================================================
+def compare_frames(actual: pd.DataFrame, expected: pd.DataFrame, rtol: float = 0.0) -> Optional[str]:
+    """比较两份指标结果，返回差异说明；一致时返回 None"""
+    if len(actual) != len(expected):
+        return f"行数不一致: {len(actual)} != {len(expected)}"
+    for col in METRIC_COLUMNS + ['close']:
+        a = pd.to_numeric(actual[col]).to_numpy(dtype=float)
+        b = pd.to_numeric(expected[col]).to_numpy(dtype=float)
+        # 偏离度 / 涨幅为无量纲小数，接近 0 时相对误差失真，同时给出同量级的绝对容差
+        same = np.isclose(a, b, rtol=rtol, atol=rtol, equal_nan=True) if rtol else \
+            ((a == b) | (np.isnan(a) & np.isnan(b)))
+        if not same.all():
+            i = int(np.argmin(same))
+            return f"{col} 第 {i} 行不一致: {a[i]!r} != {b[i]!r}"
+    for col in LABEL_COLUMNS:
+        a = actual[col].tolist()
+        b = expected[col].tolist()
+        if a != b:
+            i = next(k for k in range(len(a)) if a[k] != b[k])
+            return f"{col} 第 {i} 行不一致: {a[i]!r} != {b[i]!r}"
+    return None
+
+
+def run_golden_checks() -> List[Dict]:
+    checks = []
+
+    def check(name: str, error: Optional[str]):
+        checks.append({'name': name, 'passed': error is None, 'detail': error or ''})
+        print(f"  {'✅' if error is None else '❌'} {name}" + (f": {error}" if error else ""))
+
+    cases = band_edge_cases()
+
+    print("\n🔍 向量化实现 vs 参考实现（逐位一致）")
+    for name, df in cases.items():
+        actual = FishbowlCalculator.calculate_all_metrics(df)
+        expected = ReferenceCalculator.calculate_all_metrics(df)
+        error = compare_frames(actual, expected)
+        if error is None:
+            try:
+                pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+            except AssertionError as e:
+                error = str(e).splitlines()[0]
+        check(f'calculate_all_metrics[{name}]', error)
+
+    print("\n🔍 面板模式 vs 逐个计算")
+    for days, symbols, seed in [(400, 50, 1), (1200, 20, 2)]:
+        panel = make_panel(days, symbols, seed=seed, holiday_ratio=0.05)
+        result = FishbowlCalculator.calculate_panel(panel)
+        error = None
+        for symbol in panel.columns:
+            col = panel[symbol].dropna()
+            expected = FishbowlCalculator.calculate_all_metrics(
+                pd.DataFrame({'date': col.index, 'close': col.to_numpy()}))
+            actual = result[result['symbol'] == symbol].reset_index(drop=True)
+            error = compare_frames(actual, expected, rtol=1e-10)
+            if error:
+                error = f"{symbol}: {error}"
+                break
+        check(f'calculate_panel[{days}x{symbols}]', error)
+
+    print("\n🔍 增量状态推进 vs 全量重算")
+    for name, df in cases.items():
+        if len(df) < 25:
+            continue
+        full = FishbowlCalculator.calculate_all_metrics(df).assign(symbol='X')
+        error = None
+        for k in (1, 5, 20):
+            head = full.iloc[:len(full) - k].reset_index(drop=True)
+            state = FishbowlCalculator.build_state(head)
+            advanced = FishbowlCalculator.advanced_frames(
+                {'X': FishbowlCalculator.advance_state(state, df.iloc[len(df) - k - 1:])})['X']
+            error = compare_frames(advanced, full.iloc[len(full) - k:].reset_index(drop=True), rtol=1e-9)
+            if error:
+                error = f"推进 {k} 天: {error}"
+                break
+        check(f'advance_state[{name}]', error)
+
+    print("\n🔍 增量窗口拼接（复权基准变化时全量拉取）")
+    class WindowFetcher:
+        """按 start_date 返回窗口的离线数据获取器，记录每次请求的起始日期"""
+
+        def __init__(self, history: pd.DataFrame):
+            self.history = history
+            self.requests = []
+
+        def fetch_history(self, symbol, category, start_date=None):
+            self.requests.append(start_date)
+            if start_date is None:
+                return self.history.copy()
+            return self.history[self.history['date'] >= pd.Timestamp(start_date)].reset_index(drop=True)
+
+    df = cases['random_walk_0']
+    stored = FishbowlCalculator.calculate_all_metrics(df.iloc[:-1])
+    base_history = FishbowlCalculator.sparkline_to_history(FishbowlCalculator.generate_sparkline_json(stored))
+    start_date = (df['date'].iloc[-1] - pd.Timedelta(days=45)).strftime('%Y%m%d')
+    for name, factor in [('same_basis', 1.0), ('adjusted', 0.97)]:
+        history = df.assign(close=df['close'] * factor)
+        fetcher = WindowFetcher(history)
+        result = quiet(process_symbol, 'X', 'X', 'broad', fetcher, start_date=start_date, base_history=base_history)
+        expected_requests = [start_date] if factor == 1.0 else [start_date, None]
+        if fetcher.requests != expected_requests:
+            error = f"请求序列 {fetcher.requests} != {expected_requests}"
+        elif factor == 1.0:
+            error = None if len(result) == len(base_history) + 1 else f"拼接后行数 {len(result)}"
+        else:
+            error = compare_frames(result, FishbowlCalculator.calculate_all_metrics(history).assign(symbol='X'))
+        check(f'process_symbol_splice[{name}]', error)
+
+    print("\n🔍 Sparkline 构建 vs 参考实现")
+    for name in ['random_walk_0', 'inside_band', 'single_row']:
+        metrics = FishbowlCalculator.calculate_all_metrics(cases[name])
+        last = metrics.iloc[-1]
+        for today in (last['date'].strftime('%Y-%m-%d'), '2099-01-01'):
+            args = dict(days=250, today_date=today, today_price=float(last['close']),
+                        today_ma20=float(last['ma20_price']))
+            actual = FishbowlCalculator.generate_sparkline_json(metrics, **args)
+            expected = ReferenceCalculator.generate_sparkline_json(metrics, **args)
+            check(f'generate_sparkline_json[{name}, {today}]',
+                  None if json.loads(actual) == json.loads(expected) else "输出不一致")
+
+    base = ReferenceCalculator.generate_sparkline_json(
+        FishbowlCalculator.calculate_all_metrics(cases['random_walk_1']), days=250)
+    last_date = json.loads(base)[-1]['date']
+    append_cases = {
+        'new_day': (base, '2099-01-01', 250),
+        'same_day_replace': (base, last_date, 250),
+        'trim_window': (base, '2099-01-01', 30),
+        'empty': (None, '2099-01-01', 250),
+        'invalid_json': ('not json', '2099-01-01', 250),
+        'not_a_list': ('{"a": 1}', '2099-01-01', 250),
+    }
+    for name, (current, today, max_days) in append_cases.items():
+        args = (current, today, 123.45678, 120.12345, 1.2345, max_days)
+        actual = quiet(FishbowlCalculator.append_to_sparkline, *args)
+        expected = ReferenceCalculator.append_to_sparkline(*args)
+        check(f'append_to_sparkline[{name}]',
+              None if json.loads(actual) == json.loads(expected) else "输出不一致")
+
+    print("\n🔍 v2 列式编码往返一致")
+    for name in ['random_walk_0', 'tiny_prices', 'single_row']:
+        points = FishbowlCalculator.sparkline_points(FishbowlCalculator.calculate_all_metrics(cases[name]))
+        encoded = FishbowlCalculator.dump_sparkline(points, 'v2')
+        decoded = FishbowlCalculator.parse_sparkline(encoded)
+        detail = f"{len(json.dumps(points))} → {len(encoded)} 字节"
+        check(f'sparkline_v2_roundtrip[{name}] ({detail})', None if decoded == points else "解码结果不一致")
+    for name, (current, today, max_days) in append_cases.items():
+        args = (current, today, 123.45678, 120.12345, 1.2345, max_days)
+        compact_input = current
+        if FishbowlCalculator.parse_sparkline(current):
+            compact_input = FishbowlCalculator.dump_sparkline(FishbowlCalculator.parse_sparkline(current), 'v2')
+        actual = quiet(FishbowlCalculator.append_to_sparkline, compact_input, *args[1:], fmt='v2')
+        expected = ReferenceCalculator.append_to_sparkline(*args)
+        check(f'append_to_sparkline_v2[{name}]',
+              None if FishbowlCalculator.parse_sparkline(actual) == json.loads(expected) else "输出不一致")
+
+    return checks
+
+
+# ================================================
+# 报告
+# ================================================
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_comparison(report: Dict, baseline: Dict):
+    """打印与基线报告的耗时 / 内存对比"""
+    base_index = {(b['name'], b['rows'], b['symbols']): b for b in baseline.get('benchmarks', [])}
+    print("\n" + "=" * 60)
+    print(f"📊 对比基线 {baseline.get('meta', {}).get('git_revision', '?')} → {report['meta']['git_revision']}")
+    print("=" * 60)
+    for item in report['benchmarks']:
+        base = base_index.get((item['name'], item['rows'], item['symbols']))
+        if not base:
+            continue
+        speedup = base['seconds'] / item['seconds'] if item['seconds'] else float('inf')
+        print(f"  {item['name']:<32} rows={item['rows']:>9,} symbols={item['symbols']:>5}  "
+              f"{base['seconds'] * 1000:>9.2f} → {item['seconds'] * 1000:>9.2f} ms ({speedup:>6.2f}x)  "
+              f"peak {base['peak_mb']:.2f} → {item['peak_mb']:.2f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='鱼盆指标计算基准测试 & 黄金输出校验')
+    parser.add_argument('--quick', action='store_true', help='只运行小规模基准')
+    parser.add_argument('--golden-only', action='store_true', help='只做黄金输出校验')
+    parser.add_argument('--repeat', type=int, default=3, help='每个基准重复次数（取最佳耗时）')
+    parser.add_argument('--output', help='保存 JSON 报告的路径')
+    parser.add_argument('--compare', help='用于对比的基线 JSON 报告')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("鱼盆指标计算基准测试 v7.3")
+    print("=" * 60)
+
+    checks = run_golden_checks()
+    benchmarks = []
+    if not args.golden_only:
+        sizes = QUICK_SERIES_SIZES if args.quick else SERIES_SIZES
+        shapes = QUICK_PANEL_SHAPES if args.quick else PANEL_SHAPES
+        benchmarks = run_benchmarks(sizes, shapes, args.repeat)
+
+    report = {
+        'meta': {
+            'git_revision': git_revision(),
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'quick': args.quick,
+        },
+        'golden': checks,
+        'benchmarks': benchmarks,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 报告已保存: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+    failed = [c for c in checks if not c['passed']]
+    print("\n" + "=" * 60)
+    print(f"黄金输出校验: {len(checks) - len(failed)}/{len(checks)} 通过")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 数据源抽象层 v7.3
+功能：
+1. 统一 DataFetcher 背后的数据来源：Tushare 风格的 query(api_name, **params) + yfinance 风格的 yf_history
+2. live:      真实的 Tushare Pro + Yahoo Finance（默认）
+3. record:    调用真实接口，同时把每次响应写入夹具文件（fixture）
+4. replay:    完全离线，从夹具文件回放响应
+5. synthetic: 完全离线，按代码确定性地生成随机游走行情，可模拟上千个标的
+6. replay / synthetic 支持配置模拟网络延迟，用于可复现的离线性能测试
+
+配置：
+    ETL_DATA_SOURCE         live | record | replay | synthetic（默认 live）
+    ETL_FIXTURE_DIR         夹具目录（默认仓库根目录下 .cache/fixtures）
+    ETL_SOURCE_LATENCY_MS   replay / synthetic 模式下每次调用的模拟延迟（毫秒）
+    ETL_SYNTHETIC_SEED      synthetic 模式的随机种子（默认 7）
+    ETL_SYNTHETIC_END       synthetic 模式的最后交易日 YYYYMMDD（默认今天，固定后结果完全可复现）
+    ETL_SYNTHETIC_SYMBOLS   synthetic 模式截面查询时额外生成的 ETF 数量（默认 0）
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'fixtures')
+
+# 夹具匹配时忽略的参数：日期区间在回放时改为按行过滤，保证跨天回放仍能命中
+RANGE_PARAMS = ('start_date', 'end_date', 'start', 'end', 'period')
+
+# Tushare 各接口单次返回的行数上限（超出部分被静默截断，只返回最近的记录）
+TUSHARE_ROW_LIMITS = {
+    'index_daily': 8000,
+    'index_global': 4000,
+    'sge_daily': 2000,
+    'fund_daily': 2000,
+}
+# 未在上表中列出的接口使用该默认值
+DEFAULT_ROW_LIMIT = 2000
+
+
+# ================================================
+# 数据源基类
+# ================================================
+class DataSource:
+    """数据源基类"""
+
+    name = 'base'
+
+    def query(self, api_name: str, **params) -> pd.DataFrame:
+        """Tushare 风格的接口调用，返回 Tushare 原始格式的 DataFrame"""
+        raise NotImplementedError
+
+    def yf_history(self, yahoo_symbol: str, **params) -> pd.DataFrame:
+        """yfinance 风格的历史行情（等价于 yf.Ticker(symbol).history(**params)）"""
+        raise NotImplementedError
+
+    def pro_client(self) -> 'ProClient':
+        """返回与 ts.pro_api() 用法一致的客户端（pro.index_daily(...) 等）"""
+        return ProClient(self)
+
+
+class ProClient:
+    """把 pro.<api_name>(**params) 转发到 DataSource.query"""
+
+    def __init__(self, source: DataSource):
+        self._source = source
+
+    def __getattr__(self, api_name: str):
+        if api_name.startswith('_'):
+            raise AttributeError(api_name)
+
+        def call(**params):
+            return self._source.query(api_name, **params)
+
+        call.__name__ = api_name
+        return call
+
+
+# ================================================
+# live: 真实接口
+# ================================================
+class LiveSource(DataSource):
+    """真实的 Tushare Pro + Yahoo Finance"""
+
+    name = 'live'
+
+    def __init__(self):
+        import tushare as ts
+
+        token = os.getenv('TUSHARE_TOKEN')
+        if not token:
+            raise ValueError("环境变量 TUSHARE_TOKEN 未设置")
+        ts.set_token(token)
+        self.pro = ts.pro_api()
+
+    def query(self, api_name: str, **params) -> pd.DataFrame:
+        return getattr(self.pro, api_name)(**params)
+
+    def yf_history(self, yahoo_symbol: str, **params) -> pd.DataFrame:
+        import yfinance as yf
+
+        return yf.Ticker(yahoo_symbol).history(**params)
+
+
+# ================================================
+# 夹具文件
+# ================================================
+def _fixture_key(kind: str, name: str, params: Dict, include_range: bool) -> str:
+    items = {k: v for k, v in params.items() if include_range or k not in RANGE_PARAMS}
+    raw = json.dumps([kind, name, items], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class RecordingSource(DataSource):
+    """调用被包装的数据源，并把每次响应写入夹具目录"""
+
+    name = 'record'
+
+    def __init__(self, inner: DataSource, fixture_dir: str):
+        self.inner = inner
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+
+    def _record(self, kind: str, name: str, params: Dict, df: pd.DataFrame):
+        if df is None:
+            return
+        data = df.reset_index() if kind == 'yfinance' else df
+        payload = {
+            'kind': kind,
+            'name': name,
+            'params': {k: str(v) for k, v in params.items()},
+            'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'data': json.loads(data.to_json(orient='split', index=False, date_format='iso')),
+        }
+        directory = os.path.join(self.fixture_dir, kind, name.replace('/', '_'))
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            # 精确键（含日期区间）与宽松键（不含日期区间）各写一份，回放时优先精确匹配
+            for include_range in (True, False):
+                key = _fixture_key(kind, name, params, include_range)
+                prefix = 'exact' if include_range else 'loose'
+                with open(os.path.join(directory, f"{prefix}-{key}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False)
+
+    def query(self, api_name: str, **params) -> pd.DataFrame:
+        df = self.inner.query(api_name, **params)
+        self._record('tushare', api_name, params, df)
+        return df
+
+    def yf_history(self, yahoo_symbol: str, **params) -> pd.DataFrame:
+        df = self.inner.yf_history(yahoo_symbol, **params)
+        self._record('yfinance', yahoo_symbol, params, df)
+        return df
+
+
+class ReplaySource(DataSource):
+    """从夹具目录离线回放响应，未录制的调用返回空 DataFrame"""
+
+    name = 'replay'
+
+    def __init__(self, fixture_dir: str, latency: float = 0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+
+    def _load(self, kind: str, name: str, params: Dict) -> Optional[pd.DataFrame]:
+        directory = os.path.join(self.fixture_dir, kind, name.replace('/', '_'))
+        for include_range, prefix in ((True, 'exact'), (False, 'loose')):
+            path = os.path.join(directory, f"{prefix}-{_fixture_key(kind, name, params, include_range)}.json")
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                data = payload['data']
+                df = pd.DataFrame(data['data'], columns=data['columns'])
+                return df if include_range else _filter_range(kind, df, params)
+        return None
+
+    def query(self, api_name: str, **params) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        df = self._load('tushare', api_name, params)
+        if df is None:
+            print(f"  ⚠️  [replay] 未找到夹具: {api_name} {params}")
+            return pd.DataFrame()
+        return df
+
+    def yf_history(self, yahoo_symbol: str, **params) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        df = self._load('yfinance', yahoo_symbol, params)
+        if df is None or df.empty:
+            print(f"  ⚠️  [replay] 未找到夹具: {yahoo_symbol} {params}")
+            return pd.DataFrame()
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df.set_index('Date')
+
+
+def _filter_range(kind: str, df: pd.DataFrame, params: Dict) -> pd.DataFrame:
+    """宽松匹配的夹具按请求的日期区间过滤"""
+    if df.empty:
+        return df
+
+    if kind == 'yfinance':
+        dates = pd.to_datetime(df['Date'])
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        mask = pd.Series(True, index=df.index)
+        if params.get('start') is not None:
+            mask &= dates >= pd.Timestamp(params['start'])
+        if params.get('end') is not None:
+            mask &= dates < pd.Timestamp(params['end'])
+        df = df[mask]
+        if params.get('period'):
+            days = int(str(params['period']).rstrip('d') or 0)
+            df = df.tail(days)
+        return df.reset_index(drop=True)
+
+    date_col = 'trade_date' if 'trade_date' in df.columns else 'cal_date' if 'cal_date' in df.columns else None
+    if date_col is None:
+        return df
+    dates = df[date_col].astype(str)
+    if params.get('start_date'):
+        df = df[dates >= str(params['start_date'])]
+        dates = df[date_col].astype(str)
+    if params.get('end_date'):
+        df = df[dates <= str(params['end_date'])]
+    return df.reset_index(drop=True)
+
+
+# ================================================
+# synthetic: 确定性生成的行情
+# ================================================
+class SyntheticSource(DataSource):
+    """
+    离线合成数据源
+
+    每个代码的行情由 (种子, 代码) 唯一确定，是从 2015 年起的工作日随机游走，
+    trade_date 截面查询会覆盖已请求过的代码以及 ETL_SYNTHETIC_SYMBOLS 个额外 ETF。
+    与 Tushare 一致，单次返回行数超过 TUSHARE_ROW_LIMITS 时只保留最近的记录。
+    """
+
+    name = 'synthetic'
+    START_DATE = '20150101'
+
+    def __init__(self, seed: int = 7, latency: float = 0.0,
+                 end_date: Optional[str] = None, extra_symbols: int = 0):
+        self.seed = seed
+        self.latency = latency
+        self.end_date = end_date or datetime.now().strftime('%Y%m%d')
+        self.dates = pd.bdate_range(self.START_DATE, self.end_date)
+        self.universe = [f"{500000 + i:06d}.SH" for i in range(extra_symbols)]
+        self.trade_dates = np.asarray(self.dates.strftime('%Y%m%d'))
+        self._series: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _arrays(self, symbol: str) -> Dict[str, np.ndarray]:
+        """生成（并缓存）某个代码的全部行情列"""
+        with self._lock:
+            if symbol not in self._series:
+                rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode('utf-8'))])
+                n = len(self.dates)
+                base = 1.0 + rng.random() * 4 if symbol[:1] in '15' else 1000 + rng.random() * 4000
+                returns = rng.normal(0.0002, 0.012, n)
+                close = np.round(base * np.exp(np.cumsum(returns)), 4)
+                pre_close = np.concatenate([[close[0]], close[:-1]])
+                self._series[symbol] = {
+                    'open': pre_close,
+                    'high': np.maximum(close, pre_close),
+                    'low': np.minimum(close, pre_close),
+                    'close': close,
+                    'pre_close': pre_close,
+                    'pct_chg': np.round((close / pre_close - 1) * 100, 4),
+                    'vol': np.round(rng.random(n) * 1e7, 2),
+                    'amount': np.round(rng.random(n) * 1e8, 2),
+                }
+                if symbol not in self.universe:
+                    self.universe.append(symbol)
+            return self._series[symbol]
+
+    def _bars(self, symbol: str) -> pd.DataFrame:
+        df = pd.DataFrame(self._arrays(symbol))
+        df.insert(0, 'trade_date', self.trade_dates)
+        df.insert(0, 'ts_code', symbol)
+        return df
+
+    def query(self, api_name: str, **params) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+
+        if api_name in ('trade_cal', 'us_tradecal', 'hk_tradecal'):
+            start = params.get('start_date', self.START_DATE)
+            end = params.get('end_date', self.end_date)
+            days = pd.date_range(start, end)
+            df = pd.DataFrame({
+                'exchange': params.get('exchange', 'SSE'),
+                'cal_date': days.strftime('%Y%m%d'),
+                'is_open': (days.dayofweek < 5).astype(int),
+            })
+            if str(params.get('is_open', '')) == '1':
+                df = df[df['is_open'] == 1]
+            return df.reset_index(drop=True)
+
+        if api_name in ('fund_portfolio', 'stock_basic'):
+            return pd.DataFrame()
+
+        if params.get('ts_code'):
+            df = self._bars(params['ts_code'])
+        elif params.get('trade_date'):
+            trade_date = pd.Timestamp(str(params['trade_date']))
+            if trade_date not in self.dates:
+                return pd.DataFrame()
+            pos = self.dates.get_loc(trade_date)
+            symbols = list(self.universe)
+            series = [self._arrays(symbol) for symbol in symbols]
+            df = pd.DataFrame({col: [s[col][pos] for s in series] for col in series[0]}) if series else pd.DataFrame()
+            if not df.empty:
+                df.insert(0, 'trade_date', str(params['trade_date']))
+                df.insert(0, 'ts_code', symbols)
+                if api_name == 'fund_adj':
+                    # 合成行情没有除权除息，复权因子恒为 1
+                    df = df[['ts_code', 'trade_date']].assign(adj_factor=1.0)
+            return df
+        else:
+            return pd.DataFrame()
+
+        df = _filter_range('tushare', df, params)
+        # Tushare 默认按日期降序返回，超过单次行数上限的部分被截断
+        return df.iloc[::-1].head(TUSHARE_ROW_LIMITS.get(api_name, DEFAULT_ROW_LIMIT)).reset_index(drop=True)
+
+    def yf_history(self, yahoo_symbol: str, **params) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+
+        bars = self._bars(yahoo_symbol)
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(bars['trade_date'], format='%Y%m%d'),
+            'Open': bars['open'],
+            'High': bars['high'],
+            'Low': bars['low'],
+            'Close': bars['close'],
+            'Volume': bars['vol'],
+        })
+        df = _filter_range('yfinance', df, params)
+        return df.set_index('Date')
+
+
+# ================================================
+# 工厂方法
+# ================================================
+def create_data_source(mode: Optional[str] = None) -> DataSource:
+    """根据 ETL_DATA_SOURCE 创建数据源"""
+    mode = (mode or os.getenv('ETL_DATA_SOURCE', 'live')).lower()
+    fixture_dir = os.getenv('ETL_FIXTURE_DIR') or DEFAULT_FIXTURE_DIR
+    latency = float(os.getenv('ETL_SOURCE_LATENCY_MS', '0')) / 1000.0
+
+    if mode == 'live':
+        return LiveSource()
+    if mode == 'record':
+        print(f"📼 数据源: record（夹具目录: {fixture_dir}）")
+        return RecordingSource(LiveSource(), fixture_dir)
+    if mode == 'replay':
+        print(f"📼 数据源: replay（夹具目录: {fixture_dir}，模拟延迟: {latency * 1000:.0f}ms）")
+        return ReplaySource(fixture_dir, latency=latency)
+    if mode == 'synthetic':
+        print(f"🧪 数据源: synthetic（模拟延迟: {latency * 1000:.0f}ms）")
+        return SyntheticSource(
+            seed=int(os.getenv('ETL_SYNTHETIC_SEED', '7')),
+            latency=latency,
+            end_date=os.getenv('ETL_SYNTHETIC_END'),
+            extra_symbols=int(os.getenv('ETL_SYNTHETIC_SYMBOLS', '0')),
+        )
+    raise ValueError(f"未知的数据源模式: {mode}（可选 live / record / replay / synthetic）")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 共享数据库连接池 v7.3
+功能：
+1. 基于 psycopg2 ThreadedConnectionPool，一次运行只建立少量连接，所有查询复用
+2. 进程内按连接串共享：etl.py / update_holdings.py / fix_sparkline_v7.py 共用同一个连接池
+   （连接串先经 normalize_dsn 统一追加会话时区 Asia/Shanghai，同一个 DATABASE_URL 得到同一个池）
+3. 取出连接时做健康检查：已断开的连接直接丢弃，空闲超过阈值的连接先 SELECT 1 探活
+4. 上下文管理器 API：with pool.connection() as conn: ...，异常时回滚，归还前结束未提交的事务
+5. 连接数达到上限时阻塞等待，而不是像 ThreadedConnectionPool 那样直接抛出 PoolError
+
+配置：
+    DB_POOL_MIN              最小连接数（默认 1）
+    DB_POOL_MAX              最大连接数（默认 6，需不小于 ETL_MAX_WORKERS）
+    DB_POOL_PING_INTERVAL    连接空闲超过该秒数后，取出前先探活（默认 30）
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 6
+DEFAULT_PING_INTERVAL = 30.0
+
+# 会话时区，确保 DATE 字段不被时区转换
+SESSION_TIMEZONE = 'Asia/Shanghai'
+
+
+def normalize_dsn(dsn: str) -> str:
+    """
+    为连接串追加会话时区（已指定 timezone 时原样返回）
+
+    支持 URL（postgresql://...，URL 编码：空格=%20, ==%3D）和 key=value 两种格式。
+    """
+    if 'timezone' in dsn:
+        return dsn
+    if '://' in dsn:
+        return f"{dsn}{'&' if '?' in dsn else '?'}options=-c%20timezone%3D{SESSION_TIMEZONE}"
+    return f"{dsn} options='-c timezone={SESSION_TIMEZONE}'"
+
+
+class ConnectionPool:
+    """线程安全、带健康检查的数据库连接池"""
+
+    def __init__(self, dsn: str, minconn: Optional[int] = None, maxconn: Optional[int] = None,
+                 ping_interval: Optional[float] = None):
+        self.dsn = dsn
+        self.minconn = minconn if minconn is not None else int(os.getenv('DB_POOL_MIN', DEFAULT_POOL_MIN))
+        self.maxconn = maxconn if maxconn is not None else int(os.getenv('DB_POOL_MAX', DEFAULT_POOL_MAX))
+        self.maxconn = max(self.maxconn, self.minconn, 1)
+        self.ping_interval = ping_interval if ping_interval is not None else \
+            float(os.getenv('DB_POOL_PING_INTERVAL', DEFAULT_PING_INTERVAL))
+
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        # 懒创建：只在第一次取连接时建立 minconn 个连接
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadedConnectionPool(self.minconn, self.maxconn, self.dsn)
+            return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """检查连接是否可用：已关闭的直接判定失效，空闲过久的先 SELECT 1"""
+        if conn.closed:
+            return False
+        idle = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle < self.ping_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """取出一个可用连接（连接数达到上限时阻塞等待）"""
+        self._slots.acquire()
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            # 池中可能有多个空闲连接同时失效（如数据库重启），逐个丢弃直到拿到可用连接
+            for _ in range(self.maxconn):
+                if self._is_healthy(conn):
+                    break
+                print("  ⚠️  数据库连接已失效，重新建立连接")
+                self._last_used.pop(id(conn), None)
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close: bool = False):
+        """归还连接：未结束的事务先回滚，避免把脏状态留给下一个使用者"""
+        try:
+            if not conn.closed and not close:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                self._last_used[id(conn)] = time.monotonic()
+            else:
+                self._last_used.pop(id(conn), None)
+            self._get_pool().putconn(conn, close=close or bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        上下文管理器：取出连接，结束时自动归还
+
+        用法：
+            with pool.connection() as conn:
+                cursor = conn.cursor()
+                ...
+                conn.commit()
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """关闭连接池中的全部连接"""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+
+# ================================================
+# 进程内共享实例
+# ================================================
+_shared_pools: Dict[str, ConnectionPool] = {}
+_shared_lock = threading.Lock()
+
+
+def get_pool(dsn: str) -> ConnectionPool:
+    """获取进程内按连接串共享的连接池（连接串先经 normalize_dsn 规范化）"""
+    dsn = normalize_dsn(dsn)
+    with _shared_lock:
+        pool = _shared_pools.get(dsn)
+        if pool is None:
+            pool = ConnectionPool(dsn)
+            _shared_pools[dsn] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    """进程退出时关闭所有连接池"""
+    with _shared_lock:
+        for pool in _shared_pools.values():
+            pool.closeall()
+        _shared_pools.clear()
@@ -18,18 +18,31 @@
    - 极大提升稳定性，减少对外部 API 的依赖
 """
 
+import argparse
 import os
 import sys
+import numpy as np
 import pandas as pd
-import tushare as ts
-import yfinance as yf  # v6.4: 用于获取实时美股指数数据
-import psycopg2
 from psycopg2.extras import RealDictCursor, execute_values
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import time
+import threading
+import io
 import json
+import math
+
+from bar_cache import OHLCV_COLUMNS, BarCache
+from trade_calendar import TradeCalendar, market_of
+from history_loader import HistoryLoader
+from source_health import SourceHealth, previous_weekday, staleness_days
+from db_pool import get_pool, normalize_dsn
+from data_sources import DataSource, create_data_source
+from rate_limiter import get_rate_limiter
+from hedged import HedgedCallError, hedged_call
 
 # 设置标准输出编码为UTF-8（解决Windows编码问题）
 if sys.platform.startswith('win'):
@@ -38,6 +51,59 @@ if sys.platform.startswith('win'):
 # 加载环境变量
 load_dotenv()
 
+# v7.3: 并发抓取的工作线程数（设为 1 时退化为逐个串行处理）
+ETL_MAX_WORKERS = int(os.getenv('ETL_MAX_WORKERS', '4'))
+
+# v7.3: 截面批量模式（按交易日一次拉取全部行业 ETF），设为 false 可关闭
+ETL_BULK_MODE = os.getenv('ETL_BULK_MODE', 'true').lower() in ('1', 'true', 'yes')
+# 批量模式最多回补的交易日数量，缺口更大的资产回退到逐个拉取
+BULK_MAX_TRADE_DATES = 5
+# 截面接口对应的复权因子接口：按 trade_date 截面查询时 qfq 以当日为基准（等同不复权），
+# 需要对照复权因子发现除权除息
+BULK_ADJ_APIS = {'fund_daily': 'fund_adj'}
+
+# v7.3: 增量抓取窗口 = 最后入库日期之前的预热天数（自然日），保证 MA20 至少有 20 个交易日
+INCREMENTAL_WARMUP_DAYS = 45
+# 拼接已存储历史时重叠日期收盘价的容差：sparkline 价格保留4位小数，超出即视为复权基准已变化
+SPLICE_PRICE_TOLERANCE = 1e-4
+
+# v7.3: 全量拉取（新增资产 / 重建缓存）的起始日期，由 history_loader 按接口行数上限分块并行拉取
+HISTORY_START_DATE = os.getenv('HISTORY_START_DATE', '20100101')
+
+# v7.3: 本地行情缓存补数时与已缓存区间重叠的天数（自然日），用于发现复权调整
+CACHE_OVERLAP_DAYS = 10
+
+# v7.3: sparkline_json 写入格式：v1 = 对象数组，v2 = 列式压缩（读取时两种格式均兼容）
+SPARKLINE_FORMAT = os.getenv('SPARKLINE_FORMAT', 'v2').lower()
+# v2 格式的定点精度：价格 / MA20 保留4位小数，涨幅保留2位小数
+SPARKLINE_PRICE_SCALE = 10000
+SPARKLINE_CHANGE_SCALE = 100
+
+# v7.3: 增量追加时只发送当日数据点，由数据库函数 fishbowl_sparkline_append 完成追加 / 裁剪
+# （需先执行 sql/migrations/add_sparkline_append_function.sql，函数不存在时自动回退为本地追加）
+ETL_SERVER_SPARKLINE_APPEND = os.getenv('ETL_SERVER_SPARKLINE_APPEND', 'true').lower() in ('1', 'true', 'yes')
+
+# v7.3: 命令行 --markets 可选值与交易日历市场的对应关系
+RUN_MARKETS = {
+    'cn': ('SSE', 'SZSE'),
+    'hk': ('HK',),
+    'us': ('US',),
+    'sge': ('SGE',),
+}
+
+# 市场概览补拉成交额 / 美股报价时的回看天数（自然日，覆盖最近 6 个交易日）
+OVERVIEW_LOOKBACK_DAYS = 20
+
+# v7.3: 对冲请求的错峰间隔（秒）：上一个数据源超过该时间仍未返回时并发启动下一个
+GOLD_HEDGE_STAGGER = float(os.getenv('GOLD_HEDGE_STAGGER', '1.0'))
+US_INDEX_HEDGE_STAGGER = float(os.getenv('US_INDEX_HEDGE_STAGGER', '3.0'))
+# 国际金价备用数据源：(名称, Yahoo 代码, 换算系数, 合理价格区间)，按优先级排列
+GOLD_FALLBACK_SOURCES = [
+    ('伦敦金 (USD)', 'XAUUSD=X', 1.0, (1500, 3500)),   # v6.8: 伦敦金现货
+    ('黄金期货 (COMEX)', 'GC=F', 1.0, None),
+    ('黄金 (GLD)', 'GLD', 10.87, None),                 # GLD 约 1/10 盎司黄金
+]
+
 
 # ================================================
 # 数据库连接管理
@@ -50,30 +116,30 @@ class DatabaseConnection:
         if not base_url:
             raise ValueError("环境变量 DATABASE_URL 未设置")
 
-        # 设置时区为Asia/Shanghai，确保DATE字段不被时区转换
-        # URL编码：空格=%20, =/=%3D
-        if '?' in base_url:
-            self.connection_url = f"{base_url}&options=-c%20timezone%3DAsia/Shanghai"
-        else:
-            self.connection_url = f"{base_url}?options=-c%20timezone%3DAsia/Shanghai"
+        # 设置时区为Asia/Shanghai，确保DATE字段不被时区转换（v7.3: 由 db_pool.normalize_dsn 统一处理）
+        self.connection_url = normalize_dsn(base_url)
 
-    def get_connection(self):
-        """获取数据库连接"""
-        try:
-            return psycopg2.connect(self.connection_url)
-        except Exception as e:
-            print(f"数据库连接失败: {str(e)}")
-            raise
+        # v7.3: 进程内共享连接池，一次运行只建立少量连接
+        self.pool = get_pool(self.connection_url)
+
+    def connection(self):
+        """
+        v7.3: 从共享连接池取出数据库连接（上下文管理器，结束时自动归还）
+
+        用法：
+            with db_conn.connection() as conn:
+                ...
+        """
+        return self.pool.connection()
 
     def query_data(self, sql: str, params: tuple = None) -> List[Dict]:
         """执行查询并返回数据"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(sql, params)
-            results = [dict(row) for row in cursor.fetchall()]
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute(sql, params)
+                results = [dict(row) for row in cursor.fetchall()]
+                cursor.close()
             return results
         except Exception as e:
             print(f"查询操作失败: {str(e)}")
@@ -90,32 +156,215 @@ class DatabaseConnection:
             sparkline_json 字符串，如果不存在则返回 None
         """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # 查询该标的最新的 sparkline_json
-            query = """
-                SELECT sparkline_json 
-                FROM fishbowl_daily 
-                WHERE symbol = %s 
-                  AND sparkline_json IS NOT NULL
-                ORDER BY date DESC 
-                LIMIT 1
-            """
-            cursor.execute(query, (symbol,))
-            result = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+
+                # 查询该标的最新的 sparkline_json
+                query = """
+                    SELECT sparkline_json 
+                    FROM fishbowl_daily 
+                    WHERE symbol = %s 
+                      AND sparkline_json IS NOT NULL
+                    ORDER BY date DESC 
+                    LIMIT 1
+                """
+                cursor.execute(query, (symbol,))
+                result = cursor.fetchone()
+                cursor.close()
             
             if result and result[0]:
-                return result[0]
+                # v7.3: psycopg2 会把 JSONB 自动解析为列表，这里统一转回 JSON 字符串
+                return result[0] if isinstance(result[0], str) else json.dumps(result[0])
             return None
             
         except Exception as e:
             print(f"  ⚠️  读取 {symbol} 的 sparkline 失败: {str(e)}")
             return None
 
+    def get_existing_sparklines(self, symbols: List[str], skip_null: bool = True) -> Dict[str, str]:
+        """
+        v7.3: 一次查询读取所有标的最新的 sparkline_json（取代逐个调用 get_existing_sparkline）
+
+        Args:
+            symbols: 标的代码列表
+            skip_null: True 时取最新的非空 sparkline（与 get_existing_sparkline 一致）；
+                       False 时只看每个标的最新一行，该行为空即视为没有 sparkline
+
+        Returns:
+            {symbol: sparkline_json 字符串}，没有 sparkline 的标的不包含在内
+        """
+        null_filter = "AND sparkline_json IS NOT NULL" if skip_null else ""
+        rows = self.query_data(f"""
+            SELECT DISTINCT ON (symbol) symbol, sparkline_json
+            FROM fishbowl_daily
+            WHERE symbol = ANY(%s)
+              {null_filter}
+            ORDER BY symbol, date DESC
+        """, (list(symbols),))
+        # psycopg2 会把 JSONB 自动解析为列表 / 字典，这里统一转回 JSON 字符串
+        return {
+            row['symbol']: row['sparkline_json'] if isinstance(row['sparkline_json'], str)
+            else json.dumps(row['sparkline_json'])
+            for row in rows
+            if row['sparkline_json'] is not None
+        }
+
+    def get_last_dates(self) -> Dict[str, datetime]:
+        """
+        v7.3: 一次查询获取每个标的在 fishbowl_daily 中的最后入库日期
+
+        Returns:
+            {symbol: 最后入库日期}，查询失败时返回空字典（全部走全量拉取）
+        """
+        rows = self.query_data("""
+            SELECT symbol, MAX(date) AS last_date
+            FROM fishbowl_daily
+            GROUP BY symbol
+        """)
+        return {row['symbol']: row['last_date'] for row in rows if row['last_date']}
+
+    def series_available(self) -> bool:
+        """v7.3: 判断规范化趋势图序列表 fishbowl_series 是否已创建（迁移前回退为 sparkline_json）"""
+        rows = self.query_data("SELECT to_regclass('fishbowl_series') IS NOT NULL AS available")
+        return bool(rows and rows[0]['available'])
+
+    def latest_available(self) -> bool:
+        """v7.3: 判断最新快照表 fishbowl_latest 是否已创建"""
+        rows = self.query_data("SELECT to_regclass('fishbowl_latest') IS NOT NULL AS available")
+        return bool(rows and rows[0]['available'])
+
+    def sparkline_append_available(self) -> bool:
+        """v7.3: 判断服务端追加函数 fishbowl_sparkline_append 是否已创建"""
+        rows = self.query_data(
+            "SELECT to_regprocedure('fishbowl_sparkline_append(jsonb, jsonb, integer)') IS NOT NULL AS available"
+        )
+        return bool(rows and rows[0]['available'])
+
+    def get_series_sparklines(self, symbols: List[str], limit: int = 250) -> Dict[str, str]:
+        """
+        v7.3: 一次查询读取所有标的最近 N 个趋势图数据点
+
+        Args:
+            symbols: 标的代码列表
+            limit: 每个标的读取的数据点数量
+
+        Returns:
+            {symbol: sparkline JSON 字符串}（与 sparkline_json 格式一致），无数据的标的不包含在内
+        """
+        rows = self.query_data("""
+            SELECT c.symbol, TO_CHAR(p.date, 'YYYY-MM-DD') AS date, p.price, p.ma20, p.change
+            FROM unnest(%s::text[]) AS c(symbol)
+            CROSS JOIN LATERAL (
+                SELECT date, price, ma20, change
+                FROM fishbowl_series s
+                WHERE s.symbol = c.symbol
+                ORDER BY date DESC
+                LIMIT %s
+            ) p
+            ORDER BY c.symbol, p.date
+        """, (list(symbols), limit))
+
+        points: Dict[str, List[Dict]] = {}
+        for row in rows:
+            points.setdefault(row['symbol'], []).append({
+                "date": row['date'],
+                "price": row['price'],
+                "ma20": row['ma20'],
+                "change": row['change'],
+            })
+        return {symbol: json.dumps(data) for symbol, data in points.items()}
+
+    def get_latest_overview(self) -> Optional[Dict]:
+        """v7.3: 读取最近一次保存的市场概览（部分重建时作为合并基础），没有时返回 None"""
+        rows = self.query_data("""
+            SELECT data FROM market_overview
+            ORDER BY date DESC
+            LIMIT 1
+        """)
+        if not rows or not rows[0]['data']:
+            return None
+        data = rows[0]['data']
+        return json.loads(data) if isinstance(data, str) else dict(data)
+
+    def get_states(self) -> Dict[str, Dict]:
+        """
+        v7.3: 读取全部标的的增量计算状态（fishbowl_state）
+
+        Returns:
+            {symbol: state}，表不存在或查询失败时返回空字典（全部走全量计算）
+        """
+        rows = self.query_data("""
+            SELECT symbol, last_date, closes, running_sum, status, duration_days, regime_start_price
+            FROM fishbowl_state
+        """)
+        states = {}
+        for row in rows:
+            closes = row['closes'] if isinstance(row['closes'], list) else json.loads(row['closes'])
+            states[row['symbol']] = {
+                'symbol': row['symbol'],
+                'last_date': pd.Timestamp(row['last_date']),
+                'closes': [float(c) for c in closes],
+                'running_sum': float(row['running_sum']),
+                'status': row['status'],
+                'duration_days': int(row['duration_days']),
+                'regime_start_price': float(row['regime_start_price']) if row['regime_start_price'] is not None else None,
+            }
+        return states
+
+
+# ================================================
+# v7.3 本次运行结果缓存
+# ================================================
+class RunCache:
+    """
+    本次运行的结果缓存（线程安全，只在进程内存中）
+
+    bars: 网络拉取到的原始 OHLCV 数据（同一代码多次拉取时按日期合并）
+    results: 计算完成的鱼盆指标 DataFrame
+    市场概览直接复用这些数据，只对本次运行没有覆盖到的代码联网。
+    """
+
+    def __init__(self):
+        self._bars: Dict[str, pd.DataFrame] = {}
+        self._results: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def put_bars(self, symbol: str, df: pd.DataFrame):
+        """记录原始行情（接口原始列名，如 trade_date / Date / Close / Volume）"""
+        if df is None or df.empty:
+            return
+        df = df.rename(columns={
+            'trade_date': 'date', 'Date': 'date', 'Open': 'open', 'High': 'high',
+            'Low': 'low', 'Close': 'close', 'Volume': 'vol',
+        })
+        if 'date' not in df.columns or 'close' not in df.columns:
+            return
+        bars = df[[col for col in OHLCV_COLUMNS if col in df.columns]].copy()
+        if not pd.api.types.is_datetime64_any_dtype(bars['date']):
+            bars['date'] = pd.to_datetime(bars['date'].astype(str))
+        if bars['date'].dt.tz is not None:
+            bars['date'] = bars['date'].dt.tz_localize(None)
+
+        with self._lock:
+            existing = self._bars.get(symbol)
+            if existing is not None:
+                bars = pd.concat([existing, bars], ignore_index=True)
+            self._bars[symbol] = (bars.drop_duplicates(subset='date', keep='last')
+                                  .sort_values('date').reset_index(drop=True))
+
+    def bars(self, symbol: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            return self._bars.get(symbol)
+
+    def put_result(self, symbol: str, df: pd.DataFrame):
+        with self._lock:
+            self._results[symbol] = df
+
+    def result(self, symbol: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._results.get(symbol)
+        return df if df is not None and not df.empty else None
+
 
 # ================================================
 # Tushare 数据获取器
@@ -123,12 +372,36 @@ class DatabaseConnection:
 class DataFetcher:
     """数据获取器，使用Tushare API获取指数数据"""
 
-    def __init__(self):
-        self.token = os.getenv('TUSHARE_TOKEN')
-        if not self.token:
-            raise ValueError("环境变量 TUSHARE_TOKEN 未设置")
-        ts.set_token(self.token)
-        self.pro = ts.pro_api()
+    def __init__(self, source: Optional[DataSource] = None):
+        # v7.3: 数据源可插拔（live / record / replay / synthetic，见 data_sources.py）
+        self.source = source or create_data_source()
+        self.pro = self.source.pro_client()
+
+        # v7.3: 进程内共享的按接口限流器（多线程、多脚本共用配额）
+        self.limiter = get_rate_limiter()
+
+        # v7.3: 本地行情缓存（BAR_CACHE=false 时为 None）
+        self.bar_cache = BarCache.from_env()
+
+        # v7.3: 多市场交易日历缓存（TRADE_CALENDAR=false 时为 None）
+        self.calendar = TradeCalendar.from_env(self._tushare)
+
+        # v7.3: 本次运行结果缓存（原始 OHLCV + 计算结果），供市场概览复用
+        self.run_cache = RunCache()
+
+        # v7.3: 分块并行的历史行情加载器（按接口行数上限拆分日期区间）
+        self.history_loader = HistoryLoader(self._tushare)
+
+        # v7.3: 数据源健康度记录，美股指数按耗时 / 失败率 / 滞后选择数据源（SOURCE_HEALTH=false 时为 None）
+        self.source_health = SourceHealth.from_env()
+
+    def _tushare(self, api_name: str, **kwargs) -> pd.DataFrame:
+        """
+        v7.3: 在限流器保护下调用 Tushare 接口
+
+        未达到配额时立即发起请求；收到限流报错时由限流器自动退避重试。
+        """
+        return self.limiter.call(api_name, getattr(self.pro, api_name), **kwargs)
 
     def get_index_daily_data(self, symbol: str, days: int = 365) -> pd.DataFrame:
         """
@@ -140,8 +413,7 @@ class DataFetcher:
             start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
 
             # 指数数据
-            df = self.pro.index_daily(ts_code=symbol, start_date=start_date, end_date=end_date)
-            time.sleep(0.35)
+            df = self._tushare('index_daily', ts_code=symbol, start_date=start_date, end_date=end_date)
 
             if df.empty:
                 print(f"  ⚠️  警告: 没有获取到指数 {symbol} 的数据")
@@ -157,7 +429,17 @@ class DataFetcher:
             print(f"  ❌ 获取指数 {symbol} 数据时出错: {str(e)}")
             return pd.DataFrame()
 
-    def get_etf_daily_data(self, symbol: str, days: int = 365) -> pd.DataFrame:
+    def get_index_bars(self, symbol: str, start_date: str) -> pd.DataFrame:
+        """
+        v7.3: 获取 A股指数自 start_date（YYYYMMDD）起的原始日线（含成交额等 Tushare 原始列）
+
+        用于市场概览补拉最近几日的成交额，不做列裁剪。
+        """
+        return self._tushare('index_daily', ts_code=symbol, start_date=start_date,
+                             end_date=datetime.now().strftime('%Y%m%d'))
+
+    def get_etf_daily_data(self, symbol: str, days: int = 365,
+                           start_date: Optional[str] = None) -> pd.DataFrame:
         """
         获取ETF日线数据
         使用fund_daily接口 + 前复权(qfq)消除分红缺口
@@ -165,21 +447,23 @@ class DataFetcher:
         Args:
             symbol: 代码，格式如 '512480.SH' (ETF)
             days: 获取最近N天的数据
+            start_date: v7.3 增量窗口起始日期（YYYYMMDD），指定时忽略 days
 
         Returns:
             DataFrame 包含日期和收盘价数据
         """
         try:
             end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
+            if not start_date:
+                start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
 
             # 所有ETF统一使用fund_daily接口，必须使用前复权
-            df = self.pro.fund_daily(ts_code=symbol, start_date=start_date, end_date=end_date, adj='qfq')
-            time.sleep(0.35)
+            df = self._tushare('fund_daily', ts_code=symbol, start_date=start_date, end_date=end_date, adj='qfq')
 
             if df.empty:
                 print(f"  ⚠️  警告: 没有获取到 {symbol} 的数据")
                 return pd.DataFrame()
+            self.run_cache.put_bars(symbol, df)
 
             # 按日期升序排列
             df = df.sort_values('trade_date').reset_index(drop=True)
@@ -191,13 +475,15 @@ class DataFetcher:
             print(f"  ❌ 获取 {symbol} 数据时出错: {str(e)}")
             return pd.DataFrame()
 
-    def get_us_index_data_yfinance(self, symbol: str, days: int = 365) -> pd.DataFrame:
+    def get_us_index_data_yfinance(self, symbol: str, days: int = 365,
+                                   start_date: Optional[str] = None) -> pd.DataFrame:
         """
         v6.4: 使用 yfinance 获取美股指数数据（解决 Tushare 数据滞后问题）
 
         Args:
             symbol: Tushare 代码（如 IXIC, SPX, DJI）
             days: 获取最近N天的数据
+            start_date: v7.3 增量窗口起始日期（YYYYMMDD），指定时忽略 days
 
         Returns:
             DataFrame 包含日期和收盘价数据
@@ -220,11 +506,10 @@ class DataFetcher:
 
             # 计算日期范围
             end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
+            start = datetime.strptime(start_date, '%Y%m%d') if start_date else end_date - timedelta(days=days)
 
             # 使用 yfinance 获取数据
-            ticker = yf.Ticker(yahoo_symbol)
-            df = ticker.history(start=start_date, end=end_date)
+            df = self.limiter.call('yfinance', self.source.yf_history, yahoo_symbol, start=start, end=end_date)
 
             if df.empty:
                 print(f"  ⚠️  yfinance 未返回数据: {yahoo_symbol}")
@@ -232,13 +517,17 @@ class DataFetcher:
 
             # 数据清洗：转换为标准格式 ['date', 'close']
             df = df.reset_index()
+            self.run_cache.put_bars(symbol, df)
             df = df.rename(columns={'Date': 'date', 'Close': 'close'})
 
             # 只保留需要的列
             df = df[['date', 'close']].copy()
 
             # 确保日期格式正确
+            # v7.3: 去掉时区信息，便于与已存储的历史拼接
             df['date'] = pd.to_datetime(df['date'])
+            if df['date'].dt.tz is not None:
+                df['date'] = df['date'].dt.tz_localize(None)
 
             # 按日期升序排列
             df = df.sort_values('date').reset_index(drop=True)
@@ -251,66 +540,310 @@ class DataFetcher:
             print(f"  ⚠️  yfinance 获取失败: {str(e)}")
             return pd.DataFrame()
 
-    def fetch_history(self, symbol: str, category: str) -> pd.DataFrame:
+    def get_open_trade_dates(self, start_date: str, end_date: str, exchange: str = 'SSE') -> List[str]:
+        """
+        v7.3: 获取区间内的交易日列表
+
+        Args:
+            start_date: 开始日期（YYYYMMDD）
+            end_date: 结束日期（YYYYMMDD）
+            exchange: 交易所代码（默认上交所，A股 ETF/指数通用）
+
+        Returns:
+            升序排列的交易日列表（YYYYMMDD），失败时返回空列表
+        """
+        # v7.3: 优先使用本地交易日历缓存
+        if self.calendar is not None:
+            dates = self.calendar.open_dates(exchange)
+            if dates and dates[0] <= start_date:
+                return [d for d in dates if start_date <= d <= end_date]
+
+        try:
+            df = self._tushare('trade_cal', exchange=exchange, start_date=start_date,
+                               end_date=end_date, is_open='1')
+            if df.empty:
+                return []
+            return sorted(df['cal_date'].astype(str).tolist())
+        except Exception as e:
+            print(f"  ⚠️  获取交易日历失败: {str(e)}")
+            return []
+
+    def get_daily_by_trade_date(self, api_name: str, trade_date: str) -> pd.DataFrame:
+        """
+        v7.3: 截面拉取某一交易日全部代码的日线（fund_daily）
+
+        Args:
+            api_name: Tushare 接口名
+            trade_date: 交易日（YYYYMMDD）
+
+        Returns:
+            DataFrame 包含 ['ts_code', 'date', 'close']（以及接口返回的其余 OHLCV 列）
+        """
+        try:
+            df = self._tushare(api_name, trade_date=trade_date, adj='qfq')
+
+            if df.empty:
+                return pd.DataFrame()
+
+            df['date'] = pd.to_datetime(df['trade_date'], format='%Y%m%d')
+            df['close'] = pd.to_numeric(df['close'])
+            return df[['ts_code'] + [col for col in OHLCV_COLUMNS if col in df.columns]]
+
+        except Exception as e:
+            print(f"  ❌ 截面拉取 {api_name} ({trade_date}) 失败: {str(e)}")
+            return pd.DataFrame()
+
+    def get_adj_factors(self, api_name: str, trade_dates: List[str]) -> pd.DataFrame:
+        """
+        v7.3: 按交易日截面拉取复权因子（fund_adj）
+
+        Returns:
+            DataFrame ['ts_code', 'trade_date', 'adj_factor']；接口不可用（无权限、无该列）时为空
+        """
+        frames = []
+        for trade_date in trade_dates:
+            try:
+                df = self._tushare(api_name, trade_date=trade_date)
+            except Exception as e:
+                print(f"  ⚠️  截面拉取 {api_name} ({trade_date}) 失败: {str(e)}")
+                return pd.DataFrame()
+            if df.empty:
+                # 当日复权因子尚未发布
+                continue
+            if 'adj_factor' not in df.columns:
+                return pd.DataFrame()
+            frames.append(df[['ts_code', 'trade_date', 'adj_factor']])
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df['trade_date'] = df['trade_date'].astype(str)
+        return df
+
+    def fetch_bulk_daily(self, api_name: str, symbols: List[str],
+                         trade_dates: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        v7.3: 按交易日批量拉取，并按代码拆分
+
+        每个交易日只调用一次接口，N 个代码的 N 次调用压缩为 1 次。
+
+        Returns:
+            {symbol: DataFrame['date', 'close']}，未出现在截面结果中的代码不包含在内
+        """
+        frames = [self.get_daily_by_trade_date(api_name, d) for d in trade_dates]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return {}
+
+        bulk_df = pd.concat(frames, ignore_index=True)
+        bulk_df = bulk_df[bulk_df['ts_code'].isin(symbols)]
+
+        result = {}
+        for symbol, group in bulk_df.groupby('ts_code'):
+            group = group.sort_values('date').reset_index(drop=True)
+            self.run_cache.put_bars(symbol, group)
+            result[symbol] = group[['date', 'close']]
+        return result
+
+    def fetch_history(self, symbol: str, category: str, start_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        v7.3: 优先读取本地行情缓存，只从网络补齐缓存之后的数据
+
+        缓存覆盖请求起点时，网络请求窗口为 [缓存最后日期 - CACHE_OVERLAP_DAYS, 今天]；
+        未覆盖时按请求窗口拉取，与缓存重叠则向前扩展缓存，否则以该窗口重建缓存。
+        重叠区间价格不一致（复权调整）时以本次拉取的窗口重建；补数请求失败时返回空 DataFrame，
+        不把过期的缓存当作最新数据。
+
+        Args:
+            symbol: 代码
+            category: 类别
+            start_date: 增量窗口起始日期（YYYYMMDD），指定时只返回该日期之后的数据
+
+        Returns:
+            DataFrame 包含 ['date', 'close']，按日期升序
+        """
+        if self.bar_cache is None:
+            return self._fetch_history_network(symbol, category, start_date)
+
+        request_start = start_date or HISTORY_START_DATE
+        if not self.bar_cache.covers(symbol, request_start):
+            df = self._fetch_history_network(symbol, category, start_date)
+            if df.empty:
+                return df
+            bars = self._raw_bars(symbol, df)
+            if self.bar_cache.coverage(symbol) is not None and not self.bar_cache.conflicts(symbol, bars):
+                self.bar_cache.append(symbol, bars, since=request_start)
+            else:
+                self.bar_cache.replace(symbol, bars, since=request_start)
+            return df
+
+        coverage = self.bar_cache.coverage(symbol)
+        topup_start = (pd.Timestamp(coverage[1]) - timedelta(days=CACHE_OVERLAP_DAYS)).strftime('%Y%m%d')
+        print(f"  💾 [{symbol}] 本地缓存 {coverage[0]} ~ {coverage[1]}，补数起点 {topup_start}")
+        new_bars = self._fetch_history_network(symbol, category, topup_start)
+        if new_bars.empty:
+            print(f"  ⚠️  [{symbol}] 补数失败，本次不使用缓存数据")
+            return new_bars
+
+        if self.bar_cache.conflicts(symbol, new_bars):
+            print(f"  ⚠️  [{symbol}] 缓存价格与最新数据不一致（可能发生复权调整），重建缓存")
+            df = self._fetch_history_network(symbol, category, start_date)
+            if df.empty:
+                return df
+            self.bar_cache.replace(symbol, self._raw_bars(symbol, df), since=request_start)
+            return df
+
+        self.bar_cache.append(symbol, self._raw_bars(symbol, new_bars))
+        df = self.bar_cache.load(symbol)
+        if start_date:
+            df = df[df['date'] >= pd.Timestamp(start_date)]
+        return df[['date', 'close']].reset_index(drop=True)
+
+    def _raw_bars(self, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """v7.3: 为 ['date', 'close'] 补上本次运行记录的其余原始列（open / high / low / vol ...），用于写入行情缓存"""
+        bars = self.run_cache.bars(symbol)
+        if bars is None:
+            return df
+        extra = [col for col in bars.columns if col not in ('date', 'close')]
+        return df[['date', 'close']].merge(bars[['date'] + extra], on='date', how='left')
+
+    def load_history(self, api_name: str, symbol: str, start_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        v7.3: 分块并行拉取单个代码的日线（见 history_loader.py），并对照交易日历检查缺失的交易日
+
+        Args:
+            api_name: Tushare 接口名（index_daily / sge_daily / index_global）
+            symbol: 代码
+            start_date: 起始日期（YYYYMMDD），不指定时从 HISTORY_START_DATE 开始
+
+        Returns:
+            接口原始列的 DataFrame，按 trade_date 升序
+        """
+        expected_dates = self.calendar.open_dates(market_of(symbol)) if self.calendar else None
+        return self.history_loader.load(api_name, start_date or HISTORY_START_DATE,
+                                        expected_dates=expected_dates, ts_code=symbol)
+
+    def _get_us_index_data_tushare(self, symbol: str, start_date: Optional[str] = None) -> pd.DataFrame:
+        """v7.3: 使用 Tushare index_global 获取美股指数数据（可能滞后），返回 ['date', 'close']"""
+        df = self.load_history('index_global', symbol, start_date)
+        if df.empty:
+            return pd.DataFrame()
+
+        self.run_cache.put_bars(symbol, df)
+        df = df.rename(columns={'trade_date': 'date'})
+        df['date'] = pd.to_datetime(df['date'])
+        df['close'] = pd.to_numeric(df['close'])
+        return df.sort_values('date').reset_index(drop=True)[['date', 'close']]
+
+    def _measured(self, market: str, source: str, fetch, expected, stale_results: Dict[str, Tuple[int, pd.DataFrame]]):
+        """
+        v7.3: 包装数据源请求，记录耗时、成败以及最新 K 线的滞后天数
+
+        最新 K 线落后预期交易日时暂存到 stale_results 并抛出异常，
+        使对冲请求立即启动下一个数据源（全部滞后时由调用方取滞后最少的结果）
+        """
+        def run() -> pd.DataFrame:
+            started = time.monotonic()
+            try:
+                df = fetch()
+            except Exception:
+                if self.source_health is not None:
+                    self.source_health.record(market, source, time.monotonic() - started, ok=False)
+                raise
+            ok = not df.empty
+            staleness = staleness_days(df['date'].max().date(), expected) if ok else None
+            if self.source_health is not None:
+                self.source_health.record(market, source, time.monotonic() - started, ok=ok, staleness=staleness)
+            if staleness:
+                stale_results[source] = (staleness, df)
+                raise ValueError(f"最新数据 {df['date'].max().date()} 落后 {staleness} 个交易日")
+            return df
+        return run
+
+    def fetch_us_index(self, symbol: str, start_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        v7.3: 获取美股指数数据，按数据源健康度在 yfinance / Tushare index_global 之间路由
+
+        - 预期代价（耗时 + 滞后 + 失败率，跨运行记录）最低的数据源优先，未记录时 yfinance 优先（v6.4）
+        - 首选数据源超过 US_INDEX_HEDGE_STAGGER 秒未返回、失败或最新 K 线落后预期交易日时，
+          立即请求下一个，取优先级最高的有效结果；全部滞后时取滞后最少的结果
+        - 未记录过或长时间未请求的数据源与首选数据源同时请求一次（探测），以更新其代价
+        - 连续失败的数据源在冷却期内跳过
+        v6.5 注意: NDX (纳指100) Tushare 不支持，只能依赖 yfinance（Tushare 只有 IXIC 综合指数）
+
+        Returns:
+            DataFrame ['date', 'close']，按日期升序；全部失败时为空
+        """
+        sources = {'yfinance': partial(self.get_us_index_data_yfinance, symbol, start_date=start_date)}
+        if symbol != 'NDX':
+            sources['tushare'] = partial(self._get_us_index_data_tushare, symbol, start_date=start_date)
+
+        order = list(sources)
+        stagger = US_INDEX_HEDGE_STAGGER
+        if self.source_health is not None:
+            order = self.source_health.rank('US', order)
+            probes = [name for name in order[1:] if self.source_health.claim_probe('US', name)]
+            if probes:
+                # 探测：所有数据源同时启动，结果仍按优先级选取
+                print(f"  🔍 探测数据源: {', '.join(probes)}")
+                stagger = 0
+        if order[0] != 'yfinance':
+            print(f"  🧭 {symbol} 优先使用数据源: {order[0]}")
+
+        expected = (self.calendar.latest_session('US') if self.calendar else None) or previous_weekday(datetime.now().date())
+        stale_results: Dict[str, Tuple[int, pd.DataFrame]] = {}
+        sources = {name: self._measured('US', name, fetch, expected, stale_results) for name, fetch in sources.items()}
+
+        try:
+            source_name, df = hedged_call([(name, sources[name]) for name in order], stagger=stagger,
+                                          validate=lambda result: not result.empty)
+        except HedgedCallError:
+            if stale_results:
+                source_name = min(stale_results, key=lambda name: stale_results[name][0])
+                staleness, df = stale_results[source_name]
+                print(f"  ⚠️  {symbol} 各数据源均未更新到 {expected}，使用 {source_name} 数据（落后 {staleness} 个交易日）")
+                return df
+            if symbol == 'NDX':
+                print(f"  ⚠️  yfinance 失败且 Tushare 不支持 {symbol}，跳过本次更新")
+            else:
+                print(f"  ⚠️  yfinance 与 Tushare 均未获取到 {symbol} 的数据")
+            return pd.DataFrame()
+
+        if source_name != order[0]:
+            print(f"  🔄 {order[0]} 失败，使用 {source_name} 数据: {symbol}")
+        return df
+
+    def _fetch_history_network(self, symbol: str, category: str, start_date: Optional[str] = None) -> pd.DataFrame:
         """
         多接口路由：根据资产类型自动选择对应的数据接口
         v5.3: 支持 A股指数 + 全球指数 + 贵金属现货
         v6.4: 美股指数优先使用 yfinance（解决 Tushare 数据滞后问题）
+        v7.3: 支持增量窗口 start_date（YYYYMMDD），不指定时从 HISTORY_START_DATE 全量拉取；
+              sge_daily / index_global / index_daily 经 load_history 分块并行拉取，避免单次行数上限截断
         """
         try:
             # 1. 行业轮动 -> 基金接口 (ETF)
             if category == 'industry':
-                return self.get_etf_daily_data(symbol)
+                return self.get_etf_daily_data(symbol, start_date=start_date)
 
             # 2. 宽基大势 -> 混合接口路由
             # A. 贵金属 (代码特征: Au, Ag 开头) -> 上海金交所接口
             if symbol.startswith('Au') or symbol.startswith('Ag'):
                 print(f"  🔸 使用贵金属接口: {symbol}")
-                df = self.pro.sge_daily(ts_code=symbol)
-                time.sleep(0.35)
+                df = self.load_history('sge_daily', symbol, start_date)
 
-            # B. 美股指数 -> 优先使用 yfinance，失败时回退到 Tushare
+            # B. 美股指数 -> yfinance / Tushare 按数据源健康度路由（v7.3，见 fetch_us_index）
             elif symbol in ['IXIC', 'SPX', 'DJI', 'NDX']:
-                # 尝试使用 yfinance（实时数据）
-                df = self.get_us_index_data_yfinance(symbol)
-
-                # 如果 yfinance 失败，回退到 Tushare（可能滞后）
-                # v6.5 注意: NDX (纳指100) Tushare 不支持，只能依赖 yfinance
-                if df.empty:
-                    # NDX 不支持 Tushare 回退（Tushare 只有 IXIC 综合指数）
-                    if symbol == 'NDX':
-                        print(f"  ⚠️  yfinance 失败且 Tushare 不支持 {symbol}，跳过本次更新")
-                        return pd.DataFrame()
-
-                    # 其他美股指数可以回退到 Tushare
-                    print(f"  🔄 yfinance 失败，回退到 Tushare 接口: {symbol}")
-                    df = self.pro.index_global(ts_code=symbol)
-                    time.sleep(0.35)
-
-                    # 对于 Tushare 数据，需要进行格式转换
-                    if not df.empty:
-                        if 'trade_date' in df.columns:
-                            df = df.rename(columns={'trade_date': 'date'})
-                        df['date'] = pd.to_datetime(df['date'])
-                        df['close'] = pd.to_numeric(df['close'])
-                        df = df.sort_values('date').reset_index(drop=True)
-                        df = df[['date', 'close']]
-
-                # yfinance 成功，直接返回（已经是标准格式）
-                else:
-                    return df
+                return self.fetch_us_index(symbol, start_date=start_date)
 
             # C. 其他全球指数（港股等）-> Tushare 全球指数接口
             elif symbol in ['HSI', 'HKTECH']:
                 print(f"  🌍 使用全球指数接口: {symbol}")
-                df = self.pro.index_global(ts_code=symbol)
-                time.sleep(0.35)
+                df = self.load_history('index_global', symbol, start_date)
 
             # D. A股指数 (代码特征: 数字开头) -> A股指数接口
             else:
                 print(f"  🇨🇳 使用A股指数接口: {symbol}")
-                df = self.pro.index_daily(ts_code=symbol)
-                time.sleep(0.35)
+                df = self.load_history('index_daily', symbol, start_date)
 
             # --- 数据清洗标准化 (Normalization) ---
             # 必须确保返回的 DataFrame 包含且仅包含: ['date', 'close'] 且按日期升序
@@ -318,6 +851,8 @@ class DataFetcher:
                 print(f"  ⚠️  警告: 没有获取到 {symbol} 的数据")
                 return pd.DataFrame()
 
+            self.run_cache.put_bars(symbol, df)
+
             # 统一列名 (Tushare 不同接口返回的日期列名可能不同)
             if 'trade_date' in df.columns:
                 df = df.rename(columns={'trade_date': 'date'})
@@ -344,14 +879,19 @@ class FishbowlCalculator:
     def calculate_all_metrics(df: pd.DataFrame) -> pd.DataFrame:
         """
         计算所有鱼盆指标：MA20、状态、偏离度、持续天数、信号标签
+        v7.3: 全向量化实现（结果与逐行循环版本逐位一致）
         """
         if df.empty:
             return df
 
         df = df.copy()
+        close = df['close'].to_numpy()
+        n = len(df)
+        positions = np.arange(n)
 
         # 1. 计算MA20
         df['ma20_price'] = df['close'].rolling(window=20, min_periods=1).mean()
+        ma20 = df['ma20_price'].to_numpy()
 
         # 2. 计算状态 (v6.3 System Audit: 实现严格的 ±1% 缓冲带逻辑)
         # Rule of Truth (The Constitution):
@@ -359,43 +899,21 @@ class FishbowlCalculator:
         # - Close < MA20 * 0.99 → NO  (跌破缓冲带下沿)
         # - 在 ±1% 区间内   → 维持昨日状态 (防止震荡)
         # - 第一天无历史状态时: Close >= MA20 → YES, 否则 → NO
-        statuses = []
-        durations = []
-
-        for i in range(len(df)):
-            close = df.loc[i, 'close']
-            ma20 = df.loc[i, 'ma20_price']
-
-            # 计算缓冲带边界
-            upper_band = ma20 * 1.01  # 上沿: MA20 + 1%
-            lower_band = ma20 * 0.99  # 下沿: MA20 - 1%
-
-            if i == 0:
-                # 第一天初始化：无历史状态，简单判断
-                status = 'YES' if close >= ma20 else 'NO'
-                duration = 1
-            else:
-                prev_status = statuses[-1]
-                prev_duration = durations[-1]
-
-                # 应用缓冲带逻辑
-                if close > upper_band:
-                    # 突破上沿 → 强制多头
-                    status = 'YES'
-                elif close < lower_band:
-                    # 跌破下沿 → 强制空头
-                    status = 'NO'
-                else:
-                    # 在缓冲带内 → 维持昨日状态（防震荡）
-                    status = prev_status
-
-                # 计算持续天数
-                duration = 1 if prev_status != status else prev_duration + 1
-
-            statuses.append(status)
-            durations.append(duration)
-
-        df['status'] = statuses
+        # v7.3: 突破/跌破的日子给出明确状态，缓冲带内记为 NaN 后向前填充（即"维持昨日状态"）
+        upper_band = ma20 * 1.01  # 上沿: MA20 + 1%
+        lower_band = ma20 * 0.99  # 下沿: MA20 - 1%
+        regime = np.where(close > upper_band, 1.0, np.where(close < lower_band, 0.0, np.nan))
+        regime[0] = 1.0 if close[0] >= ma20[0] else 0.0
+        is_yes = pd.Series(regime).ffill().to_numpy() == 1.0
+
+        # 计算持续天数：状态切换点为新一段的起点，持续天数 = 距本段起点的行数 + 1
+        regime_start = np.empty(n, dtype=bool)
+        regime_start[0] = True
+        regime_start[1:] = is_yes[1:] != is_yes[:-1]
+        last_start = np.maximum.accumulate(np.where(regime_start, positions, 0))
+        durations = positions - last_start + 1
+
+        df['status'] = np.where(is_yes, 'YES', 'NO').tolist()
         df['duration_days'] = durations
 
         # 3. 计算偏离度
@@ -405,63 +923,298 @@ class FishbowlCalculator:
         df['change_pct'] = df['close'].pct_change()
 
         # 5. 计算区间涨幅 (trend_pct) - 从当前状态起始点到现在的涨幅
-        trend_pcts = []
-        for i in range(len(df)):
-            duration = df.loc[i, 'duration_days']
-            current_close = df.loc[i, 'close']
-
-            # 回溯到状态起始点的前一天（变盘前一天）
-            # duration=1 表示今天是第1天，应该用昨天的价格作为基准
-            start_index = i - duration
-
-            if start_index >= 0:
-                # 可以追溯到起始点前一天
-                start_price = df.loc[start_index, 'close']
-                trend_pct = (current_close - start_price) / start_price
-            else:
-                # 无法追溯（数据不够），设为 None
-                trend_pct = None
-
-            trend_pcts.append(trend_pct)
-
-        df['trend_pct'] = trend_pcts
+        # 回溯到状态起始点的前一天（变盘前一天）
+        # duration=1 表示今天是第1天，应该用昨天的价格作为基准
+        start_index = positions - durations
+        traceable = start_index >= 0
+        if traceable.any():
+            start_price = close[np.where(traceable, start_index, 0)]
+            trend_pcts = np.where(traceable, (close - start_price) / start_price, np.nan)
+            df['trend_pct'] = trend_pcts
+        else:
+            # 无法追溯（数据不够），设为 None
+            df['trend_pct'] = [None] * n
 
         # 6. 生成信号标签
         # v6.1 Bug修复：信号标签必须严格基于当前偏离度，而不是status
         # Rule of Truth: deviation > 0 -> 多头信号, deviation < 0 -> 空头信号
-        signal_tags = []
-        for _, row in df.iterrows():
-            status = row['status']
-            duration = row['duration_days']
-            deviation = row['deviation_pct']
-
-            # 核心修复：信号判断完全基于当前偏离度，确保逻辑一致性
-            if deviation > 0:
-                # 偏离度为正 -> 多头信号
-                if duration <= 3 and status == 'YES':
-                    tag = 'BREAKOUT'  # 启动（刚突破且持续天数短）
-                elif deviation > 0.15:
-                    tag = 'OVERHEAT'  # 过热（偏离度>15%）
-                else:
-                    tag = 'STRONG'    # 主升（稳健上涨）
-            else:
-                # 偏离度为负或零 -> 空头信号
-                if deviation < -0.15:
-                    tag = 'EXTREME_BEAR'  # 超跌（偏离度<-15%）
-                else:
-                    tag = 'SLUMP'         # 弱势（下跌或震荡）
+        deviation = df['deviation_pct'].to_numpy()
+        bullish = deviation > 0
+        signal_tags = np.select(
+            [
+                bullish & (durations <= 3) & is_yes,  # 启动（刚突破且持续天数短）
+                bullish & (deviation > 0.15),         # 过热（偏离度>15%）
+                bullish,                              # 主升（稳健上涨）
+                deviation < -0.15,                    # 超跌（偏离度<-15%）
+            ],
+            ['BREAKOUT', 'OVERHEAT', 'STRONG', 'EXTREME_BEAR'],
+            default='SLUMP'                           # 弱势（下跌或震荡）
+        )
+
+        df['signal_tag'] = signal_tags.tolist()
+
+        return df
 
-            signal_tags.append(tag)
+    @staticmethod
+    def calculate_panel(closes: pd.DataFrame) -> pd.DataFrame:
+        """
+        v7.3: 面板模式 - 一次 NumPy 计算全部标的的鱼盆指标
 
-        df['signal_tag'] = signal_tags
+        各市场交易日不同，非交易日在矩阵中为 NaN。每一列先把有效收盘价稳定地
+        压缩到顶部（保持日期顺序），在压缩后的矩阵上按列同时计算 MA20 / 状态 /
+        持续天数 / 偏离度 / 涨幅，再映射回原日期。规则与 calculate_all_metrics 一致，
+        MA20 由窗口求和得到，与 pandas rolling 只存在浮点末位差异。
 
-        return df
+        Args:
+            closes: 收盘价矩阵，index 为日期（升序），columns 为标的代码
+
+        Returns:
+            长表 DataFrame（列与 calculate_all_metrics 结果一致，并包含 symbol 列），
+            只包含有效交易日，按 symbol、date 排序
+        """
+        columns = ['date', 'close', 'ma20_price', 'status', 'duration_days', 'deviation_pct',
+                   'change_pct', 'trend_pct', 'signal_tag', 'symbol']
+        if closes.empty:
+            return pd.DataFrame(columns=columns)
+
+        values = closes.to_numpy(dtype=float)
+        n, m = values.shape
+        valid = ~np.isnan(values)
+
+        # 1. 按列压缩：有效行稳定排到顶部，compact[:count[j], j] 即该标的自己的交易日序列
+        order = np.argsort(~valid, axis=0, kind='stable')
+        compact = np.take_along_axis(values, order, axis=0)
+        count = valid.sum(axis=0)
+        positions = np.arange(n)[:, None]
+        in_range = positions < count[None, :]
+
+        # 2. MA20：窗口求和（前19行为不足20日的部分窗口，与 min_periods=1 一致）
+        padded = np.vstack([np.zeros((19, m)), np.where(in_range, compact, 0.0)])
+        window_sum = np.lib.stride_tricks.sliding_window_view(padded, 20, axis=0).sum(axis=-1)
+        ma20 = window_sum / np.minimum(positions + 1, 20)
+
+        # 3. 状态：±1% 缓冲带，带内维持昨日状态（NaN 后向前填充）
+        regime = np.where(compact > ma20 * 1.01, 1.0, np.where(compact < ma20 * 0.99, 0.0, np.nan))
+        regime[0] = np.where(compact[0] >= ma20[0], 1.0, 0.0)
+        filled_index = np.maximum.accumulate(np.where(np.isnan(regime), 0, positions), axis=0)
+        is_yes = np.take_along_axis(regime, filled_index, axis=0) == 1.0
+
+        # 4. 持续天数
+        regime_start = np.ones((n, m), dtype=bool)
+        regime_start[1:] = is_yes[1:] != is_yes[:-1]
+        last_start = np.maximum.accumulate(np.where(regime_start, positions, 0), axis=0)
+        durations = positions - last_start + 1
+
+        # 5. 偏离度、当日涨幅、区间涨幅
+        deviation = (compact - ma20) / ma20
+        change = np.full((n, m), np.nan)
+        change[1:] = compact[1:] / compact[:-1] - 1
+        start_index = positions - durations
+        start_price = np.take_along_axis(compact, np.maximum(start_index, 0), axis=0)
+        trend = np.where(start_index >= 0, (compact - start_price) / start_price, np.nan)
+
+        # 6. 信号标签（规则与 calculate_all_metrics 一致）
+        bullish = deviation > 0
+        signal_tags = np.select(
+            [
+                bullish & (durations <= 3) & is_yes,
+                bullish & (deviation > 0.15),
+                bullish,
+                deviation < -0.15,
+            ],
+            ['BREAKOUT', 'OVERHEAT', 'STRONG', 'EXTREME_BEAR'],
+            default='SLUMP'
+        )
+
+        # 7. 映射回原日期，输出长表（按列优先展开，即按 symbol、date 排序）
+        symbol_index, row_index = np.nonzero(in_range.T)
+        dates = closes.index.to_numpy()[order.T[symbol_index, row_index]]
+
+        def pick(matrix):
+            return matrix.T[symbol_index, row_index]
+
+        return pd.DataFrame({
+            'date': pd.to_datetime(dates),
+            'close': pick(compact),
+            'ma20_price': pick(ma20),
+            'status': np.where(pick(is_yes), 'YES', 'NO').tolist(),
+            'duration_days': pick(durations),
+            'deviation_pct': pick(deviation),
+            'change_pct': pick(change),
+            'trend_pct': pick(trend),
+            'signal_tag': pick(signal_tags).tolist(),
+            'symbol': closes.columns.to_numpy()[symbol_index],
+        }, columns=columns)
+
+    @staticmethod
+    def build_state(df: pd.DataFrame) -> Optional[Dict]:
+        """
+        v7.3: 从全量计算结果提取增量计算状态
+
+        状态包含：最近20个收盘价、滑动和、当前状态、持续天数、
+        当前状态起始点前一天的收盘价（trend_pct 的基准，无法追溯时为 None）
+
+        Args:
+            df: calculate_all_metrics 的结果（需包含 symbol 列）
+        """
+        if df.empty:
+            return None
+
+        last = len(df) - 1
+        duration = int(df['duration_days'].iloc[-1])
+        start_index = last - duration
+        closes = [float(c) for c in df['close'].iloc[-20:]]
+        return {
+            'symbol': df['symbol'].iloc[-1],
+            'last_date': pd.Timestamp(df['date'].iloc[-1]),
+            'closes': closes,
+            'running_sum': math.fsum(closes),
+            'status': df['status'].iloc[-1],
+            'duration_days': duration,
+            'regime_start_price': float(df['close'].iloc[start_index]) if start_index >= 0 else None,
+        }
+
+    @staticmethod
+    def signal_tag_for(deviation: float, duration: int, status: str) -> str:
+        """v7.3: 单个数据点的信号标签（规则与 calculate_all_metrics 第 6 步一致）"""
+        if deviation > 0:
+            if duration <= 3 and status == 'YES':
+                return 'BREAKOUT'
+            if deviation > 0.15:
+                return 'OVERHEAT'
+            return 'STRONG'
+        if deviation < -0.15:
+            return 'EXTREME_BEAR'
+        return 'SLUMP'
+
+    @staticmethod
+    def state_row(state: Dict) -> Dict:
+        """v7.3: 由状态还原最后一个交易日的完整指标行"""
+        closes = state['closes']
+        close = closes[-1]
+        ma20 = state['running_sum'] / len(closes)
+        deviation = (close - ma20) / ma20
+        change = close / closes[-2] - 1 if len(closes) >= 2 else np.nan
+        start_price = state['regime_start_price']
+        trend = (close - start_price) / start_price if start_price is not None else np.nan
+        return {
+            'date': state['last_date'],
+            'close': close,
+            'ma20_price': ma20,
+            'status': state['status'],
+            'duration_days': state['duration_days'],
+            'deviation_pct': deviation,
+            'change_pct': change,
+            'trend_pct': trend,
+            'signal_tag': FishbowlCalculator.signal_tag_for(deviation, state['duration_days'], state['status']),
+        }
+
+    @staticmethod
+    def update(state: Dict, new_bar: Dict) -> Tuple[Dict, Dict]:
+        """
+        v7.3: O(1) 增量计算：在已有状态上追加一根新 K 线
+
+        Args:
+            state: 上一交易日的状态
+            new_bar: {'date', 'close'}
+
+        Returns:
+            (新状态, 新一行的完整指标)
+        """
+        close = float(new_bar['close'])
+        prev_close = state['closes'][-1]
+        closes = (state['closes'] + [close])[-20:]
+        # 每次按窗口重新求和，避免长期累加产生浮点漂移（窗口固定 20，仍为 O(1)）
+        running_sum = math.fsum(closes)
+        ma20 = running_sum / len(closes)
+
+        # ±1% 缓冲带逻辑（与 calculate_all_metrics 一致）
+        if close > ma20 * 1.01:
+            status = 'YES'
+        elif close < ma20 * 0.99:
+            status = 'NO'
+        else:
+            status = state['status']
+
+        if status != state['status']:
+            duration = 1
+            regime_start_price = prev_close
+        else:
+            duration = state['duration_days'] + 1
+            regime_start_price = state['regime_start_price']
+
+        new_state = {
+            'symbol': state['symbol'],
+            'last_date': pd.Timestamp(new_bar['date']),
+            'closes': closes,
+            'running_sum': running_sum,
+            'status': status,
+            'duration_days': duration,
+            'regime_start_price': regime_start_price,
+        }
+        return new_state, FishbowlCalculator.state_row(new_state)
+
+    @staticmethod
+    def advance_state(state: Dict, bars: pd.DataFrame) -> Optional[Tuple[Dict, List[Dict]]]:
+        """
+        v7.3: 用新 K 线推进状态，返回新增交易日的指标行
+
+        bars 中若包含状态最后日期的 K 线且收盘价不一致（复权调整等），说明状态已失效，
+        返回 None 由调用方全量重算。没有新 K 线时返回由状态还原的最后一行。
+        逐根 K 线直接在 numpy 数组上推进，指标行为普通字典，不为单个代码构建 DataFrame
+        （由 advanced_frames 对整批结果一次构建）。
+
+        Returns:
+            (新状态, 指标行列表（含 symbol）)；状态失效时返回 None
+        """
+        rows = []
+        if bars is not None and not bars.empty:
+            last_date = np.datetime64(state['last_date'])
+            dates = bars['date'].to_numpy()
+            closes = bars['close'].to_numpy(dtype=float)
+            overlap = np.flatnonzero(dates == last_date)
+            if len(overlap):
+                stored_close = state['closes'][-1]
+                if abs(closes[overlap[-1]] - stored_close) > abs(stored_close) * 1e-6:
+                    return None
+            for i in np.flatnonzero(dates > last_date)[np.argsort(dates[dates > last_date], kind='stable')]:
+                state, row = FishbowlCalculator.update(state, {'date': dates[i], 'close': closes[i]})
+                rows.append(row)
+        if not rows:
+            rows.append(FishbowlCalculator.state_row(state))
+
+        for row in rows:
+            row['symbol'] = state['symbol']
+        return state, rows
+
+    @staticmethod
+    def advanced_frames(advanced: Dict[str, Tuple[Dict, List[Dict]]]) -> Dict[str, pd.DataFrame]:
+        """
+        v7.3: 把一批 advance_state 的结果一次性构建为 DataFrame，再按代码拆分
+
+        Returns:
+            {symbol: 指标 DataFrame}，新状态保存在 df.attrs['fishbowl_state']
+        """
+        if not advanced:
+            return {}
+
+        combined = pd.DataFrame([row for _, rows in advanced.values() for row in rows])
+        frames = {}
+        start = 0
+        # 各代码的行在 combined 中连续排列，按位置切片
+        for symbol, (state, rows) in advanced.items():
+            df = combined.iloc[start:start + len(rows)].reset_index(drop=True)
+            df.attrs['fishbowl_state'] = state
+            frames[symbol] = df
+            start += len(rows)
+        return frames
 
     @staticmethod
     def generate_sparkline_json(df: pd.DataFrame, days: int = 250,
                                today_date: str = None,
                                today_price: float = None,
-                               today_ma20: float = None) -> str:
+                               today_ma20: float = None,
+                               fmt: str = 'v1') -> str:
         """
         生成近N天的 Sparkline JSON 数据（v6.9: 支持手动拼接今日数据）
         v7.0: 该方法保留用于初始化场景（无历史数据时）
@@ -472,6 +1225,7 @@ class FishbowlCalculator:
             today_date: 今日日期字符串（可选，格式：YYYY-MM-DD）
             today_price: 今日收盘价（可选）
             today_ma20: 今日MA20值（可选）
+            fmt: v7.3 输出格式，'v1' 对象数组 / 'v2' 列式压缩（见 encode_sparkline）
 
         Returns:
             JSON 字符串，格式：[{"date": "2024-12-01", "price": 3000.12, "ma20": 2980.45}, ...]
@@ -479,23 +1233,8 @@ class FishbowlCalculator:
         if df.empty:
             return json.dumps([])
 
-        # 取最近 N 天的数据
-        recent_df = df.tail(days).copy()
-
-        # 构建 sparkline 数据数组
-        sparkline_data = []
-        for _, row in recent_df.iterrows():
-            # 完整日期格式 YYYY-MM-DD
-            date_str = row['date'].strftime('%Y-%m-%d') if hasattr(row['date'], 'strftime') else str(row['date'])
-            # v6.3 Bug修复：增加精度到4位小数，避免小数值时精度丢失导致偏离度被抹平
-            # v7.1: 新增 change 字段（当日涨幅）
-            change_value = round(float(row['change_pct'] * 100), 2) if pd.notna(row['change_pct']) else 0.0
-            sparkline_data.append({
-                "date": date_str,
-                "price": round(float(row['close']), 4),      # 4位小数
-                "ma20": round(float(row['ma20_price']), 4),  # 4位小数
-                "change": change_value                        # v7.1: 当日涨幅 (百分比)
-            })
+        # 取最近 N 天的数据，构建 sparkline 数据数组
+        sparkline_data = FishbowlCalculator.sparkline_points(df.tail(days))
 
         # v6.9: 手动拼接今日数据（如果提供了今日数据且历史数据未包含今天）
         # v7.1: 注意 - 手动拼接时 change 字段可能缺失，设为 0.0
@@ -520,30 +1259,169 @@ class FishbowlCalculator:
                     "change": 0.0  # v7.1: 手动拼接时无法计算 change，设为 0
                 })
 
-        return json.dumps(sparkline_data)
+        return FishbowlCalculator.dump_sparkline(sparkline_data, fmt)
 
     @staticmethod
-    def append_to_sparkline(current_chart_json: str, today_date: str, 
-                           today_price: float, today_ma20: float, 
-                           today_change: float = 0.0,
-                           max_days: int = 250) -> str:
+    def sparkline_points(df: pd.DataFrame) -> List[Dict]:
         """
-        v7.0: 增量追加模式 - 将今日数据追加到已有的 sparkline 中
-        v7.1: 新增 today_change 参数，支持涨跌幅字段
+        v7.3: 将指标结果逐行转换为趋势图数据点（sparkline_json 与 fishbowl_series 共用）
 
-        核心逻辑：
-        1. 读取现有数据
-        2. 追加今日数据点（或更新同日数据）
-        3. 去重并裁剪到最近 N 天
-        4. 返回更新后的 JSON
+        Returns:
+            [{"date": "2024-12-01", "price": 3000.12, "ma20": 2980.45, "change": 1.23}, ...]
+        """
+        points = []
+        for date, close, ma20, change in zip(df['date'], df['close'], df['ma20_price'], df['change_pct']):
+            points.append({
+                # 完整日期格式 YYYY-MM-DD
+                "date": date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date),
+                # v6.3 Bug修复：增加精度到4位小数，避免小数值时精度丢失导致偏离度被抹平
+                "price": round(float(close), 4),
+                "ma20": round(float(ma20), 4),
+                # v7.1: 当日涨幅 (百分比)
+                "change": round(float(change * 100), 2) if pd.notna(change) else 0.0
+            })
+        return points
 
-        Args:
-            current_chart_json: 数据库中已有的 sparkline JSON 字符串
-            today_date: 今日日期（格式：YYYY-MM-DD）
-            today_price: 今日收盘价
-            today_ma20: 今日 MA20
+    @staticmethod
+    def encode_sparkline(points: List[Dict]) -> Dict:
+        """
+        v7.3: 将 sparkline 数据点编码为 v2 列式格式
+
+        格式：{"v": 2, "base": 首个日期, "d": [与前一点相差的天数], "p": [价格], "m": [MA20], "c": [涨幅]}
+        - 价格 / MA20 乘以 10^4 取整后做差分编码（首项为绝对值）
+        - 涨幅乘以 100 取整（本身就是小数值，不做差分）
+        """
+        if not points:
+            return {"v": 2, "base": None, "d": [], "p": [], "m": [], "c": []}
+
+        dates = [datetime.strptime(p['date'], '%Y-%m-%d') for p in points]
+        prices = [int(round(float(p['price']) * SPARKLINE_PRICE_SCALE)) for p in points]
+        ma20s = [int(round(float(p['ma20']) * SPARKLINE_PRICE_SCALE)) for p in points]
+        return {
+            "v": 2,
+            "base": points[0]['date'],
+            "d": [0] + [(dates[i] - dates[i - 1]).days for i in range(1, len(dates))],
+            "p": prices[:1] + [prices[i] - prices[i - 1] for i in range(1, len(prices))],
+            "m": ma20s[:1] + [ma20s[i] - ma20s[i - 1] for i in range(1, len(ma20s))],
+            "c": [int(round(float(p.get('change') or 0.0) * SPARKLINE_CHANGE_SCALE)) for p in points],
+        }
+
+    @staticmethod
+    def decode_sparkline(payload: Dict) -> List[Dict]:
+        """v7.3: 将 v2 列式格式还原为 sparkline 数据点列表（encode_sparkline 的逆运算）"""
+        if not payload.get('base'):
+            return []
+
+        date = datetime.strptime(payload['base'], '%Y-%m-%d')
+        price = ma20 = 0
+        points = []
+        for offset, price_delta, ma20_delta, change in zip(payload['d'], payload['p'], payload['m'], payload['c']):
+            date += timedelta(days=offset)
+            price += price_delta
+            ma20 += ma20_delta
+            points.append({
+                "date": date.strftime('%Y-%m-%d'),
+                "price": round(price / SPARKLINE_PRICE_SCALE, 4),
+                "ma20": round(ma20 / SPARKLINE_PRICE_SCALE, 4),
+                "change": round(change / SPARKLINE_CHANGE_SCALE, 2),
+            })
+        return points
+
+    @staticmethod
+    def dump_sparkline(points: List[Dict], fmt: str = 'v1') -> str:
+        """v7.3: 按指定格式序列化 sparkline 数据点（'v1' 对象数组 / 'v2' 列式压缩）"""
+        if fmt == 'v2' and points:
+            return json.dumps(FishbowlCalculator.encode_sparkline(points), separators=(',', ':'))
+        return json.dumps(points)
+
+    @staticmethod
+    def parse_sparkline(sparkline) -> List[Dict]:
+        """
+        v7.3: 解析 sparkline 数据（兼容 JSON 字符串与 psycopg2 已解析的 JSONB 列表）
+        兼容 v1 对象数组与 v2 列式格式（{"v": 2, ...}）
+
+        Returns:
+            数据点列表，解析失败时返回空列表
+        """
+        if not sparkline:
+            return []
+        try:
+            points = json.loads(sparkline) if isinstance(sparkline, str) else sparkline
+            if isinstance(points, dict) and points.get('v') == 2:
+                return FishbowlCalculator.decode_sparkline(points)
+        except (json.JSONDecodeError, TypeError, KeyError, ValueError):
+            return []
+        return points if isinstance(points, list) else []
+
+    @staticmethod
+    def sparkline_to_history(sparkline) -> pd.DataFrame:
+        """
+        v7.3: 将已存储的 sparkline 还原为收盘价历史（用于截面批量模式的基础历史）
+
+        Returns:
+            DataFrame 包含 ['date', 'close']，按日期升序
+        """
+        points = FishbowlCalculator.parse_sparkline(sparkline)
+        rows = [
+            {'date': p['date'], 'close': p['price']}
+            for p in points
+            if isinstance(p, dict) and p.get('date') and p.get('price') is not None
+        ]
+        if not rows:
+            return pd.DataFrame()
+
+        df = pd.DataFrame(rows)
+        df['date'] = pd.to_datetime(df['date'])
+        df['close'] = pd.to_numeric(df['close'])
+        df = df.drop_duplicates(subset='date', keep='last')
+        return df.sort_values('date').reset_index(drop=True)
+
+    @staticmethod
+    def splice_history(base_history: pd.DataFrame, window: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        v7.3: 把增量窗口拼接到已存储历史之后（窗口内以网络数据为准）
+
+        已存储的收盘价是旧的前复权基准，拼接前对照两者重叠日期的收盘价：
+        没有重叠或任一收盘价超出 SPLICE_PRICE_TOLERANCE（除权除息 / 拆分后基准变化）时返回 None，
+        由调用方全量拉取。
+
+        Returns:
+            拼接后的 ['date', 'close', ...] DataFrame；基准不一致时为 None
+        """
+        overlap = base_history.merge(window[['date', 'close']], on='date', suffixes=('_base', ''))
+        if overlap.empty:
+            return None
+        if not np.allclose(overlap['close'].to_numpy(dtype=float), overlap['close_base'].to_numpy(dtype=float),
+                           rtol=0.0, atol=SPLICE_PRICE_TOLERANCE):
+            return None
+
+        older = base_history[base_history['date'] < window['date'].iloc[0]]
+        return pd.concat([older, window], ignore_index=True)
+
+    @staticmethod
+    def append_to_sparkline(current_chart_json: str, today_date: str, 
+                           today_price: float, today_ma20: float, 
+                           today_change: float = 0.0,
+                           max_days: int = 250,
+                           fmt: str = 'v1') -> str:
+        """
+        v7.0: 增量追加模式 - 将今日数据追加到已有的 sparkline 中
+        v7.1: 新增 today_change 参数，支持涨跌幅字段
+
+        核心逻辑：
+        1. 读取现有数据
+        2. 追加今日数据点（或更新同日数据）
+        3. 去重并裁剪到最近 N 天
+        4. 返回更新后的 JSON
+
+        Args:
+            current_chart_json: 数据库中已有的 sparkline JSON 字符串
+            today_date: 今日日期（格式：YYYY-MM-DD）
+            today_price: 今日收盘价
+            today_ma20: 今日 MA20
             today_change: v7.1 今日涨幅（百分比形式，如 1.52 表示 +1.52%）
             max_days: 保留的最大天数（默认250天）
+            fmt: v7.3 输出格式，'v1' 对象数组 / 'v2' 列式压缩（输入两种格式均可）
 
         Returns:
             更新后的 JSON 字符串
@@ -552,12 +1430,15 @@ class FishbowlCalculator:
         try:
             if current_chart_json:
                 current_chart = json.loads(current_chart_json)
+                # v7.3: 兼容 v2 列式格式
+                if isinstance(current_chart, dict) and current_chart.get('v') == 2:
+                    current_chart = FishbowlCalculator.decode_sparkline(current_chart)
                 if not isinstance(current_chart, list):
                     print(f"  ⚠️  Sparkline 格式错误（非数组），重置为空")
                     current_chart = []
             else:
                 current_chart = []
-        except (json.JSONDecodeError, TypeError) as e:
+        except (json.JSONDecodeError, TypeError, KeyError, ValueError) as e:
             print(f"  ⚠️  Sparkline 解析失败: {str(e)}，重置为空")
             current_chart = []
 
@@ -592,13 +1473,16 @@ class FishbowlCalculator:
         final_chart = current_chart[-max_days:]
 
         # 5. 返回 JSON 字符串
-        return json.dumps(final_chart)
+        return FishbowlCalculator.dump_sparkline(final_chart, fmt)
 
 
 # ================================================
 # 主ETL流程
 # ================================================
-def process_symbol(symbol: str, name: str, category: str, fetcher: DataFetcher) -> Optional[pd.DataFrame]:
+def process_symbol(symbol: str, name: str, category: str, fetcher: DataFetcher,
+                   start_date: Optional[str] = None,
+                   base_history: Optional[pd.DataFrame] = None,
+                   state: Optional[Dict] = None) -> Union[pd.DataFrame, Tuple[Dict, List[Dict]], None]:
     """
     处理单个ETF/指数：获取数据 -> 计算指标
 
@@ -607,19 +1491,48 @@ def process_symbol(symbol: str, name: str, category: str, fetcher: DataFetcher)
         name: 名称
         category: 类别 (用于判断调用哪个接口)
         fetcher: 数据获取器
+        start_date: v7.3 增量窗口起始日期（YYYYMMDD），为 None 时全量拉取
+        base_history: v7.3 已存储的收盘价历史，增量窗口之前的部分由它补齐
+        state: v7.3 已持久化的增量计算状态，提供时只拉取状态日期之后的 K 线并 O(1) 推进
 
     Returns:
-        完整的历史数据 DataFrame（包含 sparkline 所需的30天数据）
+        完整的历史数据 DataFrame（包含 sparkline 所需的30天数据）；
+        状态模式下为 advance_state 的结果 (新状态, 新增交易日的指标行)，由调用方批量构建 DataFrame
     """
     try:
-        print(f"  处理: {name} ({symbol}) [{category}]")
+        # v7.3: 状态模式 - 从状态最后日期开始拉取（包含该日用于校验复权调整）
+        if state is not None:
+            state_start = state['last_date'].strftime('%Y%m%d')
+            print(f"  处理: {name} ({symbol}) [{category}] [状态 {state_start}~]")
+            df = fetcher.fetch_history(symbol, category, start_date=state_start)
+            if df.empty:
+                return None
+            advanced = FishbowlCalculator.advance_state(state, df)
+            if advanced is not None:
+                return advanced
+            print(f"  ⚠️  [{symbol}] 最新数据与已保存状态不一致（可能发生复权调整），全量重算")
+            start_date, base_history = None, None
+
+        mode = f"增量 {start_date}~" if start_date else "全量"
+        print(f"  处理: {name} ({symbol}) [{category}] [{mode}]")
 
         # 使用新的多接口路由方法
-        df = fetcher.fetch_history(symbol, category)
+        df = fetcher.fetch_history(symbol, category, start_date=start_date)
 
         if df.empty:
             return None
 
+        # v7.3: 增量窗口拼接已存储历史（窗口内以网络数据为准），保证状态与持续天数的连续性
+        if base_history is not None and not base_history.empty:
+            spliced = FishbowlCalculator.splice_history(base_history, df)
+            if spliced is None:
+                print(f"  ⚠️  [{symbol}] 增量窗口与已存储历史不一致（可能发生复权调整），全量拉取")
+                df = fetcher.fetch_history(symbol, category)
+                if df.empty:
+                    return None
+            else:
+                df = spliced
+
         # 计算指标
         df = FishbowlCalculator.calculate_all_metrics(df)
 
@@ -634,402 +1547,971 @@ def process_symbol(symbol: str, name: str, category: str, fetcher: DataFetcher)
         return None
 
 
+def select_assets(assets: List[Dict], markets: Optional[List[str]] = None,
+                  category: Optional[str] = None, symbols: Optional[List[str]] = None) -> List[Dict]:
+    """
+    v7.3: 按命令行选择器筛选资产（多个选择器同时生效时取交集）
+
+    Args:
+        assets: monitor_config 中的资产
+        markets: 市场列表（cn / hk / us / sge）
+        category: 类别（broad / industry）
+        symbols: 代码列表
+    """
+    selected = assets
+    if markets:
+        exchanges = {exchange for market in markets for exchange in RUN_MARKETS[market]}
+        selected = [a for a in selected if market_of(a['symbol']) in exchanges]
+    if category:
+        selected = [a for a in selected if a['category'] == category]
+    if symbols:
+        wanted = set(symbols)
+        missing = wanted - {a['symbol'] for a in assets}
+        if missing:
+            print(f"  ⚠️  以下代码不在监控列表中，已忽略: {', '.join(sorted(missing))}")
+        selected = [a for a in selected if a['symbol'] in wanted]
+    return selected
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """v7.3: 解析命令行选择器"""
+    def market_list(value: str) -> List[str]:
+        markets = [m.strip().lower() for m in value.split(',') if m.strip()]
+        unknown = [m for m in markets if m not in RUN_MARKETS]
+        if unknown:
+            raise argparse.ArgumentTypeError(
+                f"未知市场: {', '.join(unknown)}（可选: {', '.join(RUN_MARKETS)}）")
+        return markets
+
+    parser = argparse.ArgumentParser(description='鱼盆趋势雷达 ETL 更新脚本')
+    parser.add_argument(
+        '--markets',
+        type=market_list,
+        help='只更新指定市场，逗号分隔（cn,hk,us,sge）'
+    )
+    parser.add_argument(
+        '--category',
+        choices=['broad', 'industry'],
+        help='只更新指定类别'
+    )
+    parser.add_argument(
+        '--symbols',
+        nargs='+',
+        help='只更新指定代码（如：512480.SH 000300.SH），忽略交易日历强制重跑'
+    )
+    parser.add_argument(
+        '--skip-overview',
+        action='store_true',
+        help='不更新市场概览'
+    )
+    return parser.parse_args(argv)
+
+
+def filter_assets_by_calendar(assets: List[Dict], calendar: TradeCalendar,
+                              last_dates: Dict[str, datetime]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    v7.3: 按交易日历筛选需要更新的资产
+
+    所属市场在最后入库日期之后没有新的已收盘交易日时跳过（周末、节假日、
+    美股/A股 各自的定时任务只更新刚收盘的市场）。日历不可用或新标的照常更新。
+
+    Returns:
+        (需要更新的资产, 跳过的资产)
+    """
+    sessions = {}
+    selected, skipped = [], []
+    for asset in assets:
+        market = market_of(asset['symbol'])
+        if market not in sessions:
+            sessions[market] = calendar.latest_session(market)
+        session = sessions[market]
+        last_date = last_dates.get(asset['symbol'])
+        if isinstance(last_date, datetime):
+            last_date = last_date.date()
+        if session is not None and last_date is not None and session <= last_date:
+            skipped.append(asset)
+        else:
+            selected.append(asset)
+
+    for market, session in sorted(sessions.items()):
+        print(f"  📅 {market}: 最近收盘交易日 {session or '未知'}")
+    return selected, skipped
+
+
+def plan_incremental_fetch(symbol: str, last_dates: Dict[str, datetime],
+                           existing_sparkline) -> Dict:
+    """
+    v7.3: 根据最后入库日期规划增量抓取窗口
+
+    窗口 = [最后入库日期 - INCREMENTAL_WARMUP_DAYS, 今天]，预热部分保证 MA20 计算准确；
+    更早的历史由已存储的 sparkline 补齐。新标的、历史不足 20 个点或 sparkline
+    未覆盖到窗口起点时，返回空计划（全量拉取）。拉取后由 process_symbol 对照重叠日期的
+    收盘价（splice_history），复权基准变化时同样改为全量拉取。
+
+    Returns:
+        process_symbol 的额外参数 {'start_date', 'base_history'}，全量拉取时为空字典
+    """
+    last_date = last_dates.get(symbol)
+    if not last_date:
+        return {}
+
+    base_history = FishbowlCalculator.sparkline_to_history(existing_sparkline)
+    if len(base_history) < 20:
+        return {}
+
+    window_start = pd.Timestamp(last_date) - timedelta(days=INCREMENTAL_WARMUP_DAYS)
+    if base_history['date'].iloc[-1] < window_start:
+        return {}
+
+    return {'start_date': window_start.strftime('%Y%m%d'), 'base_history': base_history}
+
+
+def process_symbols_concurrently(assets: List[Dict], fetcher: DataFetcher,
+                                 fetch_plans: Optional[Dict[str, Dict]] = None,
+                                 max_workers: int = ETL_MAX_WORKERS) -> List[Optional[pd.DataFrame]]:
+    """
+    v7.3: 并发处理多个资产（线程池）
+
+    Tushare / yfinance 的调用频率由共享限流器统一控制，线程池只负责让网络等待
+    和指标计算相互重叠，整体耗时受配额约束而不是受串行休眠约束。
+
+    Args:
+        assets: monitor_config 查询结果（包含 symbol/name/category）
+        fetcher: 数据获取器（多线程共享）
+        fetch_plans: v7.3 {symbol: 增量抓取参数}，缺省的资产全量拉取
+        max_workers: 并发度，<= 1 时逐个串行处理
+
+    Returns:
+        与 assets 顺序一致的结果列表，失败的资产对应 None
+    """
+    fetch_plans = fetch_plans or {}
+
+    if max_workers <= 1 or len(assets) <= 1:
+        results = [
+            process_symbol(a['symbol'], a['name'], a['category'], fetcher, **fetch_plans.get(a['symbol'], {}))
+            for a in assets
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(process_symbol, a['symbol'], a['name'], a['category'], fetcher,
+                                **fetch_plans.get(a['symbol'], {}))
+                for a in assets
+            ]
+            # 按提交顺序收集结果，保证与 sort_rank 顺序一致
+            results = [f.result() for f in futures]
+
+    # v7.3: 状态推进的结果统一构建一次 DataFrame
+    advanced = {a['symbol']: result for a, result in zip(assets, results) if isinstance(result, tuple)}
+    frames = FishbowlCalculator.advanced_frames(advanced)
+    return [frames.get(a['symbol']) if isinstance(result, tuple) else result for a, result in zip(assets, results)]
+
+
+def get_bulk_api(symbol: str, category: str) -> Optional[str]:
+    """
+    v7.3: 判断资产是否支持截面批量拉取
+
+    index_daily 必须指定 ts_code，不支持按 trade_date 截面查询，A股指数走逐个拉取的常规路径。
+
+    Returns:
+        截面接口名（行业 ETF -> fund_daily），不支持时返回 None
+    """
+    if category == 'industry':
+        return 'fund_daily'
+    return None
+
+
+def process_symbols_bulk(assets: List[Dict], fetcher: DataFetcher,
+                         existing_sparklines: Dict[str, Optional[str]],
+                         states: Optional[Dict[str, Dict]] = None) -> Tuple[Dict[str, pd.DataFrame], List[Dict]]:
+    """
+    v7.3: 截面批量模式
+
+    已有足够 sparkline 历史（>= 20 个点）的行业 ETF，按交易日一次性拉取
+    全部代码的日线，拼接到已存储的历史之后再计算指标。N 个代码每天只需 1 次调用。
+
+    历史不足、缺口超过 BULK_MAX_TRADE_DATES 个交易日、或截面结果中缺失的资产，
+    回退到逐个拉取的常规路径。
+
+    v7.3: 已有增量计算状态的资产直接用新 K 线推进状态，无需重算整段历史。
+
+    v7.3: 截面查询的 fund_daily 价格以各自交易日为复权基准（等同不复权），无法像逐个拉取那样
+    通过重叠日收盘价发现复权调整，因此对照 fund_adj 复权因子：期间因子变化（除权除息）的 ETF
+    回退到逐个拉取，由常规路径校验并全量重算；复权因子接口不可用时跳过该检查。
+
+    Args:
+        assets: monitor_config 查询结果
+        fetcher: 数据获取器
+        existing_sparklines: {symbol: 数据库中最新的 sparkline_json}
+        states: {symbol: 增量计算状态}
+
+    Returns:
+        (批量模式计算结果 {symbol: DataFrame}, 需要回退逐个拉取的资产列表)
+    """
+    results = {}
+    fallback_assets = []
+    states = states or {}
+
+    # 1. 筛选可批量处理的资产，并还原已存储的收盘价历史
+    candidates = []
+    for asset in assets:
+        api_name = get_bulk_api(asset['symbol'], asset['category'])
+        history = pd.DataFrame()
+        if api_name:
+            history = FishbowlCalculator.sparkline_to_history(existing_sparklines.get(asset['symbol']))
+        if api_name and len(history) >= 20:
+            candidates.append((asset, api_name, history))
+        else:
+            fallback_assets.append(asset)
+
+    if not candidates:
+        return results, fallback_assets
+
+    # 2. 确定需要回补的交易日
+    today = datetime.now()
+    open_dates = fetcher.get_open_trade_dates((today - timedelta(days=30)).strftime('%Y%m%d'),
+                                              today.strftime('%Y%m%d'))
+    if not open_dates:
+        return results, fallback_assets + [c[0] for c in candidates]
+
+    bulk_dates = set(open_dates[-BULK_MAX_TRADE_DATES:])
+    plan = []
+    requests_by_api: Dict[str, Dict] = {}
+    for asset, api_name, history in candidates:
+        state = states.get(asset['symbol'])
+        last_date = (state['last_date'] if state else history['date'].iloc[-1]).strftime('%Y%m%d')
+        missing = [d for d in open_dates if d > last_date]
+        if any(d not in bulk_dates for d in missing) or last_date < open_dates[0]:
+            # 缺口过大，回退到逐个拉取
+            fallback_assets.append(asset)
+            continue
+        plan.append((asset, api_name, history, missing, last_date))
+        entry = requests_by_api.setdefault(api_name, {'symbols': [], 'dates': set(), 'base_dates': set()})
+        entry['symbols'].append(asset['symbol'])
+        entry['dates'].update(missing)
+        entry['base_dates'].add(last_date)
+
+    # 3. 每个接口每个交易日只调用一次
+    bulk_bars: Dict[str, pd.DataFrame] = {}
+    published_dates: Dict[str, set] = {}
+    adj_factors: Dict[str, pd.DataFrame] = {}
+    for api_name, entry in requests_by_api.items():
+        dates = sorted(entry['dates'])
+        if not dates:
+            continue
+        print(f"  📦 截面批量拉取 {api_name}: {len(entry['symbols'])} 个代码, 交易日 {', '.join(dates)}")
+        api_bars = fetcher.fetch_bulk_daily(api_name, entry['symbols'], dates)
+        if not api_bars:
+            # 截面结果完全为空（接口不支持或调用失败），该接口的资产全部回退
+            continue
+        bulk_bars.update(api_bars)
+        # 记录实际已发布数据的交易日（收盘数据尚未发布的交易日不视为缺失）
+        published_dates[api_name] = {
+            d.strftime('%Y%m%d') for bars in api_bars.values() for d in bars['date']
+        }
+
+        # 复权因子：覆盖各资产的最后已处理日期以及新交易日
+        adj_api = BULK_ADJ_APIS.get(api_name)
+        if adj_api:
+            factors = fetcher.get_adj_factors(adj_api, sorted(entry['base_dates'] | entry['dates']))
+            if factors.empty:
+                print(f"  ⚠️  {adj_api} 不可用，跳过除权检查")
+            else:
+                adj_factors[api_name] = factors[factors['ts_code'].isin(entry['symbols'])]
+
+    # 4. 拼接历史并计算指标（无状态的资产汇总为面板，一次计算；状态推进的结果统一构建 DataFrame）
+    panel_series: Dict[str, pd.Series] = {}
+    advanced: Dict[str, Tuple[Dict, List[Dict]]] = {}
+    for asset, api_name, history, missing, last_date in plan:
+        symbol = asset['symbol']
+        new_bars = bulk_bars.get(symbol, pd.DataFrame())
+        if missing and api_name not in published_dates:
+            fallback_assets.append(asset)
+            continue
+        required = [d for d in missing if d in published_dates.get(api_name, set())]
+        if required and new_bars.empty:
+            # 截面结果中没有该代码，回退到逐个拉取
+            fallback_assets.append(asset)
+            continue
+
+        # 最后已处理日期之后复权因子发生变化（除权除息），已存储的历史需要整体复权，回退到逐个拉取
+        factors = adj_factors.get(api_name)
+        if factors is not None:
+            symbol_factors = factors[(factors['ts_code'] == symbol) & (factors['trade_date'] >= last_date)]
+            if symbol_factors['adj_factor'].nunique() > 1:
+                print(f"  ⚠️  [{symbol}] 复权因子变化（除权除息），回退到逐个拉取")
+                fallback_assets.append(asset)
+                continue
+
+        # v7.3: 有状态时 O(1) 推进（复权调整已由上方的复权因子检查排除）
+        state = states.get(symbol)
+        if state is not None:
+            advanced[symbol] = FishbowlCalculator.advance_state(state, new_bars)
+            continue
+
+        df = pd.concat([history, new_bars], ignore_index=True) if not new_bars.empty else history
+        df = df.drop_duplicates(subset='date', keep='last')
+        panel_series[symbol] = df.set_index('date')['close']
+
+    results.update(FishbowlCalculator.advanced_frames(advanced))
+    if panel_series:
+        panel = pd.DataFrame(panel_series).sort_index()
+        for symbol, df in FishbowlCalculator.calculate_panel(panel).groupby('symbol', sort=False):
+            results[symbol] = df.reset_index(drop=True)
+
+    print(f"  ✓ 截面批量模式完成: {len(results)} 个资产，{len(fallback_assets)} 个回退逐个拉取")
+    return results, fallback_assets
+
+
+def ensure_partitions(conn, dates, parent: str = 'fishbowl_daily'):
+    """
+    v7.3: 为按年分区的 fishbowl_daily 创建所需的年度分区（不提交，由调用方提交）
+
+    除传入日期所在年份外，总是预建下一年的分区，跨年首个交易日无需人工干预。
+    表尚未分区（未执行 scripts/partition_fishbowl_daily.py）时直接跳过。
+
+    Args:
+        conn: 数据库连接
+        dates: 需要覆盖的日期（'YYYY-MM-DD' 字符串或 date 对象）
+        parent: 分区父表名
+
+    Returns:
+        新建或已存在的分区年份列表，未分区时为空列表
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (parent,))
+    row = cursor.fetchone()
+    if not row or row[0] != 'p':
+        cursor.close()
+        return []
+
+    years = {int(str(d)[:4]) for d in dates}
+    years.add(datetime.now().year + 1)
+    for year in sorted(years):
+        # 分区名固定为 fishbowl_daily_<年份>，迁移脚本换表后无需改名
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS fishbowl_daily_{year}
+            PARTITION OF {parent}
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """)
+    cursor.close()
+    return sorted(years)
+
+
+DAILY_COPY_COLUMNS = (
+    'date', 'symbol', 'close_price', 'ma20_price', 'status', 'deviation_pct',
+    'duration_days', 'signal_tag', 'change_pct', 'trend_pct', 'sparkline_json', 'sparkline_point'
+)
+
+
+def _copy_text(value) -> str:
+    """将单个字段转换为 COPY text 格式（None -> \\N，转义反斜杠/制表符/换行）"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
 def batch_upsert_daily_data(conn, data_list: List[Dict]):
     """批量插入/更新每日数据（v6.9: sparkline_json 非空保护）
 
-    使用CAST(%s AS DATE)强制类型转换，避免时区问题
     v6.9: 如果 sparkline_json 为 None，则不更新该字段，保留数据库中的旧数据
+    v7.3: 提供 sparkline_point 时只发送当日数据点，由 fishbowl_sparkline_append 在数据库内追加
+    v7.3: 先 COPY 到临时暂存表，再用一条 INSERT ... ON CONFLICT 合并，避免逐条往返
+    v7.3: 合并时直接按 monitor_config.sort_rank 写入 trend_rank（取代单独的排序 UPDATE）；
+          不再自行提交，由 publish_daily 统一提交
     """
     if not data_list:
         return
 
+    # 同一批次内 (symbol, date) 重复时保留最后一条，否则 ON CONFLICT 会报
+    # "cannot affect row a second time"
+    rows = {}
+    for d in data_list:
+        rows[(d['symbol'], d['date'])] = d
+
+    buffer = io.StringIO()
+    for d in rows.values():
+        buffer.write('\t'.join(_copy_text(d.get(col)) for col in DAILY_COPY_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+
     cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS fishbowl_daily_staging (
+            date DATE,
+            symbol VARCHAR(20),
+            close_price DECIMAL(10, 2),
+            ma20_price DECIMAL(10, 4),
+            status VARCHAR(10),
+            deviation_pct DECIMAL(10, 4),
+            duration_days INT,
+            signal_tag VARCHAR(20),
+            change_pct DECIMAL(10, 4),
+            trend_pct DECIMAL(10, 4),
+            sparkline_json JSONB,
+            sparkline_point JSONB
+        ) ON COMMIT DELETE ROWS
+    """)
+    # 连接来自连接池，临时表可能残留上一次未提交的数据
+    cursor.execute("TRUNCATE fishbowl_daily_staging")
+    cursor.copy_expert(
+        f"COPY fishbowl_daily_staging ({', '.join(DAILY_COPY_COLUMNS)}) FROM STDIN",
+        buffer
+    )
+
+    # 只有存在当日数据点时才引用 fishbowl_sparkline_append（未执行迁移的库中该函数不存在）
+    if any(d.get('sparkline_point') is not None for d in rows.values()):
+        # v7.3: 服务端追加 - 以该标的最新的 sparkline 为基础（同日重跑时即为当日这一行）
+        sparkline_expr = """
+            CASE WHEN s.sparkline_point IS NOT NULL THEN
+                fishbowl_sparkline_append(
+                    (SELECT f.sparkline_json FROM fishbowl_daily f
+                     WHERE f.symbol = s.symbol AND f.sparkline_json IS NOT NULL
+                     ORDER BY f.date DESC LIMIT 1),
+                    s.sparkline_point,
+                    250
+                )
+            ELSE s.sparkline_json END
+        """
+    else:
+        sparkline_expr = "s.sparkline_json"
+
+    # sparkline 为 NULL（无效或生成失败）时用 COALESCE 保留数据库旧数据
+    cursor.execute(f"""
+        INSERT INTO fishbowl_daily
+            (date, symbol, close_price, ma20_price, status, deviation_pct, duration_days, trend_rank, signal_tag, change_pct, trend_pct, sparkline_json)
+        SELECT
+            s.date, s.symbol, s.close_price, s.ma20_price, s.status, s.deviation_pct,
+            s.duration_days, c.sort_rank, s.signal_tag, s.change_pct, s.trend_pct,
+            {sparkline_expr}
+        FROM fishbowl_daily_staging s
+        LEFT JOIN monitor_config c ON c.symbol = s.symbol
+        ON CONFLICT (symbol, date)
+        DO UPDATE SET
+            close_price = EXCLUDED.close_price,
+            ma20_price = EXCLUDED.ma20_price,
+            status = EXCLUDED.status,
+            deviation_pct = EXCLUDED.deviation_pct,
+            duration_days = EXCLUDED.duration_days,
+            trend_rank = COALESCE(EXCLUDED.trend_rank, fishbowl_daily.trend_rank),
+            signal_tag = EXCLUDED.signal_tag,
+            change_pct = EXCLUDED.change_pct,
+            trend_pct = EXCLUDED.trend_pct,
+            sparkline_json = COALESCE(EXCLUDED.sparkline_json, fishbowl_daily.sparkline_json),
+            created_at = CURRENT_TIMESTAMP
+    """)
+    cursor.close()
 
-    # 逐条插入
-    for d in data_list:
-        # v6.9: 根据 sparkline_json 是否有效，动态构建 SQL
-        if d.get('sparkline_json') is not None:
-            # 有效的 sparkline，更新所有字段（包括 sparkline_json）
-            insert_query = """
-                INSERT INTO fishbowl_daily
-                    (date, symbol, close_price, ma20_price, status, deviation_pct, duration_days, signal_tag, change_pct, trend_pct, sparkline_json)
-                VALUES
-                    (CAST(%s AS DATE), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (symbol, date)
-                DO UPDATE SET
-                    close_price = EXCLUDED.close_price,
-                    ma20_price = EXCLUDED.ma20_price,
-                    status = EXCLUDED.status,
-                    deviation_pct = EXCLUDED.deviation_pct,
-                    duration_days = EXCLUDED.duration_days,
-                    signal_tag = EXCLUDED.signal_tag,
-                    change_pct = EXCLUDED.change_pct,
-                    trend_pct = EXCLUDED.trend_pct,
-                    sparkline_json = EXCLUDED.sparkline_json,
-                    created_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(insert_query, (
-                d['date'],
-                d['symbol'],
-                d['close_price'],
-                d['ma20_price'],
-                d['status'],
-                d['deviation_pct'],
-                d['duration_days'],
-                d['signal_tag'],
-                d['change_pct'],
-                d['trend_pct'],
-                d['sparkline_json']
-            ))
-        else:
-            # sparkline 无效或生成失败，不更新 sparkline_json 字段（保留数据库旧数据）
-            insert_query = """
-                INSERT INTO fishbowl_daily
-                    (date, symbol, close_price, ma20_price, status, deviation_pct, duration_days, signal_tag, change_pct, trend_pct)
-                VALUES
-                    (CAST(%s AS DATE), %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (symbol, date)
-                DO UPDATE SET
-                    close_price = EXCLUDED.close_price,
-                    ma20_price = EXCLUDED.ma20_price,
-                    status = EXCLUDED.status,
-                    deviation_pct = EXCLUDED.deviation_pct,
-                    duration_days = EXCLUDED.duration_days,
-                    signal_tag = EXCLUDED.signal_tag,
-                    change_pct = EXCLUDED.change_pct,
-                    trend_pct = EXCLUDED.trend_pct,
-                    created_at = CURRENT_TIMESTAMP
-            """
-            cursor.execute(insert_query, (
-                d['date'],
-                d['symbol'],
-                d['close_price'],
-                d['ma20_price'],
-                d['status'],
-                d['deviation_pct'],
-                d['duration_days'],
-                d['signal_tag'],
-                d['change_pct'],
-                d['trend_pct']
-            ))
-
-    conn.commit()
+
+def save_states(conn, states: List[Dict]):
+    """
+    v7.3: 批量保存增量计算状态（fishbowl_state）
+
+    Args:
+        conn: 数据库连接（不提交，由调用方提交）
+        states: FishbowlCalculator.build_state / update 产生的状态列表
+    """
+    if not states:
+        return
+
+    cursor = conn.cursor()
+    execute_values(cursor, """
+        INSERT INTO fishbowl_state
+            (symbol, last_date, closes, running_sum, status, duration_days, regime_start_price)
+        VALUES %s
+        ON CONFLICT (symbol)
+        DO UPDATE SET
+            last_date = EXCLUDED.last_date,
+            closes = EXCLUDED.closes,
+            running_sum = EXCLUDED.running_sum,
+            status = EXCLUDED.status,
+            duration_days = EXCLUDED.duration_days,
+            regime_start_price = EXCLUDED.regime_start_price,
+            updated_at = CURRENT_TIMESTAMP
+    """, [
+        (
+            s['symbol'],
+            s['last_date'].strftime('%Y-%m-%d'),
+            json.dumps(s['closes']),
+            s['running_sum'],
+            s['status'],
+            s['duration_days'],
+            s['regime_start_price'],
+        )
+        for s in states
+    ])
     cursor.close()
 
 
-def update_sort_rankings(conn, date):
-    """更新固定排序（按配置的sort_rank排序）"""
+def refresh_latest(conn, symbols: List[str]):
+    """
+    v7.3: 用 fishbowl_daily 中各标的最新一行刷新 fishbowl_latest（不提交，由调用方提交）
+
+    按 (symbol, date) 索引只读取本次更新的标的，同时刷新冗余的配置字段。
+
+    Args:
+        conn: 数据库连接
+        symbols: 需要刷新的标的代码列表
+    """
+    if not symbols:
+        return
+
     cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO fishbowl_latest
+            (symbol, date, close_price, ma20_price, status, deviation_pct, duration_days, trend_rank,
+             signal_tag, change_pct, trend_pct, sparkline_json,
+             name, category, industry_level, dominant_etf, sort_rank, updated_at)
+        SELECT DISTINCT ON (d.symbol)
+            d.symbol, d.date, d.close_price, d.ma20_price, d.status, d.deviation_pct, d.duration_days, d.trend_rank,
+            d.signal_tag, d.change_pct, d.trend_pct, d.sparkline_json,
+            c.name, c.category, c.industry_level, c.dominant_etf, c.sort_rank, CURRENT_TIMESTAMP
+        FROM fishbowl_daily d
+        JOIN monitor_config c ON d.symbol = c.symbol
+        WHERE d.symbol = ANY(%s)
+        ORDER BY d.symbol, d.date DESC
+        ON CONFLICT (symbol) DO UPDATE SET
+            date = EXCLUDED.date,
+            close_price = EXCLUDED.close_price,
+            ma20_price = EXCLUDED.ma20_price,
+            status = EXCLUDED.status,
+            deviation_pct = EXCLUDED.deviation_pct,
+            duration_days = EXCLUDED.duration_days,
+            trend_rank = EXCLUDED.trend_rank,
+            signal_tag = EXCLUDED.signal_tag,
+            change_pct = EXCLUDED.change_pct,
+            trend_pct = EXCLUDED.trend_pct,
+            sparkline_json = EXCLUDED.sparkline_json,
+            name = EXCLUDED.name,
+            category = EXCLUDED.category,
+            industry_level = EXCLUDED.industry_level,
+            dominant_etf = EXCLUDED.dominant_etf,
+            sort_rank = EXCLUDED.sort_rank,
+            updated_at = CURRENT_TIMESTAMP
+    """, (list(symbols),))
+    cursor.close()
+
+
+def save_series(conn, series_rows: List[Tuple[str, Dict]]):
+    """
+    v7.3: 追加趋势图数据点到 fishbowl_series（同日重跑时覆盖当日数据点）
 
-    # 按配置的sort_rank更新trend_rank，保持固定顺序
-    update_query = """
-        UPDATE fishbowl_daily
-        SET trend_rank = c.sort_rank
-        FROM monitor_config c
-        WHERE fishbowl_daily.symbol = c.symbol
-          AND fishbowl_daily.date = %s
-          AND c.sort_rank IS NOT NULL
+    Args:
+        conn: 数据库连接（不提交，由调用方提交）
+        series_rows: [(symbol, sparkline 数据点), ...]
     """
+    if not series_rows:
+        return
 
-    cursor.execute(update_query, (date,))
-    conn.commit()
+    cursor = conn.cursor()
+    execute_values(cursor, """
+        INSERT INTO fishbowl_series (symbol, date, price, ma20, change)
+        VALUES %s
+        ON CONFLICT (symbol, date)
+        DO UPDATE SET
+            price = EXCLUDED.price,
+            ma20 = EXCLUDED.ma20,
+            change = EXCLUDED.change
+    """, [
+        (symbol, point['date'], point['price'], point['ma20'], point['change'])
+        for symbol, point in series_rows
+    ])
     cursor.close()
 
 
 # ================================================
 # v5.8 全景战术驾驶舱数据聚合
 # ================================================
-def update_market_overview(fetcher: DataFetcher, db_conn: DatabaseConnection):
+def overview_latest(fetcher: DataFetcher, run_cache: RunCache, symbol: str,
+                    category: str = 'broad') -> Optional[pd.Series]:
+    """
+    v7.3: 市场概览用的最新一行指标
+
+    优先取本次运行已计算的结果，本次运行未覆盖该代码时才联网拉取并计算。
+    """
+    df = run_cache.result(symbol)
+    if df is None:
+        df = fetcher.fetch_history(symbol, category)
+        if df.empty:
+            return None
+        df = FishbowlCalculator.calculate_all_metrics(df)
+        run_cache.put_result(symbol, df)
+    return df.iloc[-1]
+
+
+def recent_amounts(fetcher: DataFetcher, run_cache: RunCache, symbol: str, count: int) -> List[float]:
+    """
+    v7.3: 最近 count 个交易日的成交额（按日期降序，单位千元）
+
+    本次运行已拉取的原始行情不足 count 天时，只补拉最近 OVERVIEW_LOOKBACK_DAYS 天，
+    不再下载整段历史。
+    """
+    bars = run_cache.bars(symbol)
+    if bars is None or 'amount' not in bars.columns or bars['amount'].notna().sum() < count:
+        start_date = (datetime.now() - timedelta(days=OVERVIEW_LOOKBACK_DAYS)).strftime('%Y%m%d')
+        df = fetcher.get_index_bars(symbol, start_date)
+        run_cache.put_bars(symbol, df)
+        bars = run_cache.bars(symbol)
+    if bars is None or 'amount' not in bars.columns:
+        return []
+
+    bars = bars.dropna(subset=['amount']).sort_values('date', ascending=False).head(count)
+    return [float(amount) for amount in bars['amount']]
+
+
+def build_market_leaders(run_cache: RunCache, industry_assets: List[Dict], limit: int = 3) -> Optional[List[Dict]]:
+    """
+    v7.3: 领涨先锋 (Top 3 行业板块)，直接由本次运行结果计算
+
+    与数据库查询口径一致：取最新日期，筛选该日的行业资产按涨幅降序。
+    只有全部行业资产都有本次运行的结果时才在内存中排名；有资产被跳过（选择器、交易日历）
+    或拉取失败时返回 None，由 publish_daily 回退为数据库查询（可读到本次尚未提交的当日数据）。
+
+    Args:
+        run_cache: 本次运行结果缓存
+        industry_assets: monitor_config 中全部行业资产
+    """
+    industry_rows = []
+    for asset in industry_assets:
+        df = run_cache.result(asset['symbol'])
+        if df is None:
+            return None
+        industry_rows.append((asset, df.iloc[-1]))
+    if not industry_rows:
+        return None
+
+    latest_date = max(row['date'] for _, row in industry_rows)
+    candidates = [
+        (asset, row) for asset, row in industry_rows
+        if row['date'] == latest_date and pd.notna(row['change_pct'])
+    ]
+    candidates.sort(key=lambda item: item[1]['change_pct'], reverse=True)
+
+    leaders_data = []
+    for asset, row in candidates[:limit]:
+        # 提取ETF代码（去掉后缀）
+        code = asset['symbol'].split('.')[0]
+        # 与数据库中 change_pct DECIMAL(10, 4) 的精度保持一致
+        change = round(float(row['change_pct']) * 100, 2)
+        leaders_data.append({
+            'name': asset['name'],
+            'change': change,
+            'code': code
+        })
+        print(f"  ✓ {asset['name']}: +{change:.2f}% (代码: {code})")
+
+    return leaders_data
+
+
+def gold_quote(fetcher: DataFetcher, name: str, ticker: str, conversion: float = 1.0,
+               price_range: Optional[Tuple[float, float]] = None) -> Dict:
+    """
+    v7.3: 从 yfinance 获取一个国际金价数据源的最新报价（数据不足或价格不合理时抛出异常）
+
+    Args:
+        name: 显示名称
+        ticker: Yahoo Finance 代码
+        conversion: 换算为美元/盎司的系数（GLD 等 ETF 使用）
+        price_range: 合理价格区间（美元/盎司），超出时视为数据异常
+    """
+    hist = fetcher.limiter.call('yfinance', fetcher.source.yf_history, ticker, period="5d")  # 获取最近5天数据
+    if hist.empty or len(hist) < 2:
+        raise Exception(f"{name}数据不足")
+
+    # 获取最新交易日数据和前一日数据（v6.8: 基于换算后的价格计算涨跌幅）
+    gold_price = float(hist.iloc[-1]['Close']) * conversion
+    prev_close = float(hist.iloc[-2]['Close']) * conversion
+    price_change = ((gold_price - prev_close) / prev_close) * 100
+
+    if price_range and not (price_range[0] <= gold_price <= price_range[1]):
+        raise Exception(f"价格超出合理范围: ${gold_price:.2f}")
+
+    return {
+        'name': name,
+        'price': round(gold_price, 2),
+        'change': round(price_change, 2),
+        'unit': '$'
+    }
+
+
+def overview_sections(assets: List[Dict]) -> Set[str]:
+    """
+    v7.3: 根据本次运行更新的资产，判断需要重建的市场概览板块
+
+    A股宽基 -> a_share，美股 -> us_share，金交所 -> gold，行业 ETF -> leaders
+    """
+    sections = set()
+    for asset in assets:
+        market = market_of(asset['symbol'])
+        if asset['category'] == 'industry':
+            sections.add('leaders')
+        elif market in ('SSE', 'SZSE'):
+            sections.add('a_share')
+        if market == 'US':
+            sections.add('us_share')
+        elif market == 'SGE':
+            sections.add('gold')
+    return sections
+
+
+def build_market_overview(fetcher: DataFetcher, db_conn: DatabaseConnection,
+                          assets: Optional[List[Dict]] = None,
+                          sections: Optional[Set[str]] = None,
+                          industry_assets: Optional[List[Dict]] = None) -> Dict:
     """
     聚合生成市场概览数据：A股基准、美股风向、避险资产、领涨先锋
+
+    v7.3: 只负责构建，不写库，结果由 publish_daily 与每日数据一起提交
+    v7.3: 优先复用本次运行的结果缓存（fetcher.run_cache），只对未覆盖的代码联网
+    v7.3: sections 指定时只重建这些板块，其余板块由调用方与已有数据合并
+
+    Args:
+        fetcher: 数据获取器
+        db_conn: 数据库连接（仅在本次运行没有黄金数据时读取）
+        assets: 本次运行处理的资产
+        sections: 需要重建的板块（a_share / us_share / gold / leaders），None 表示全部
+        industry_assets: monitor_config 中全部行业资产（用于领涨先锋），默认取 assets 中的行业资产
+
+    Returns:
+        overview_data（只包含重建的板块；本次运行未覆盖全部行业资产时 leaders 为 None，
+        由 publish_daily 在发布事务内查询数据库）
     """
     print("\n" + "=" * 60)
     print("🎯 生成全景战术驾驶舱数据...")
     print("=" * 60)
     
+    run_cache = fetcher.run_cache
     overview_data = {}
     
     # ========================================
     # 1. A股基准 (上证 + 深证)
     # ========================================
-    print("\n📊 1/4 获取 A股基准数据...")
-    try:
-        # 获取上证和深证的最新数据
-        sh_df = fetcher.fetch_history('000001.SH', 'broad')
-        sz_df = fetcher.fetch_history('399001.SZ', 'broad')
-        
-        # 计算鱼盆状态
-        if not sh_df.empty:
-            sh_df = FishbowlCalculator.calculate_all_metrics(sh_df)
-            sh_latest = sh_df.iloc[-1]
-            
-            # 计算5日均量 (需要获取成交量数据)
-            sh_vol_df = fetcher.pro.index_daily(ts_code='000001.SH', 
-                                                 end_date=datetime.now().strftime('%Y%m%d'))
-            time.sleep(0.35)
-            if not sh_vol_df.empty:
-                sh_vol_df = sh_vol_df.sort_values('trade_date', ascending=False).head(6)
-                today_amount = float(sh_vol_df.iloc[0]['amount']) if len(sh_vol_df) > 0 else 0
-                ma5_amount = float(sh_vol_df.iloc[1:6]['amount'].mean()) if len(sh_vol_df) >= 6 else today_amount
+    if sections is None or 'a_share' in sections:
+        print("\n📊 1/4 获取 A股基准数据...")
+        try:
+            # 获取上证和深证的最新数据（v7.3: 本次运行已计算时直接复用）
+            sh_latest = overview_latest(fetcher, run_cache, '000001.SH')
+            sz_latest = overview_latest(fetcher, run_cache, '399001.SZ')
+            if sh_latest is None or sz_latest is None:
+                raise Exception("上证/深证数据为空")
+
+            # 计算5日均量（v7.3: 成交额取自本次运行拉取的原始行情）
+            sh_amounts = recent_amounts(fetcher, run_cache, '000001.SH', 6)
+            if sh_amounts:
+                today_amount = sh_amounts[0]
+                ma5_amount = float(np.mean(sh_amounts[1:6])) if len(sh_amounts) >= 6 else today_amount
             else:
                 today_amount = 0
                 ma5_amount = 1
-        
-        if not sz_df.empty:
-            sz_df = FishbowlCalculator.calculate_all_metrics(sz_df)
-            sz_latest = sz_df.iloc[-1]
-            
+
             # 计算深证成交量
-            sz_vol_df = fetcher.pro.index_daily(ts_code='399001.SZ',
-                                                 end_date=datetime.now().strftime('%Y%m%d'))
-            time.sleep(0.35)
-            if not sz_vol_df.empty:
-                sz_vol_df = sz_vol_df.sort_values('trade_date', ascending=False).head(6)
-                sz_amount = float(sz_vol_df.iloc[0]['amount']) if len(sz_vol_df) > 0 else 0
-            else:
-                sz_amount = 0
+            sz_amounts = recent_amounts(fetcher, run_cache, '399001.SZ', 1)
+            sz_amount = sz_amounts[0] if sz_amounts else 0
         
-        # 汇总两市成交额
-        total_amount = today_amount + sz_amount
-        vol_ratio = total_amount / ma5_amount if ma5_amount > 0 else 1.0
-        vol_tag = "放量" if vol_ratio > 1.0 else "缩量"
+            # 汇总两市成交额
+            total_amount = today_amount + sz_amount
+            vol_ratio = total_amount / ma5_amount if ma5_amount > 0 else 1.0
+            vol_tag = "放量" if vol_ratio > 1.0 else "缩量"
         
-        overview_data['a_share'] = {
-            'sh': {
-                'price': float(sh_latest['close']),
-                'change': float(sh_latest['change_pct'] * 100) if pd.notna(sh_latest['change_pct']) else 0.0,
-                'status': sh_latest['status']
-            },
-            'sz': {
-                'price': float(sz_latest['close']),
-                'change': float(sz_latest['change_pct'] * 100) if pd.notna(sz_latest['change_pct']) else 0.0,
-                'status': sz_latest['status']
-            },
-            'volume': {
-                'amount': round(total_amount / 100000, 2),  # 转换为亿元（千元除以10万）
-                'tag': vol_tag,
-                'ratio': round(vol_ratio, 2)
+            overview_data['a_share'] = {
+                'sh': {
+                    'price': float(sh_latest['close']),
+                    'change': float(sh_latest['change_pct'] * 100) if pd.notna(sh_latest['change_pct']) else 0.0,
+                    'status': sh_latest['status']
+                },
+                'sz': {
+                    'price': float(sz_latest['close']),
+                    'change': float(sz_latest['change_pct'] * 100) if pd.notna(sz_latest['change_pct']) else 0.0,
+                    'status': sz_latest['status']
+                },
+                'volume': {
+                    'amount': round(total_amount / 100000, 2),  # 转换为亿元（千元除以10万）
+                    'tag': vol_tag,
+                    'ratio': round(vol_ratio, 2)
+                }
             }
-        }
-        print(f"  ✓ 上证指数: {overview_data['a_share']['sh']['price']:.2f} ({overview_data['a_share']['sh']['change']:+.2f}%)")
-        print(f"  ✓ 深证成指: {overview_data['a_share']['sz']['price']:.2f} ({overview_data['a_share']['sz']['change']:+.2f}%)")
-        print(f"  ✓ 两市成交: {overview_data['a_share']['volume']['amount']:.0f}亿 ({vol_tag})")
+            print(f"  ✓ 上证指数: {overview_data['a_share']['sh']['price']:.2f} ({overview_data['a_share']['sh']['change']:+.2f}%)")
+            print(f"  ✓ 深证成指: {overview_data['a_share']['sz']['price']:.2f} ({overview_data['a_share']['sz']['change']:+.2f}%)")
+            print(f"  ✓ 两市成交: {overview_data['a_share']['volume']['amount']:.0f}亿 ({vol_tag})")
         
-    except Exception as e:
-        print(f"  ❌ A股基准数据获取失败: {str(e)}")
-        overview_data['a_share'] = None
+        except Exception as e:
+            print(f"  ❌ A股基准数据获取失败: {str(e)}")
+            overview_data['a_share'] = None
     
     # ========================================
     # 2. 美股风向 (T-1)
     # ========================================
-    print("\n🌎 2/4 获取美股风向数据...")
-    try:
-        # 市场概览：展示综合指数（代表整体市场情绪）
-        # 注：全球指数表格展示 NDX（可投资标的），两者用途不同
-        us_indices = [
-            ('IXIC', '纳斯达克'),  # 综合指数（3000+只股票，代表整体市场）
-            ('SPX', '标普500'),
-            ('DJI', '道琼斯')
-        ]
+    if sections is None or 'us_share' in sections:
+        print("\n🌎 2/4 获取美股风向数据...")
+        try:
+            # 市场概览：展示综合指数（代表整体市场情绪）
+            # 注：全球指数表格展示 NDX（可投资标的），两者用途不同
+            us_indices = [
+                ('IXIC', '纳斯达克'),  # 综合指数（3000+只股票，代表整体市场）
+                ('SPX', '标普500'),
+                ('DJI', '道琼斯')
+            ]
         
-        us_data = []
-        for symbol, name in us_indices:
-            try:
-                # 优先使用 Tushare index_global（稳定可靠）
-                df = fetcher.pro.index_global(ts_code=symbol)
-                time.sleep(0.35)
-                
-                if not df.empty:
-                    df = df.sort_values('trade_date', ascending=False)
-                    latest = df.iloc[0]
-                    
-                    us_data.append({
-                        'name': name,
-                        'price': float(latest['close']),
-                        'change': float(latest['pct_chg']) if 'pct_chg' in latest and pd.notna(latest['pct_chg']) else 0.0
-                    })
-                    print(f"  ✓ {name}: {latest['close']:.2f} ({latest.get('pct_chg', 0):+.2f}%)")
-            except Exception as e:
-                print(f"  ⚠️  {name} 数据获取失败: {str(e)}")
-                us_data.append({'name': name, 'price': 0, 'change': 0})
+            us_data = []
+            for symbol, name in us_indices:
+                try:
+                    # v7.3: 本次运行已更新该指数时直接复用，与表格数据保持一致
+                    cached = run_cache.result(symbol)
+                    if cached is not None:
+                        latest = cached.iloc[-1]
+                        change = float(latest['change_pct'] * 100) if pd.notna(latest['change_pct']) else 0.0
+                        us_data.append({'name': name, 'price': float(latest['close']), 'change': change})
+                        print(f"  ✓ {name}: {latest['close']:.2f} ({change:+.2f}%)")
+                        continue
+
+                    # v7.3: 与表格数据使用同一套数据源路由（按健康度在 yfinance / Tushare 之间选择），
+                    #       只拉取最近一段时间，涨跌幅由最近两个收盘价计算
+                    start = (datetime.now() - timedelta(days=OVERVIEW_LOOKBACK_DAYS)).strftime('%Y%m%d')
+                    df = fetcher.fetch_us_index(symbol, start_date=start)
+
+                    if not df.empty:
+                        price = float(df['close'].iloc[-1])
+                        change = (price / float(df['close'].iloc[-2]) - 1) * 100 if len(df) >= 2 else 0.0
+
+                        us_data.append({
+                            'name': name,
+                            'price': price,
+                            'change': round(change, 2)
+                        })
+                        print(f"  ✓ {name}: {price:.2f} ({change:+.2f}%)")
+                except Exception as e:
+                    print(f"  ⚠️  {name} 数据获取失败: {str(e)}")
+                    us_data.append({'name': name, 'price': 0, 'change': 0})
         
-        overview_data['us_share'] = us_data
+            overview_data['us_share'] = us_data
         
-    except Exception as e:
-        print(f"  ❌ 美股数据获取失败: {str(e)}")
-        overview_data['us_share'] = []
+        except Exception as e:
+            print(f"  ❌ 美股数据获取失败: {str(e)}")
+            overview_data['us_share'] = []
     
     # ========================================
     # 3. 避险资产 (国际黄金价格)
     # ========================================
-    print("\n🥇 3/4 获取黄金数据...")
-    try:
-        # v7.0.1: 优先使用 Tushare 的上海金交所数据（稳定可靠）
-        # 备用方案：yfinance 获取国际金价
-        
-        # 方案1：从数据库读取已更新的上海金交所黄金现货数据
+    if sections is None or 'gold' in sections:
+        print("\n🥇 3/4 获取黄金数据...")
         try:
-            conn = db_conn.get_connection()
-            cursor = conn.cursor()
-            
-            # 获取最近2天的Au99.99数据（计算涨跌幅）
-            cursor.execute("""
-                SELECT date, close_price, change_pct
-                FROM fishbowl_daily
-                WHERE symbol = 'Au99.99'
-                ORDER BY date DESC
-                LIMIT 2
-            """)
-            gold_rows = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            # v7.0.1: 优先使用 Tushare 的上海金交所数据（稳定可靠）
+            # 备用方案：yfinance 获取国际金价
+        
+            # 方案1：上海金交所黄金现货数据
+            # v7.3: 优先使用本次运行刚计算的数据（发布前数据库里还是上一交易日）
+            try:
+                gold_today = run_cache.result('Au99.99')
+                if gold_today is not None:
+                    gold_latest = gold_today.iloc[-1]
+                    gold_change = float(gold_latest['change_pct']) if pd.notna(gold_latest['change_pct']) else None
+                    gold_rows = [(gold_latest['date'], float(gold_latest['close']), gold_change)]
+                else:
+                    with db_conn.connection() as conn:
+                        cursor = conn.cursor()
+
+                        # 获取最近2天的Au99.99数据（计算涨跌幅）
+                        cursor.execute("""
+                            SELECT date, close_price, change_pct
+                            FROM fishbowl_daily
+                            WHERE symbol = 'Au99.99'
+                            ORDER BY date DESC
+                            LIMIT 2
+                        """)
+                        gold_rows = cursor.fetchall()
+                        cursor.close()
             
-            if gold_rows and len(gold_rows) >= 1:
-                latest = gold_rows[0]
-                gold_price = float(latest[1])  # close_price
-                price_change = float(latest[2] * 100) if latest[2] else 0.0  # change_pct
-                
-                overview_data['gold'] = {
-                    'name': '上海金 (CNY)',
-                    'price': round(gold_price, 2),
-                    'change': round(price_change, 2),
-                    'unit': '¥'
-                }
-                print(f"  ✅ 上海金 (CNY): ¥{gold_price:.2f}/克 ({'+' if price_change >= 0 else ''}{price_change:.2f}%)")
-            else:
-                raise Exception("数据库无黄金数据")
+                if gold_rows and len(gold_rows) >= 1:
+                    latest = gold_rows[0]
+                    gold_price = float(latest[1])  # close_price
+                    price_change = float(latest[2] * 100) if latest[2] else 0.0  # change_pct
                 
-        except Exception as db_error:
-            print(f"  ⚠️  从数据库读取黄金数据失败: {str(db_error)}, 尝试 yfinance")
-            
-            # 方案2：使用 yfinance 获取国际金价（备用）
-            import yfinance as yf
-            import time as time_module
-
-            try:
-                # v7.0.1: 增加延迟到5秒，避免API限流（之前美股数据也用了yfinance）
-                print("  ⏳ 等待 5 秒避免 API 限流...")
-                time_module.sleep(5)
-
-                # v6.8 主要方案：获取 XAUUSD=X (伦敦金现货) 数据
-                xau = yf.Ticker("XAUUSD=X")
-                xau_hist = xau.history(period="5d")  # 获取最近5天数据
-
-                if not xau_hist.empty and len(xau_hist) >= 2:
-                    # 获取最新交易日数据和前一日数据
-                    latest = xau_hist.iloc[-1]
-                    prev = xau_hist.iloc[-2]
-
-                    gold_price = float(latest['Close'])
-                    prev_close = float(prev['Close'])
-
-                    # v6.8 修复：正确计算涨跌幅
-                    price_change = ((gold_price - prev_close) / prev_close) * 100
-
-                    # 验证价格合理性 (1500-3500美元/盎司)
-                    if gold_price < 1500 or gold_price > 3500:
-                        print(f"  ⚠️  伦敦金价格异常: ${gold_price:.2f}, 使用备用方案")
-                        raise Exception("价格超出合理范围")
-
                     overview_data['gold'] = {
-                        'name': '伦敦金 (USD)',  # v6.8: 明确标注为伦敦金
+                        'name': '上海金 (CNY)',
                         'price': round(gold_price, 2),
                         'change': round(price_change, 2),
-                        'unit': '$'
+                        'unit': '¥'
                     }
-                    print(f"  ✅ 伦敦金 (USD): ${gold_price:.2f}/盎司 ({'+' if price_change >= 0 else ''}{price_change:.2f}%)")
-
+                    print(f"  ✅ 上海金 (CNY): ¥{gold_price:.2f}/克 ({'+' if price_change >= 0 else ''}{price_change:.2f}%)")
                 else:
-                    raise Exception("伦敦金数据不足")
-
-            except Exception as xau_error:
-                print(f"  ⚠️  yfinance 伦敦金获取失败: {str(xau_error)}, 尝试黄金期货数据")
+                    raise Exception("数据库无黄金数据")
+                
+            except Exception as db_error:
+                print(f"  ⚠️  从数据库读取黄金数据失败: {str(db_error)}, 尝试 yfinance")
 
-                # 备用方案1：使用黄金期货 (GC=F) 数据
+                # 方案2：国际金价（备用）
+                # v7.3: 伦敦金 / 黄金期货 / GLD 错峰并发请求，取优先级最高的有效结果，
+                #       不再逐个串行等待；调用频率仍由共享限流器控制
                 try:
-                    time_module.sleep(5)  # v7.0.1: 增加延迟到5秒避免限流
-                    gc = yf.Ticker("GC=F")
-                    gc_hist = gc.history(period="5d")
-
-                    if not gc_hist.empty and len(gc_hist) >= 2:
-                        latest = gc_hist.iloc[-1]
-                        prev = gc_hist.iloc[-2]
-
-                        gold_price = float(latest['Close'])
-                        prev_close = float(prev['Close'])
-                        price_change = ((gold_price - prev_close) / prev_close) * 100
-
-                        overview_data['gold'] = {
-                            'name': '黄金期货 (COMEX)',
-                            'price': round(gold_price, 2),
-                            'change': round(price_change, 2),
-                            'unit': '$'
-                        }
-                        print(f"  ✅ 黄金期货: ${gold_price:.2f}/盎司 ({'+' if price_change >= 0 else ''}{price_change:.2f}%)")
-                    else:
-                        raise Exception("黄金期货数据不足")
-
-                except Exception as gc_error:
-                    print(f"  ⚠️  黄金期货获取失败: {str(gc_error)}, 尝试 GLD ETF")
-
-                    # 备用方案2：使用 GLD ETF 数据
-                    try:
-                        time_module.sleep(5)  # v7.0.1: 增加延迟到5秒避免限流
-                        gld = yf.Ticker("GLD")
-                        gld_hist = gld.history(period="5d")
-
-                        if not gld_hist.empty and len(gld_hist) >= 2:
-                            latest = gld_hist.iloc[-1]
-                            prev = gld_hist.iloc[-2]
-
-                            gld_price = float(latest['Close'])
-                            prev_close = float(prev['Close'])
-
-                            # GLD 与黄金价格的换算关系（约1/10盎司黄金）
-                            conversion_factor = 10.87
-                            gold_price = gld_price * conversion_factor
-
-                            # v6.8: 基于换算后的黄金价格计算涨跌幅
-                            prev_gold_price = prev_close * conversion_factor
-                            price_change = ((gold_price - prev_gold_price) / prev_gold_price) * 100
-
-                            overview_data['gold'] = {
-                                'name': '黄金 (GLD)',
-                                'price': round(gold_price, 2),
-                                'change': round(price_change, 2),
-                                'unit': '$'
-                            }
-                            print(f"  ✅ 黄金 (GLD): ${gold_price:.2f}/盎司 ({'+' if price_change >= 0 else ''}{price_change:.2f}%)")
-                        else:
-                            raise Exception("GLD数据不足")
-
-                    except Exception as gld_error:
-                        print(f"  ⚠️  GLD获取失败: {str(gld_error)}, 使用默认值")
-                        # 最后的备用方案：使用估算值（涨跌幅为0）
-                        overview_data['gold'] = {
-                            'name': '国际黄金',
-                            'price': 2650.0,  # 更新为更合理的估算值
-                            'change': 0.0,
-                            'unit': '$'
-                        }
+                    source_name, overview_data['gold'] = hedged_call(
+                        [(name, partial(gold_quote, fetcher, name, ticker, conversion, price_range))
+                         for name, ticker, conversion, price_range in GOLD_FALLBACK_SOURCES],
+                        stagger=GOLD_HEDGE_STAGGER
+                    )
+                    gold = overview_data['gold']
+                    print(f"  ✅ {source_name}: ${gold['price']:.2f}/盎司 ({'+' if gold['change'] >= 0 else ''}{gold['change']:.2f}%)")
 
-    except Exception as e:
-        print(f"  ⚠️  黄金数据获取失败，使用默认值: {str(e)}")
-        overview_data['gold'] = {
-            'name': '国际黄金',
-            'price': 2650.0,
-            'change': 0.0,
-            'unit': '$'
-        }
+                except HedgedCallError as gold_error:
+                    print(f"  ⚠️  国际金价获取失败: {str(gold_error)}, 使用默认值")
+                    # 最后的备用方案：使用估算值（涨跌幅为0）
+                    overview_data['gold'] = {
+                        'name': '国际黄金',
+                        'price': 2650.0,  # 更新为更合理的估算值
+                        'change': 0.0,
+                        'unit': '$'
+                    }
+
+        except Exception as e:
+            print(f"  ⚠️  黄金数据获取失败，使用默认值: {str(e)}")
+            overview_data['gold'] = {
+                'name': '国际黄金',
+                'price': 2650.0,
+                'change': 0.0,
+                'unit': '$'
+            }
 
     # ========================================
     # 4. 领涨先锋 (Top 3 行业板块)
     # ========================================
-    print("\n🚀 4/4 获取领涨先锋...")
-    try:
-        conn = db_conn.get_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
+    if sections is None or 'leaders' in sections:
+        print("\n🚀 4/4 获取领涨先锋...")
+        if industry_assets is None:
+            industry_assets = [a for a in assets or [] if a['category'] == 'industry']
+        # 未覆盖全部行业资产时置为 None：与已保存的概览合并时覆盖旧的领涨先锋，发布时重新查询
+        overview_data['leaders'] = build_market_leaders(run_cache, industry_assets)
+        if overview_data['leaders'] is None:
+            print("  ℹ️  本次运行未覆盖全部行业资产，发布时从数据库读取")
+
+    return overview_data
+
+
+def query_market_leaders(conn, latest_mode: bool = False) -> List[Dict]:
+    """
+    领涨先锋 (Top 3 行业板块) - 数据库查询
+
+    v7.3: 本次运行未覆盖全部行业资产时的回退方案（否则由 build_market_leaders 在内存中计算）；
+          在 publish_daily 的事务内执行，可以读到本次尚未提交的当日数据
+    v7.3: latest_mode 时从 fishbowl_latest 读取（每个标的一行，不随历史增长），
+          名称 / 类别仍以 monitor_config 为准
+    """
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    if latest_mode:
+        query = """
+            SELECT c.name, l.symbol, l.change_pct
+            FROM fishbowl_latest l
+            JOIN monitor_config c ON l.symbol = c.symbol
+            WHERE c.category = 'industry'
+              AND l.date = (SELECT MAX(date) FROM fishbowl_latest)
+              AND l.change_pct IS NOT NULL
+            ORDER BY l.change_pct DESC
+            LIMIT 3
+        """
+    else:
         # 从数据库获取当日所有行业ETF数据，按涨幅降序
         query = """
             SELECT 
@@ -1044,70 +2526,115 @@ def update_market_overview(fetcher: DataFetcher, db_conn: DatabaseConnection):
             ORDER BY d.change_pct DESC
             LIMIT 3
         """
-        
-        cursor.execute(query)
-        leaders = cursor.fetchall()
-        
-        leaders_data = []
-        for leader in leaders:
-            # 提取ETF代码（去掉后缀）
-            code = leader['symbol'].split('.')[0]
-            leaders_data.append({
-                'name': leader['name'],
-                'change': float(leader['change_pct'] * 100),
-                'code': code
-            })
-            print(f"  ✓ {leader['name']}: +{leader['change_pct']*100:.2f}% (代码: {code})")
-        
-        overview_data['leaders'] = leaders_data
-        
-        cursor.close()
-        conn.close()
-        
-    except Exception as e:
-        print(f"  ❌ 领涨先锋数据获取失败: {str(e)}")
-        overview_data['leaders'] = []
-    
-    # ========================================
-    # 5. 存入数据库
-    # ========================================
-    print("\n💾 保存到数据库...")
+
+    cursor.execute(query)
+    leaders = cursor.fetchall()
+    cursor.close()
+
+    leaders_data = []
+    for leader in leaders:
+        # 提取ETF代码（去掉后缀）
+        code = leader['symbol'].split('.')[0]
+        leaders_data.append({
+            'name': leader['name'],
+            'change': float(leader['change_pct'] * 100),
+            'code': code
+        })
+        print(f"  ✓ {leader['name']}: +{leader['change_pct']*100:.2f}% (代码: {code})")
+
+    return leaders_data
+
+
+def save_market_overview(conn, overview_data: Dict):
+    """保存市场概览数据（不提交，由调用方提交）"""
+    cursor = conn.cursor()
+
+    upsert_query = """
+        INSERT INTO market_overview (date, data, updated_at)
+        VALUES (%s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (date)
+        DO UPDATE SET
+            data = EXCLUDED.data,
+            updated_at = CURRENT_TIMESTAMP
+    """
+
+    cursor.execute(upsert_query, (datetime.now().date(), json.dumps(overview_data, ensure_ascii=False)))
+    cursor.close()
+
+
+# ================================================
+# v7.3 发布：单连接、单事务写入当日全部结果
+# ================================================
+def publish_daily(conn, data_list: List[Dict], series_rows: List[Tuple[str, Dict]],
+                  states: List[Dict], overview_data: Optional[Dict], latest_mode: bool = False):
+    """
+    在一个事务内发布当日结果：每日数据（含 trend_rank）、最新快照、趋势图序列、增量状态、市场概览
+
+    任何一步失败都会整体回滚，看板不会读到只更新了一半的交易日。
+    增量状态写在保存点内，失败只回滚状态本身（下次运行回退为全量计算）。
+
+    Args:
+        conn: 数据库连接
+        data_list: 每日数据
+        series_rows: 趋势图数据点（序列表模式，否则为空）
+        states: 增量计算状态
+        overview_data: build_market_overview 的结果，None 表示不更新市场概览
+        latest_mode: fishbowl_latest 是否可用（迁移前跳过快照维护）
+    """
     try:
-        conn = db_conn.get_connection()
+        batch_upsert_daily_data(conn, data_list)
+        print(f"\n✓ 批量入库: {len(data_list)} 条记录（含固定排序）")
+
+        if latest_mode:
+            refresh_latest(conn, sorted({d['symbol'] for d in data_list}))
+            print("✓ 刷新最新快照 fishbowl_latest")
+
+        if series_rows:
+            save_series(conn, series_rows)
+            print(f"✓ 趋势图序列追加: {len(series_rows)} 个数据点")
+
         cursor = conn.cursor()
-        
-        today = datetime.now().date()
-        
-        upsert_query = """
-            INSERT INTO market_overview (date, data, updated_at)
-            VALUES (%s, %s, CURRENT_TIMESTAMP)
-            ON CONFLICT (date)
-            DO UPDATE SET
-                data = EXCLUDED.data,
-                updated_at = CURRENT_TIMESTAMP
-        """
-        
-        cursor.execute(upsert_query, (today, json.dumps(overview_data, ensure_ascii=False)))
-        conn.commit()
-        
+        cursor.execute("SAVEPOINT save_states")
+        try:
+            save_states(conn, states)
+            cursor.execute("RELEASE SAVEPOINT save_states")
+            print(f"✓ 保存增量计算状态: {len(states)} 个资产")
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT save_states")
+            print(f"  ⚠️  保存增量计算状态失败: {str(e)}")
         cursor.close()
-        conn.close()
-        
-        print(f"  ✓ 市场概览数据已保存: {today}")
-        
-    except Exception as e:
-        print(f"  ❌ 数据保存失败: {str(e)}")
-    
-    print("=" * 60)
-    print("✅ 全景战术驾驶舱数据生成完成！")
-    print("=" * 60)
+
+        if overview_data is not None:
+            # v7.3: leaders 为 None 表示本次运行只更新了部分行业资产，按当日全部数据（含本次未提交的行）重新排名
+            if overview_data.get('leaders') is None:
+                print("\n🚀 获取领涨先锋...")
+                overview_data['leaders'] = query_market_leaders(conn, latest_mode)
+            save_market_overview(conn, overview_data)
+            print(f"✓ 市场概览数据: {datetime.now().date()}")
+
+        conn.commit()
+        print("✓ 发布完成（单事务提交）")
+    except Exception:
+        conn.rollback()
+        raise
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """主执行函数"""
+    args = parse_args(argv)
+
     print("=" * 60)
     print("鱼盆趋势雷达 - ETL 更新 v7.0 (增量追加模式)")
     print("=" * 60)
+    selectors = [
+        f"市场={','.join(args.markets)}" if args.markets else None,
+        f"类别={args.category}" if args.category else None,
+        f"代码={' '.join(args.symbols)}" if args.symbols else None,
+        "跳过市场概览" if args.skip_overview else None,
+    ]
+    selectors = [s for s in selectors if s]
+    if selectors:
+        print(f"🎯 运行范围: {'，'.join(selectors)}")
 
     try:
         # 初始化连接
@@ -1122,23 +2649,76 @@ def main():
             ORDER BY sort_rank ASC, symbol
         """
         assets = db_conn.query_data(query)
+        # v7.3: 领涨先锋需要全部行业资产都有本次结果才在内存中排名（选择器之前的完整列表）
+        industry_assets = [a for a in assets if a['category'] == 'industry']
+
+        # v7.3: 命令行选择器（--markets / --category / --symbols）
+        assets = select_assets(assets, args.markets, args.category, args.symbols)
 
         if not assets:
             print("❌ 没有找到需要更新的资产")
             return
 
-        print(f"\n✓ 找到 {len(assets)} 个需要更新的资产")
+        # v7.3: 交易日历 - 跳过所属市场没有新交易日的资产，全部休市时直接退出
+        # （--symbols 指定代码时视为人工重跑，不做跳过）
+        last_dates = db_conn.get_last_dates()
+        if fetcher.calendar is not None and not args.symbols:
+            assets, skipped_assets = filter_assets_by_calendar(assets, fetcher.calendar, last_dates)
+            if skipped_assets:
+                print(f"  ⏭️  所属市场无新交易日，跳过 {len(skipped_assets)} 个资产")
+            if not assets:
+                print("\nℹ️  所有市场均无新的交易日（周末/节假日），无需更新")
+                return
+
+        print(f"\n✓ 找到 {len(assets)} 个需要更新的资产（并发度: {ETL_MAX_WORKERS}）")
         print("-" * 60)
 
-        # 批量处理
-        all_results = []
-        success_count = 0
+        # v7.3: 预先读取所有资产已有的 sparkline（批量模式的基础历史 + 增量追加）
+        # 已迁移 fishbowl_series 时一次查询读取最近 250 个数据点，否则回退为读取 sparkline_json
+        series_mode = db_conn.series_available()
+        if series_mode:
+            existing_sparklines = db_conn.get_series_sparklines([asset['symbol'] for asset in assets])
+        else:
+            existing_sparklines = db_conn.get_existing_sparklines([asset['symbol'] for asset in assets])
+        server_append = not series_mode and ETL_SERVER_SPARKLINE_APPEND and db_conn.sparkline_append_available()
+
+        # v7.3: 增量计算状态（仅对 sparkline 完整的资产生效，否则仍需全量历史来初始化趋势图）
+        states = {
+            symbol: state for symbol, state in db_conn.get_states().items()
+            if len(FishbowlCalculator.parse_sparkline(existing_sparklines.get(symbol))) >= 20
+        }
 
-        for asset in assets:
-            result_df = process_symbol(asset['symbol'], asset['name'], asset['category'], fetcher)
+        # v7.3: 截面批量模式 + 其余资产并发逐个拉取
+        results_by_symbol: Dict[str, pd.DataFrame] = {}
+        pending_assets = assets
+        if ETL_BULK_MODE:
+            results_by_symbol, pending_assets = process_symbols_bulk(assets, fetcher, existing_sparklines, states)
+
+        # v7.3: 其余资产优先使用增量状态，其次按最后入库日期增量抓取（新标的全量拉取）
+        fetch_plans = {}
+        for asset in pending_assets:
+            if asset['symbol'] in states:
+                fetch_plans[asset['symbol']] = {'state': states[asset['symbol']]}
+                continue
+            plan = plan_incremental_fetch(asset['symbol'], last_dates, existing_sparklines.get(asset['symbol']))
+            if plan:
+                fetch_plans[asset['symbol']] = plan
+        state_count = sum(1 for plan in fetch_plans.values() if 'state' in plan)
+        print(f"  ✓ 状态推进: {state_count} 个资产，增量抓取: {len(fetch_plans) - state_count} 个资产，"
+              f"全量拉取: {len(pending_assets) - len(fetch_plans)} 个资产")
+
+        pending_results = process_symbols_concurrently(pending_assets, fetcher, fetch_plans)
+        for asset, result_df in zip(pending_assets, pending_results):
             if result_df is not None:
-                all_results.append(result_df)
-                success_count += 1
+                results_by_symbol[asset['symbol']] = result_df
+
+        # v7.3: 计算结果写入运行缓存，市场概览直接复用
+        for symbol, result_df in results_by_symbol.items():
+            fetcher.run_cache.put_result(symbol, result_df)
+
+        # 按 sort_rank 顺序汇总
+        all_results = [results_by_symbol[a['symbol']] for a in assets if a['symbol'] in results_by_symbol]
+        success_count = len(all_results)
 
         if not all_results:
             print("\n⚠️  没有成功获取任何数据,可能是非交易日")
@@ -1151,10 +2731,17 @@ def main():
         print("=" * 60)
         
         data_list = []
+        new_states = []
+        series_rows = []
         for result_df in all_results:
             if result_df.empty:
                 continue
 
+            # v7.3: 记录本次计算后的增量状态（状态模式直接取推进后的状态，全量计算时从结果提取）
+            state = result_df.attrs.get('fishbowl_state') or FishbowlCalculator.build_state(result_df)
+            if state is not None:
+                new_states.append(state)
+
             # 只取最后一天的数据
             last_row = result_df.iloc[-1]
             symbol = last_row['symbol']
@@ -1163,74 +2750,101 @@ def main():
             date_str = last_row['date'].strftime('%Y-%m-%d') if hasattr(last_row['date'], 'strftime') else str(last_row['date'])
 
             # v7.0: 核心逻辑 - 先读取数据库已有数据，决定增量还是全量
-            existing_sparkline = db_conn.get_existing_sparkline(symbol)
+            existing_sparkline = existing_sparklines.get(symbol)
             sparkline_to_save = None
-
-            # v7.0.1: 检查现有数据是否充足（至少需要20个点才有意义）
-            needs_reinit = False
-            if existing_sparkline:
-                try:
-                    existing_data = json.loads(existing_sparkline)
-                    if len(existing_data) < 20:
-                        print(f"  ⚠️  [{symbol}] 现有数据仅 {len(existing_data)} 个点，需要重新初始化")
+            sparkline_point = None
+
+            if series_mode:
+                # v7.3: 规范化存储 - 只追加新增交易日的数据点（同日重跑覆盖），不再重写整段 JSON
+                existing_points = FishbowlCalculator.parse_sparkline(existing_sparkline)
+                if len(existing_points) >= 20:
+                    last_point_date = pd.Timestamp(existing_points[-1]['date'])
+                    new_rows = result_df[result_df['date'] > last_point_date]
+                    if new_rows.empty:
+                        new_rows = result_df.tail(1)
+                    print(f"  📊 [{symbol}] 追加 {len(new_rows)} 个数据点")
+                else:
+                    new_rows = result_df.tail(250)
+                    print(f"  🔄 [{symbol}] 首次初始化，写入 {len(new_rows)} 个数据点")
+                series_rows.extend((symbol, point) for point in FishbowlCalculator.sparkline_points(new_rows))
+            else:
+                # v7.0.1: 检查现有数据是否充足（至少需要20个点才有意义）
+                needs_reinit = False
+                if existing_sparkline:
+                    try:
+                        existing_data = FishbowlCalculator.parse_sparkline(existing_sparkline)
+                        if len(existing_data) < 20:
+                            print(f"  ⚠️  [{symbol}] 现有数据仅 {len(existing_data)} 个点，需要重新初始化")
+                            needs_reinit = True
+                            existing_sparkline = None  # 强制进入全量模式
+                    except:
                         needs_reinit = True
-                        existing_sparkline = None  # 强制进入全量模式
-                except:
-                    needs_reinit = True
-                    existing_sparkline = None
-
-            if existing_sparkline and not needs_reinit:
-                # ✅ 增量模式：已有历史数据，只追加今日数据点
-                print(f"  📊 [{symbol}] 增量追加模式")
-                try:
-                    # v7.1: 计算今日涨幅（百分比形式）
+                        existing_sparkline = None
+
+                if existing_sparkline and not needs_reinit and server_append:
+                    # v7.3: 服务端追加 - 只发送当日数据点，同日覆盖 / 追加 / 裁剪由数据库完成
+                    print(f"  📊 [{symbol}] 增量追加模式（服务端）")
                     today_change = float(last_row['change_pct'] * 100) if pd.notna(last_row['change_pct']) else 0.0
+                    sparkline_point = json.dumps({
+                        "date": date_str,
+                        "price": round(float(last_row['close']), 4),
+                        "ma20": round(float(last_row['ma20_price']), 4),
+                        "change": round(today_change, 2)
+                    })
+                elif existing_sparkline and not needs_reinit:
+                    # ✅ 增量模式：已有历史数据，只追加今日数据点
+                    print(f"  📊 [{symbol}] 增量追加模式")
+                    try:
+                        # v7.1: 计算今日涨幅（百分比形式）
+                        today_change = float(last_row['change_pct'] * 100) if pd.notna(last_row['change_pct']) else 0.0
                     
-                    sparkline_json = FishbowlCalculator.append_to_sparkline(
-                        current_chart_json=existing_sparkline,
-                        today_date=date_str,
-                        today_price=float(last_row['close']),
-                        today_ma20=float(last_row['ma20_price']),
-                        today_change=today_change,  # v7.1: 传入今日涨幅
-                        max_days=250
-                    )
+                        sparkline_json = FishbowlCalculator.append_to_sparkline(
+                            current_chart_json=existing_sparkline,
+                            today_date=date_str,
+                            today_price=float(last_row['close']),
+                            today_ma20=float(last_row['ma20_price']),
+                            today_change=today_change,  # v7.1: 传入今日涨幅
+                            max_days=250,
+                            fmt=SPARKLINE_FORMAT
+                        )
                     
-                    # 验证生成的数据
-                    sparkline_array = json.loads(sparkline_json)
-                    if len(sparkline_array) > 0:
-                        sparkline_to_save = sparkline_json
-                    else:
-                        print(f"  ⚠️  追加后数据为空，保留旧数据")
-                        sparkline_to_save = None
+                        # 验证生成的数据
+                        sparkline_array = FishbowlCalculator.parse_sparkline(sparkline_json)
+                        if len(sparkline_array) > 0:
+                            sparkline_to_save = sparkline_json
+                        else:
+                            print(f"  ⚠️  追加后数据为空，保留旧数据")
+                            sparkline_to_save = None
                         
-                except Exception as e:
-                    print(f"  ⚠️  增量追加失败: {str(e)}，保留旧数据")
-                    sparkline_to_save = None
-            else:
-                # 🆕 全量模式：无历史数据，调用 Tushare 初始化
-                print(f"  🔄 [{symbol}] 首次初始化，全量拉取历史数据...")
-                print(f"      历史数据总行数: {len(result_df)}")
-                try:
-                    sparkline_json = FishbowlCalculator.generate_sparkline_json(
-                        result_df,
-                        days=250,
-                        today_date=date_str,
-                        today_price=float(last_row['close']),
-                        today_ma20=float(last_row['ma20_price'])
-                    )
-                    
-                    # v7.0: 降低初始化要求 - 只要有数据就保存（从 >1 改为 >0）
-                    sparkline_array = json.loads(sparkline_json)
-                    if len(sparkline_array) > 0:
-                        sparkline_to_save = sparkline_json
-                        print(f"  ✅ 初始化成功，生成 {len(sparkline_array)} 个数据点")
-                    else:
-                        print(f"  ⚠️  初始化失败，数据为空")
+                    except Exception as e:
+                        print(f"  ⚠️  增量追加失败: {str(e)}，保留旧数据")
                         sparkline_to_save = None
+                else:
+                    # 🆕 全量模式：无历史数据，调用 Tushare 初始化
+                    print(f"  🔄 [{symbol}] 首次初始化，全量拉取历史数据...")
+                    print(f"      历史数据总行数: {len(result_df)}")
+                    try:
+                        sparkline_json = FishbowlCalculator.generate_sparkline_json(
+                            result_df,
+                            days=250,
+                            today_date=date_str,
+                            today_price=float(last_row['close']),
+                            today_ma20=float(last_row['ma20_price']),
+                            fmt=SPARKLINE_FORMAT
+                        )
+                    
+                        # v7.0: 降低初始化要求 - 只要有数据就保存（从 >1 改为 >0）
+                        sparkline_array = FishbowlCalculator.parse_sparkline(sparkline_json)
+                        if len(sparkline_array) > 0:
+                            sparkline_to_save = sparkline_json
+                            print(f"  ✅ 初始化成功，生成 {len(sparkline_array)} 个数据点")
+                        else:
+                            print(f"  ⚠️  初始化失败，数据为空")
+                            sparkline_to_save = None
                         
-                except (json.JSONDecodeError, TypeError) as e:
-                    print(f"  ⚠️  初始化失败: {str(e)}")
-                    sparkline_to_save = None
+                    except (json.JSONDecodeError, TypeError) as e:
+                        print(f"  ⚠️  初始化失败: {str(e)}")
+                        sparkline_to_save = None
 
             data_list.append({
                 'date': date_str,  # 字符串格式，避免时区转换
@@ -1243,23 +2857,38 @@ def main():
                 'signal_tag': last_row['signal_tag'],
                 'change_pct': float(last_row['change_pct']) if pd.notna(last_row['change_pct']) else None,
                 'trend_pct': float(last_row['trend_pct']) if pd.notna(last_row['trend_pct']) else None,
-                'sparkline_json': sparkline_to_save  # v7.0: 增量追加或全量初始化
+                'sparkline_json': sparkline_to_save,  # v7.0: 增量追加或全量初始化
+                'sparkline_point': sparkline_point    # v7.3: 服务端追加的当日数据点
             })
 
-        # 批量入库
-        conn = db_conn.get_connection()
-        batch_upsert_daily_data(conn, data_list)
-        print(f"\n✓ 批量入库成功: {len(data_list)} 条记录")
+        # v5.8: 生成全景战术驾驶舱数据（先完成全部网络请求，再开启发布事务）
+        # v7.3: 只重建输入有变化的板块，其余板块沿用最近一次保存的概览
+        #       （本次运行没有行业资产时领涨先锋保持不变；只更新了部分行业资产时发布事务内重新查询）
+        overview_data = None
+        if not args.skip_overview:
+            updated_assets = [a for a in assets if a['symbol'] in results_by_symbol]
+            sections = overview_sections(updated_assets)
+            base_overview = None
+            if sections != {'a_share', 'us_share', 'gold', 'leaders'}:
+                base_overview = db_conn.get_latest_overview()
+            if base_overview is None:
+                # 没有可合并的旧数据时全部重建
+                sections = None
+            else:
+                print(f"\nℹ️  市场概览只重建: {', '.join(sorted(sections)) or '无'}")
+            overview_data = build_market_overview(fetcher, db_conn, assets, sections, industry_assets)
+            if base_overview is not None:
+                overview_data = {**base_overview, **overview_data}
 
-        # 更新固定排序（从 data_list 获取最新日期）
+        # v7.3: 单事务发布每日数据、排名、序列、状态与市场概览
         latest_date = max(d['date'] for d in data_list)
-        update_sort_rankings(conn, latest_date)
-        print(f"✓ 更新固定排序完成: {latest_date}")
-
-        conn.close()
+        latest_mode = db_conn.latest_available()
+        with db_conn.connection() as conn:
+            # v7.3: 分区表先在独立的短事务内补建年度分区（DDL 不放进发布事务）
+            ensure_partitions(conn, [d['date'] for d in data_list])
+            conn.commit()
 
-        # v5.8 新增：生成全景战术驾驶舱数据
-        update_market_overview(fetcher, db_conn)
+            publish_daily(conn, data_list, series_rows, new_states, overview_data, latest_mode)
 
         # 输出摘要
         yes_count = len([d for d in data_list if d['status'] == 'YES'])
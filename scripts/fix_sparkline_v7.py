@@ -9,7 +9,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from etl import DatabaseConnection, DataFetcher, FishbowlCalculator
+from concurrent.futures import ThreadPoolExecutor
+
+from etl import DatabaseConnection, DataFetcher, FishbowlCalculator, refresh_latest, save_series, \
+    ETL_MAX_WORKERS, SPARKLINE_FORMAT
 import pandas as pd
 
 def fix_sparkline():
@@ -31,92 +34,119 @@ def fix_sparkline():
     assets = db_conn.query_data(query)
     
     print(f"\n找到 {len(assets)} 个资产需要检查\n")
-    
-    # 2. 逐个检查并修复
-    conn = db_conn.get_connection()
-    cursor = conn.cursor()
-    
-    fixed_count = 0
-    skipped_count = 0
-    failed_count = 0
-    
-    for asset in assets:
-        symbol = asset['symbol']
-        name = asset['name']
-        category = asset['category']
-        
-        print(f"处理: {name} ({symbol})")
-        
-        # 检查是否需要修复
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN sparkline_json IS NULL THEN 0
-                    ELSE json_array_length(sparkline_json::json)
-                END as point_count
-            FROM fishbowl_daily
-            WHERE symbol = %s
-            ORDER BY date DESC
-            LIMIT 1
-        """, (symbol,))
-        
-        result = cursor.fetchone()
-        if result and result[0] > 20:  # 只有超过20个点才跳过（确保有足够数据）
-            print(f"  ✓ 已有 {result[0]} 个数据点，跳过\n")
-            skipped_count += 1
-            continue
-        elif result and result[0] > 0:
-            print(f"  ⚠️  仅有 {result[0]} 个数据点（不足），需要重新初始化")
-        
-        # 需要修复：获取历史数据并生成 sparkline
+
+    # v7.3: 已迁移 fishbowl_series 时修复序列表，否则修复 sparkline_json
+    series_mode = db_conn.series_available()
+    symbols = [a['symbol'] for a in assets]
+    if series_mode:
+        existing = db_conn.get_series_sparklines(symbols)
+        print("📦 使用 fishbowl_series 序列表\n")
+    else:
+        # 前端读取最新一行的 sparkline_json，因此只检查最新一行
+        existing = db_conn.get_existing_sparklines(symbols, skip_null=False)
+    # v7.3: 修复 sparkline_json 后同步刷新最新快照
+    latest_mode = db_conn.latest_available()
+    point_counts = {
+        symbol: len(FishbowlCalculator.parse_sparkline(sparkline))
+        for symbol, sparkline in existing.items()
+    }
+
+    # v7.3: 需要修复的资产先并行拉取历史数据（单个代码内部再按日期分块并行），写库仍逐个进行
+    to_fix = [a for a in assets if point_counts.get(a['symbol'], 0) <= 20]
+
+    def load_history(asset):
         try:
-            print(f"  🔄 获取历史数据...")
-            df = fetcher.fetch_history(symbol, category)
-            
-            if df.empty:
-                print(f"  ⚠️  无法获取历史数据，跳过\n")
-                failed_count += 1
+            return fetcher.fetch_history(asset['symbol'], asset['category'])
+        except Exception as e:
+            print(f"  ❌ {asset['symbol']} 获取历史数据失败: {str(e)}")
+            return pd.DataFrame()
+
+    print(f"🔄 并行获取 {len(to_fix)} 个资产的历史数据...\n")
+    with ThreadPoolExecutor(max_workers=max(ETL_MAX_WORKERS, 1)) as executor:
+        histories = dict(zip([a['symbol'] for a in to_fix], executor.map(load_history, to_fix)))
+    print()
+
+    # 2. 逐个检查并修复
+    with db_conn.connection() as conn:
+        cursor = conn.cursor()
+
+        fixed_count = 0
+        skipped_count = 0
+        failed_count = 0
+
+        for asset in assets:
+            symbol = asset['symbol']
+            name = asset['name']
+
+            print(f"处理: {name} ({symbol})")
+
+            # 检查是否需要修复（v7.3: 点数已在循环前一次查询得到）
+            count = point_counts.get(symbol, 0)
+            if count > 20:  # 只有超过20个点才跳过（确保有足够数据）
+                print(f"  ✓ 已有 {count} 个数据点，跳过\n")
+                skipped_count += 1
                 continue
-            
-            # 计算指标
-            df = FishbowlCalculator.calculate_all_metrics(df)
-            print(f"  📊 获取到 {len(df)} 天的历史数据")
-            
-            # 生成 sparkline
-            if len(df) > 0:
-                last_row = df.iloc[-1]
-                date_str = last_row['date'].strftime('%Y-%m-%d') if hasattr(last_row['date'], 'strftime') else str(last_row['date'])
-                
-                sparkline_json = FishbowlCalculator.generate_sparkline_json(
-                    df,
-                    days=250,
-                    today_date=date_str,
-                    today_price=float(last_row['close']),
-                    today_ma20=float(last_row['ma20_price'])
-                )
-                
-                # 更新数据库
-                cursor.execute("""
-                    UPDATE fishbowl_daily
-                    SET sparkline_json = %s::jsonb
-                    WHERE symbol = %s
-                      AND date = (SELECT MAX(date) FROM fishbowl_daily WHERE symbol = %s)
-                """, (sparkline_json, symbol, symbol))
-                
-                conn.commit()
-                print(f"  ✅ 修复成功，生成 sparkline\n")
-                fixed_count += 1
-            else:
-                print(f"  ⚠️  数据不足，跳过\n")
+            elif count > 0:
+                print(f"  ⚠️  仅有 {count} 个数据点（不足），需要重新初始化")
+
+            # 需要修复：获取历史数据并生成 sparkline
+            try:
+                df = histories[symbol]
+
+                if df.empty:
+                    print(f"  ⚠️  无法获取历史数据，跳过\n")
+                    failed_count += 1
+                    continue
+
+                # 计算指标
+                df = FishbowlCalculator.calculate_all_metrics(df)
+                print(f"  📊 获取到 {len(df)} 天的历史数据")
+
+                # v7.3: 序列表模式 - 写入最近 250 个交易日的数据点
+                if series_mode and len(df) > 0:
+                    points = FishbowlCalculator.sparkline_points(df.tail(250))
+                    save_series(conn, [(symbol, point) for point in points])
+                    conn.commit()
+                    print(f"  ✅ 修复成功，写入 {len(points)} 个数据点\n")
+                    fixed_count += 1
+                # 生成 sparkline
+                elif len(df) > 0:
+                    last_row = df.iloc[-1]
+                    date_str = last_row['date'].strftime('%Y-%m-%d') if hasattr(last_row['date'], 'strftime') else str(last_row['date'])
+
+                    sparkline_json = FishbowlCalculator.generate_sparkline_json(
+                        df,
+                        days=250,
+                        today_date=date_str,
+                        today_price=float(last_row['close']),
+                        today_ma20=float(last_row['ma20_price']),
+                        fmt=SPARKLINE_FORMAT
+                    )
+
+                    # 更新数据库
+                    cursor.execute("""
+                        UPDATE fishbowl_daily
+                        SET sparkline_json = %s::jsonb
+                        WHERE symbol = %s
+                          AND date = (SELECT MAX(date) FROM fishbowl_daily WHERE symbol = %s)
+                    """, (sparkline_json, symbol, symbol))
+                    if latest_mode:
+                        refresh_latest(conn, [symbol])
+
+                    conn.commit()
+                    print(f"  ✅ 修复成功，生成 sparkline\n")
+                    fixed_count += 1
+                else:
+                    print(f"  ⚠️  数据不足，跳过\n")
+                    failed_count += 1
+
+            except Exception as e:
+                print(f"  ❌ 修复失败: {str(e)}\n")
+                conn.rollback()
                 failed_count += 1
-                
-        except Exception as e:
-            print(f"  ❌ 修复失败: {str(e)}\n")
-            failed_count += 1
-            continue
-    
-    cursor.close()
-    conn.close()
+                continue
+
+        cursor.close()
     
     # 3. 输出统计
     print("=" * 60)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 对冲请求（hedged request）v7.3
+功能：
+1. 按优先级排列的多个备用数据源错峰并发：先启动第一个，每隔 stagger 秒（或上一个失败时立即）启动下一个
+2. 每个结果先经过 validate 校验（沿用各调用方原有的合理性规则），不通过视为失败
+3. 返回优先级最高的有效结果：所有更高优先级的数据源都已失败时立即返回，不必等待其余数据源
+4. 可选 grace：已有低优先级的有效结果后，最多再等待更高优先级的数据源 grace 秒
+5. 调用频率仍由共享限流器控制，被放弃的请求在后台线程中自然结束，不影响返回
+
+用法：
+    name, value = hedged_call([
+        ('伦敦金', lambda: quote('XAUUSD=X')),
+        ('黄金期货', lambda: quote('GC=F')),
+    ], stagger=1.0, validate=lambda v: v is not None)
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class HedgedCallError(Exception):
+    """所有数据源均失败"""
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors = errors
+        detail = '; '.join(f"{name}: {message}" for name, message in errors) or '无可用数据源'
+        super().__init__(f"全部数据源失败（{detail}）")
+
+
+def hedged_call(candidates: Sequence[Tuple[str, Callable[[], Any]]], stagger: float = 1.0,
+                validate: Optional[Callable[[Any], bool]] = None, grace: Optional[float] = None,
+                timeout: Optional[float] = None) -> Tuple[str, Any]:
+    """
+    错峰并发执行备用数据源，返回优先级最高的有效结果
+
+    Args:
+        candidates: [(名称, 无参函数)]，按优先级从高到低排列；函数抛出异常视为失败
+        stagger: 相邻两个数据源的启动间隔（秒），上一个失败时立即启动下一个
+        validate: 结果校验函数，返回 False 视为失败（函数内也可直接抛出异常说明原因）
+        grace: 已有有效结果后，等待更高优先级数据源的最长时间（秒），None 表示一直等待
+        timeout: 总超时（秒），超时后返回已有的最优结果，没有则抛出 HedgedCallError
+
+    Returns:
+        (数据源名称, 结果)
+
+    Raises:
+        HedgedCallError: 所有数据源均失败或超时
+    """
+    total = len(candidates)
+    if total == 0:
+        raise HedgedCallError([])
+
+    executor = ThreadPoolExecutor(max_workers=total, thread_name_prefix='hedged')
+    futures: Dict[Any, int] = {}
+    results: Dict[int, Any] = {}
+    errors: Dict[int, str] = {}
+    started_at = time.monotonic()
+    deadline = started_at + timeout if timeout is not None else None
+    first_valid_at: Optional[float] = None
+    next_index = 0
+    next_launch_at = started_at
+
+    def run(index: int):
+        value = candidates[index][1]()
+        if validate is not None and not validate(value):
+            raise ValueError("结果未通过校验")
+        return value
+
+    def best_result() -> Tuple[str, Any]:
+        index = min(results)
+        return candidates[index][0], results[index]
+
+    def collect():
+        nonlocal first_valid_at
+        for future, index in futures.items():
+            if not future.done() or index in results or index in errors:
+                continue
+            try:
+                results[index] = future.result()
+                if first_valid_at is None:
+                    first_valid_at = time.monotonic()
+            except Exception as e:
+                errors[index] = str(e)
+                print(f"  ⚠️  {candidates[index][0]} 获取失败: {str(e)}")
+
+    try:
+        while True:
+            collect()
+            now = time.monotonic()
+
+            # 优先级更高的数据源都已失败时，直接采用当前最高优先级的有效结果
+            for index in range(total):
+                if index in results:
+                    return candidates[index][0], results[index]
+                if index not in errors:
+                    break
+
+            # 启动下一个数据源：到达错峰时间，或当前没有正在执行的请求（上一个已失败）
+            pending = [f for f in futures if not f.done()]
+            if next_index < total and (now >= next_launch_at or not pending):
+                futures[executor.submit(run, next_index)] = next_index
+                next_index += 1
+                next_launch_at = now + stagger
+                continue
+
+            if len(errors) == total:
+                raise HedgedCallError([(candidates[i][0], errors[i]) for i in range(total)])
+            if results and grace is not None and now - first_valid_at >= grace:
+                return best_result()
+            if deadline is not None and now >= deadline:
+                if results:
+                    return best_result()
+                raise HedgedCallError([(candidates[i][0], errors.get(i, '超时')) for i in range(total)])
+
+            # 等待任一请求完成，或到达下一次启动 / 宽限 / 超时的时间点
+            wake_points = []
+            if next_index < total:
+                wake_points.append(next_launch_at)
+            if results and grace is not None:
+                wake_points.append(first_valid_at + grace)
+            if deadline is not None:
+                wake_points.append(deadline)
+            wait_time = max(min(wake_points) - now, 0) if wake_points else None
+
+            wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+    finally:
+        # 不等待被放弃的请求，线程在后台结束后自动退出
+        executor.shutdown(wait=False)
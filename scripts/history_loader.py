@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 分块并行历史行情加载 v7.3
+功能：
+1. 按接口单次返回行数上限（TUSHARE_ROW_LIMITS）把请求区间拆成若干日期块，避免被静默截断
+2. 各日期块并行拉取，调用频率由共享限流器控制（fetch 通常为 DataFetcher._tushare）
+3. 某块返回行数达到上限时视为可能被截断，对半拆分后重新拉取
+4. 合并后按 trade_date 去重、升序排列，并对照交易日历检查区间内是否有缺失的交易日
+
+配置：
+    HISTORY_MAX_WORKERS   单个代码并行拉取的日期块数（默认 4）
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from data_sources import DEFAULT_ROW_LIMIT, TUSHARE_ROW_LIMITS
+
+DEFAULT_HISTORY_WORKERS = 4
+
+# 每块按上限的 80% 规划行数，留出余量
+CHUNK_FILL_RATIO = 0.8
+
+
+def date_chunks(start_date: str, end_date: str, row_limit: int) -> List[Tuple[str, str]]:
+    """
+    把 [start_date, end_date]（YYYYMMDD）拆成首尾相接的日期块
+
+    按每周 5 个交易日估算，每块预计行数不超过 row_limit × CHUNK_FILL_RATIO
+    """
+    span = max(int(row_limit * CHUNK_FILL_RATIO * 7 / 5), 1)
+    start = datetime.strptime(start_date, '%Y%m%d')
+    end = datetime.strptime(end_date, '%Y%m%d')
+
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=span - 1), end)
+        chunks.append((start.strftime('%Y%m%d'), chunk_end.strftime('%Y%m%d')))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+class HistoryLoader:
+    """分块并行的历史行情加载器"""
+
+    def __init__(self, fetch: Callable[..., pd.DataFrame], max_workers: Optional[int] = None):
+        """
+        Args:
+            fetch: 调用 Tushare 接口的函数，签名 fetch(api_name, **kwargs)（通常为 DataFetcher._tushare）
+            max_workers: 单个代码并行拉取的日期块数
+        """
+        self.fetch = fetch
+        self.max_workers = max_workers or int(os.getenv('HISTORY_MAX_WORKERS', DEFAULT_HISTORY_WORKERS))
+
+    def _fetch_chunk(self, api_name: str, start_date: str, end_date: str, params: dict) -> List[pd.DataFrame]:
+        """拉取一个日期块；返回行数达到上限时对半拆分重新拉取"""
+        df = self.fetch(api_name, start_date=start_date, end_date=end_date, **params)
+        if df is None or df.empty:
+            return []
+
+        row_limit = TUSHARE_ROW_LIMITS.get(api_name, DEFAULT_ROW_LIMIT)
+        if len(df) >= row_limit and start_date < end_date:
+            start = datetime.strptime(start_date, '%Y%m%d')
+            end = datetime.strptime(end_date, '%Y%m%d')
+            mid = start + (end - start) / 2
+            print(f"  ✂️  {api_name} {start_date}~{end_date} 返回 {len(df)} 行（达到上限），拆分后重新拉取")
+            return self._fetch_chunk(api_name, start_date, mid.strftime('%Y%m%d'), params) + \
+                self._fetch_chunk(api_name, (mid + timedelta(days=1)).strftime('%Y%m%d'), end_date, params)
+        return [df]
+
+    def load(self, api_name: str, start_date: str, end_date: Optional[str] = None,
+             expected_dates: Optional[List[str]] = None, **params) -> pd.DataFrame:
+        """
+        拉取 [start_date, end_date] 区间的日线
+
+        Args:
+            api_name: Tushare 接口名（index_daily / sge_daily / index_global ...）
+            start_date: 起始日期（YYYYMMDD）
+            end_date: 结束日期（YYYYMMDD），默认今天
+            expected_dates: 该市场的交易日列表（YYYYMMDD），用于检查缺失的交易日
+            **params: 其余接口参数（如 ts_code）
+
+        Returns:
+            接口原始列的 DataFrame，按 trade_date 去重并升序；没有数据时为空
+        """
+        end_date = end_date or datetime.now().strftime('%Y%m%d')
+        chunks = date_chunks(start_date, end_date, TUSHARE_ROW_LIMITS.get(api_name, DEFAULT_ROW_LIMIT))
+
+        if len(chunks) == 1 or self.max_workers <= 1:
+            results = [self._fetch_chunk(api_name, start, end, params) for start, end in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                results = list(executor.map(lambda chunk: self._fetch_chunk(api_name, chunk[0], chunk[1], params),
+                                            chunks))
+
+        frames = [df for chunk_frames in results for df in chunk_frames]
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames, ignore_index=True)
+        df['trade_date'] = df['trade_date'].astype(str)
+        df = df.drop_duplicates('trade_date', keep='last').sort_values('trade_date').reset_index(drop=True)
+
+        if expected_dates:
+            self._check_coverage(api_name, params.get('ts_code', ''), df, expected_dates)
+        return df
+
+    @staticmethod
+    def _check_coverage(api_name: str, symbol: str, df: pd.DataFrame, expected_dates: List[str]) -> List[str]:
+        """对照交易日历检查返回区间内缺失的交易日（只检查首尾之间，上市前 / 当日未收盘不算缺失）"""
+        first, last = df['trade_date'].iloc[0], df['trade_date'].iloc[-1]
+        returned = set(df['trade_date'])
+        missing = [d for d in expected_dates if first <= d <= last and d not in returned]
+        if missing:
+            preview = ', '.join(missing[:5]) + (' ...' if len(missing) > 5 else '')
+            print(f"  ⚠️  {symbol} {api_name} 缺少 {len(missing)} 个交易日: {preview}")
+        return missing
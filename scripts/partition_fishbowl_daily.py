@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fishbowl_daily 按年分区迁移脚本 v7.3
+
+功能：
+1. 新建按 date 年度范围分区的 fishbowl_daily_new（列定义、默认值、id 序列沿用原表）
+2. 按月分批搬迁历史数据，每批单独提交，中断后重新执行即可（每批可重复执行）
+3. 短暂加锁补齐搬迁期间被 ETL 写入/更新的行，核对行数后原子换表
+4. 原表保留为 fishbowl_daily_legacy，确认无误后使用 --drop-legacy 删除
+
+分区后：主键变为 (id, date)，唯一约束 (symbol, date) 不变，ETL 的 ON CONFLICT 无需修改；
+ETL 每次运行会通过 ensure_partitions 自动预建下一年的分区。
+
+用法：
+    python scripts/partition_fishbowl_daily.py                 # 迁移
+    python scripts/partition_fishbowl_daily.py --batch-months 3
+    python scripts/partition_fishbowl_daily.py --drop-legacy   # 确认后删除旧表
+"""
+
+import argparse
+import os
+import sys
+from datetime import date
+
+import psycopg2
+from dotenv import load_dotenv
+
+from etl import ensure_partitions
+
+# 设置标准输出编码为UTF-8（解决Windows编码问题）
+if sys.platform.startswith('win'):
+    sys.stdout.reconfigure(encoding='utf-8')
+
+# 加载环境变量
+load_dotenv()
+
+NEW_TABLE = 'fishbowl_daily_new'
+LEGACY_TABLE = 'fishbowl_daily_legacy'
+
+
+def relkind(cursor, table: str):
+    """返回表类型：'r' 普通表，'p' 分区表，不存在时为 None"""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def add_months(d: date, months: int) -> date:
+    """按月偏移（只用于每月 1 日）"""
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def create_partitioned_table(conn, cursor, years):
+    """创建分区父表、约束、索引以及各年度分区"""
+    print("\n📐 1/3 创建分区表...")
+    if relkind(cursor, NEW_TABLE) is None:
+        # LIKE 复制列、NOT NULL、默认值（包括 id 的 nextval），保留历史迁移添加的列
+        cursor.execute(f"""
+            CREATE TABLE {NEW_TABLE} (
+                LIKE fishbowl_daily INCLUDING DEFAULTS INCLUDING COMMENTS
+            ) PARTITION BY RANGE (date)
+        """)
+        # 分区表的主键/唯一约束必须包含分区键
+        cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT fishbowl_daily_part_pkey PRIMARY KEY (id, date)")
+        cursor.execute(f"""
+            ALTER TABLE {NEW_TABLE}
+            ADD CONSTRAINT fishbowl_daily_part_symbol_date_key UNIQUE (symbol, date)
+        """)
+        cursor.execute(f"""
+            ALTER TABLE {NEW_TABLE}
+            ADD CONSTRAINT fishbowl_daily_part_symbol_fkey
+            FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+        """)
+        cursor.execute(f"CREATE INDEX idx_fishbowl_daily_date ON {NEW_TABLE}(date)")
+        cursor.execute(f"CREATE INDEX idx_fishbowl_daily_trend_rank ON {NEW_TABLE}(trend_rank)")
+        print(f"  ✓ 已创建 {NEW_TABLE}")
+    else:
+        print(f"  ✓ {NEW_TABLE} 已存在，继续上次的迁移")
+
+    created = ensure_partitions(conn, [f'{year}-01-01' for year in years], parent=NEW_TABLE)
+    conn.commit()
+    print(f"  ✓ 年度分区: {created[0]} ~ {created[-1]}")
+
+
+def copy_batches(conn, cursor, first_month: date, last_month: date, batch_months: int) -> int:
+    """按月分批搬迁，每批提交一次；每批先清空目标区间再写入，重复执行结果一致"""
+    print(f"\n🚚 2/3 分批搬迁数据（每批 {batch_months} 个月）...")
+    total = 0
+    start = first_month
+    while start <= last_month:
+        end = add_months(start, batch_months)
+        cursor.execute(f"DELETE FROM {NEW_TABLE} WHERE date >= %s AND date < %s", (start, end))
+        cursor.execute(f"""
+            INSERT INTO {NEW_TABLE}
+            SELECT * FROM fishbowl_daily
+            WHERE date >= %s AND date < %s
+        """, (start, end))
+        moved = cursor.rowcount
+        conn.commit()
+        total += moved
+        print(f"  ✓ {start} ~ {end}: {moved} 行")
+        start = end
+    return total
+
+
+def swap_tables(conn, cursor, copy_started_at):
+    """加锁补齐搬迁期间的写入，核对行数后换表"""
+    print("\n🔁 3/3 补齐增量并换表...")
+    cursor.execute("LOCK TABLE fishbowl_daily IN ACCESS EXCLUSIVE MODE")
+
+    # ETL 的 upsert 会刷新 created_at；时间戳不带时区，放宽 1 天避免会话时区差异漏行
+    cursor.execute(f"""
+        DELETE FROM {NEW_TABLE} n
+        USING fishbowl_daily o
+        WHERE o.created_at >= %s::timestamp - INTERVAL '1 day'
+          AND n.symbol = o.symbol AND n.date = o.date
+    """, (copy_started_at,))
+    cursor.execute(f"""
+        INSERT INTO {NEW_TABLE}
+        SELECT * FROM fishbowl_daily
+        WHERE created_at >= %s::timestamp - INTERVAL '1 day'
+    """, (copy_started_at,))
+    print(f"  ✓ 补齐增量: {cursor.rowcount} 行")
+
+    cursor.execute("SELECT COUNT(*) FROM fishbowl_daily")
+    old_count = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM {NEW_TABLE}")
+    new_count = cursor.fetchone()[0]
+    if old_count != new_count:
+        raise Exception(f"行数不一致: 原表 {old_count}，分区表 {new_count}")
+    print(f"  ✓ 行数核对一致: {new_count}")
+
+    cursor.execute("SELECT pg_get_serial_sequence('fishbowl_daily', 'id')")
+    sequence = cursor.fetchone()[0]
+
+    cursor.execute(f"ALTER TABLE fishbowl_daily RENAME TO {LEGACY_TABLE}")
+    cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO fishbowl_daily")
+    if sequence:
+        # 序列改为归属新表，删除旧表时不会连带删除
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY fishbowl_daily.id")
+    conn.commit()
+    print(f"  ✓ 换表完成，原表保留为 {LEGACY_TABLE}")
+
+
+def migrate(batch_months: int):
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ 错误：环境变量 DATABASE_URL 未设置")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("🔧 fishbowl_daily 按年分区迁移")
+    print("=" * 60)
+
+    conn = psycopg2.connect(database_url)
+    cursor = conn.cursor()
+    try:
+        if relkind(cursor, 'fishbowl_daily') == 'p':
+            years = ensure_partitions(conn, [date.today()])
+            conn.commit()
+            print(f"✓ fishbowl_daily 已是分区表，确认分区至 {years[-1]} 年")
+            return
+
+        cursor.execute("SELECT MIN(date), MAX(date), NOW()::timestamp FROM fishbowl_daily")
+        min_date, max_date, copy_started_at = cursor.fetchone()
+        conn.commit()
+        min_date = min_date or date.today()
+        max_date = max_date or date.today()
+        print(f"📅 数据范围: {min_date} ~ {max_date}")
+
+        create_partitioned_table(conn, cursor, range(min_date.year, max(max_date.year, date.today().year) + 1))
+        total = copy_batches(conn, cursor, date(min_date.year, min_date.month, 1),
+                             date(max_date.year, max_date.month, 1), batch_months)
+        print(f"  ✓ 本次搬迁 {total} 行")
+        swap_tables(conn, cursor, copy_started_at)
+
+        print("\n" + "=" * 60)
+        print("✅ 迁移完成！")
+        print("💡 确认前端与 ETL 正常后删除旧表：")
+        print("   python scripts/partition_fishbowl_daily.py --drop-legacy")
+        print("=" * 60)
+    except Exception as e:
+        conn.rollback()
+        print(f"\n❌ 迁移失败: {str(e)}")
+        print("💡 已提交的批次会保留，修复问题后重新执行即可继续")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def drop_legacy():
+    conn = psycopg2.connect(os.getenv('DATABASE_URL'))
+    cursor = conn.cursor()
+    try:
+        if relkind(cursor, LEGACY_TABLE) is None:
+            print(f"✓ {LEGACY_TABLE} 不存在，无需删除")
+            return
+        if relkind(cursor, 'fishbowl_daily') != 'p':
+            print("❌ fishbowl_daily 尚未分区，拒绝删除旧表")
+            sys.exit(1)
+        cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+        conn.commit()
+        print(f"✓ 已删除 {LEGACY_TABLE}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='fishbowl_daily 按年分区迁移')
+    parser.add_argument('--batch-months', type=int, default=1, help='每批搬迁的月数（默认 1）')
+    parser.add_argument('--drop-legacy', action='store_true', help='删除迁移后保留的旧表')
+    args = parser.parse_args()
+
+    if args.drop_legacy:
+        drop_legacy()
+    else:
+        migrate(max(args.batch_months, 1))
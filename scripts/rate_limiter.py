@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 共享限流器 v7.3
+功能：
+1. 按接口（endpoint）维护独立的令牌桶：index_daily / fund_daily / fund_portfolio / yfinance ...
+2. 未达到配额时不做任何等待，取代各脚本中散落的 time.sleep
+3. 识别 Tushare / Yahoo 的限流报错，自动暂停对应令牌桶并退避重试
+4. 进程内单例：etl.py 与 update_holdings.py 在同一进程中运行时共享同一份配额
+
+配置：
+    每个接口的每分钟配额可以通过环境变量覆盖，变量名为 RATE_LIMIT_<接口名大写>，
+    例如 RATE_LIMIT_FUND_DAILY=480、RATE_LIMIT_YFINANCE=30
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# ================================================
+# 默认配额（次/分钟）
+# ================================================
+# Tushare 2000 积分档位大多数接口为 200 次/分钟，这里预留约 5% 余量
+DEFAULT_RATE_LIMITS = {
+    'index_daily': 190,
+    'fund_daily': 190,
+    'index_global': 190,
+    'sge_daily': 190,
+    'fund_portfolio': 190,
+    'stock_basic': 190,
+    'trade_cal': 190,
+    'yfinance': 30,       # Yahoo 无官方配额，保守设置避免被临时封禁
+}
+
+# 未在上表中列出的接口使用该默认值
+DEFAULT_RATE_PER_MINUTE = 190
+
+# 限流报错的关键字（Tushare 中文提示 + Yahoo/HTTP 英文提示）
+QUOTA_ERROR_KEYWORDS = [
+    '每分钟最多访问',
+    '最多访问该接口',
+    '访问频率',
+    'too many requests',
+    'rate limit',
+    'ratelimit',
+    '429',
+]
+
+# 退避参数（秒）
+BACKOFF_INITIAL = 5.0
+BACKOFF_MAX = 60.0
+
+
+def is_quota_error(error: Exception) -> bool:
+    """判断异常是否由接口限流引起"""
+    message = str(error).lower()
+    if type(error).__name__ == 'YFRateLimitError':
+        return True
+    return any(keyword in message for keyword in QUOTA_ERROR_KEYWORDS)
+
+
+# ================================================
+# 令牌桶
+# ================================================
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    容量（burst）刻意设置得较小：任意 60 秒窗口内的调用次数上限约为
+    rate_per_minute + capacity，避免冷启动时瞬间打满一分钟的配额。
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 20.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+            self._updated_at = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，必要时阻塞等待
+
+        Returns:
+            实际等待的秒数（未达到配额时为 0）
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return waited
+                    wait = (tokens - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """暂停该令牌桶（收到限流报错时调用），并清空已积攒的令牌"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated_at = self._paused_until
+
+
+# ================================================
+# 按接口划分的限流器
+# ================================================
+class RateLimiter:
+    """按接口划分令牌桶的限流器"""
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None,
+                 default_rate: float = DEFAULT_RATE_PER_MINUTE,
+                 max_retries: int = 3):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _rate_for(self, endpoint: str) -> float:
+        env_name = 'RATE_LIMIT_' + re.sub(r'[^0-9A-Za-z]', '_', endpoint).upper()
+        env_value = os.getenv(env_name)
+        if env_value:
+            return float(env_value)
+        return self.limits.get(endpoint, self.default_rate)
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        """获取（或懒创建）指定接口的令牌桶"""
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = TokenBucket(self._rate_for(endpoint))
+                self._buckets[endpoint] = bucket
+            return bucket
+
+    def acquire(self, endpoint: str) -> float:
+        """获取指定接口的一次调用许可"""
+        return self.bucket(endpoint).acquire()
+
+    def call(self, endpoint: str, func: Callable, *args, **kwargs):
+        """
+        在限流器保护下执行一次接口调用
+
+        遇到限流报错时暂停该接口的令牌桶并指数退避重试，其他异常直接抛出，
+        由调用方沿用原有的异常处理逻辑。
+        """
+        backoff = BACKOFF_INITIAL
+        for attempt in range(self.max_retries + 1):
+            self.acquire(endpoint)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not is_quota_error(e) or attempt >= self.max_retries:
+                    raise
+                print(f"  ⏳ [{endpoint}] 触发接口限流，{backoff:.0f} 秒后重试 ({attempt + 1}/{self.max_retries})")
+                self.bucket(endpoint).pause(backoff)
+                backoff = min(backoff * 2, BACKOFF_MAX)
+
+
+# ================================================
+# 进程内共享实例
+# ================================================
+_shared_limiter: Optional[RateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限流器（所有脚本共用同一份配额）"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
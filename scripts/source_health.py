@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 数据源健康度记录 v7.3
+功能：
+1. 按 市场/数据源 记录每次请求的耗时、成败以及返回的最新 K 线落后预期交易日的天数（滞后）
+2. 耗时 / 失败率 / 滞后均为指数加权平均，跨运行保存在本地 JSON 文件中
+3. rank() 按"预期代价"排序：代价 = 耗时 + 滞后天数 × 滞后惩罚 + 失败率 × 失败惩罚，
+   优先把请求路由到预计最快拿到最新数据的数据源；未记录过的数据源排在已记录的之后
+4. 未记录过、或超过 SOURCE_HEALTH_PROBE_HOURS 未被请求的数据源由 claim_probe() 标记为待探测，
+   调用方与首选数据源同时请求一次以更新其代价（每次运行每个数据源最多探测一次）
+5. 连续失败多次的数据源在冷却期内不再请求（其余数据源都不可用时除外），冷却期后重新探测
+
+配置：
+    SOURCE_HEALTH_DIR             记录目录（默认仓库根目录下 .cache/source_health）
+    SOURCE_HEALTH                 设为 false 关闭（按调用方给定的固定顺序请求）
+    SOURCE_HEALTH_COOLDOWN_HOURS  连续失败的数据源暂停请求的小时数（默认 24）
+    SOURCE_HEALTH_PROBE_HOURS     数据源超过该小时数未被请求时重新探测（默认 24）
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_HEALTH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'source_health')
+DEFAULT_COOLDOWN_HOURS = 24
+DEFAULT_PROBE_HOURS = 24
+
+# 指数加权平均的权重（最近一次请求所占比例）
+EWMA_ALPHA = 0.3
+# 每落后 1 个交易日折算的秒数，失败率 100% 折算的秒数
+STALENESS_PENALTY = 30.0
+ERROR_PENALTY = 20.0
+# 连续失败达到该次数后进入冷却期
+COOLDOWN_FAILURES = 3
+
+
+def previous_weekday(today: date) -> date:
+    """没有交易日历时，以前一个工作日作为预期的最新交易日"""
+    day = today - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def staleness_days(latest: date, expected: date) -> int:
+    """最新 K 线落后预期交易日的工作日数（不早于预期时为 0）"""
+    if latest >= expected:
+        return 0
+    return int(np.busday_count(latest + timedelta(days=1), expected + timedelta(days=1)))
+
+
+class SourceHealth:
+    """数据源健康度记录（本地 JSON 持久化，线程安全）"""
+
+    def __init__(self, root: Optional[str] = None, cooldown_hours: Optional[float] = None,
+                 probe_hours: Optional[float] = None):
+        self.root = root or os.getenv('SOURCE_HEALTH_DIR') or DEFAULT_HEALTH_DIR
+        self.cooldown_hours = cooldown_hours if cooldown_hours is not None else \
+            float(os.getenv('SOURCE_HEALTH_COOLDOWN_HOURS', DEFAULT_COOLDOWN_HOURS))
+        self.probe_hours = probe_hours if probe_hours is not None else \
+            float(os.getenv('SOURCE_HEALTH_PROBE_HOURS', DEFAULT_PROBE_HOURS))
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(self.root, 'source_health.json')
+        self._lock = threading.Lock()
+        self._stats = self._load()
+        self._probed = set()
+
+    @classmethod
+    def from_env(cls) -> Optional['SourceHealth']:
+        """根据环境变量创建健康度记录，SOURCE_HEALTH=false 时返回 None"""
+        if os.getenv('SOURCE_HEALTH', 'true').lower() in ('0', 'false', 'no'):
+            return None
+        try:
+            return cls()
+        except OSError as e:
+            print(f"  ⚠️  数据源健康度记录不可用: {str(e)}")
+            return None
+
+    # ------------------------------------------------
+    # 读写
+    # ------------------------------------------------
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._stats, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # ------------------------------------------------
+    # 记录
+    # ------------------------------------------------
+    def record(self, market: str, source: str, latency: float, ok: bool,
+               staleness: Optional[int] = None):
+        """
+        记录一次请求结果
+
+        Args:
+            market: 市场（如 US）
+            source: 数据源名称（如 yfinance / tushare）
+            latency: 请求耗时（秒）
+            ok: 是否拿到了有效数据
+            staleness: 返回的最新 K 线落后预期交易日的天数（失败时为 None）
+        """
+        with self._lock:
+            stats = self._stats.setdefault(market, {}).setdefault(source, {
+                'latency': latency,
+                'error_rate': 0.0 if ok else 1.0,
+                'staleness': float(staleness or 0),
+                'requests': 0,
+                'consecutive_failures': 0,
+            })
+            stats['latency'] += EWMA_ALPHA * (latency - stats['latency'])
+            stats['error_rate'] += EWMA_ALPHA * ((0.0 if ok else 1.0) - stats['error_rate'])
+            if staleness is not None:
+                stats['staleness'] += EWMA_ALPHA * (staleness - stats['staleness'])
+                stats['latest_staleness'] = staleness
+            stats['requests'] += 1
+            stats['consecutive_failures'] = 0 if ok else stats['consecutive_failures'] + 1
+            stats['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            if not ok:
+                stats['failed_at'] = stats['updated_at']
+            try:
+                self._save()
+            except OSError as e:
+                print(f"  ⚠️  数据源健康度写入失败: {str(e)}")
+
+    # ------------------------------------------------
+    # 路由
+    # ------------------------------------------------
+    def cost(self, market: str, source: str) -> float:
+        """预期代价（秒），未记录过的数据源为无穷大"""
+        stats = self._stats.get(market, {}).get(source)
+        if not stats:
+            return float('inf')
+        return stats['latency'] + stats['staleness'] * STALENESS_PENALTY + stats['error_rate'] * ERROR_PENALTY
+
+    def cooling_down(self, market: str, source: str, now: Optional[datetime] = None) -> bool:
+        """连续失败的数据源是否处于冷却期"""
+        stats = self._stats.get(market, {}).get(source)
+        if not stats or stats['consecutive_failures'] < COOLDOWN_FAILURES or 'failed_at' not in stats:
+            return False
+        now = now or datetime.now()
+        failed_at = datetime.fromisoformat(stats['failed_at'])
+        return now - failed_at < timedelta(hours=self.cooldown_hours)
+
+    def claim_probe(self, market: str, source: str, now: Optional[datetime] = None) -> bool:
+        """
+        数据源是否需要探测（未记录过，或超过 probe_hours 未被请求），需要时标记为本次运行已探测
+
+        冷却期内的数据源不探测；同一数据源每次运行只返回一次 True，避免每个代码都额外请求。
+        """
+        with self._lock:
+            if (market, source) in self._probed or self.cooling_down(market, source, now):
+                return False
+            stats = self._stats.get(market, {}).get(source)
+            now = now or datetime.now()
+            if stats and now - datetime.fromisoformat(stats['updated_at']) < timedelta(hours=self.probe_hours):
+                return False
+            self._probed.add((market, source))
+            return True
+
+    def rank(self, market: str, sources: List[str]) -> List[str]:
+        """
+        按预期代价从低到高排序数据源（代价相同时保持调用方给定的顺序）
+
+        冷却期内的数据源被移除；全部处于冷却期时仍按代价返回全部数据源。
+        """
+        with self._lock:
+            ordered = sorted(sources, key=lambda source: self.cost(market, source))
+            available = [source for source in ordered if not self.cooling_down(market, source)]
+        return available or ordered
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+鱼盆趋势雷达 - 多市场交易日历缓存 v7.3
+功能：
+1. 缓存 A股（SSE / SZSE）、上海金交所（SGE）、港股（HK）、美股（US）的交易日历
+2. 本地 JSON 文件保存，覆盖区间不足或超过 TRADE_CAL_REFRESH_DAYS 天才重新拉取
+3. 按各市场时区和收盘时间判断"最近一个已收盘的交易日"，ETL 据此跳过没有新交易日的资产
+4. 某个市场日历拉取失败时视为未知，相关资产照常更新（不影响原有行为）
+
+配置：
+    TRADE_CAL_DIR            缓存目录（默认仓库根目录下 .cache/calendar）
+    TRADE_CALENDAR           设为 false 关闭交易日历（每次运行更新全部资产）
+    TRADE_CAL_REFRESH_DAYS   日历缓存有效天数（默认 30）
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+DEFAULT_CALENDAR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'calendar')
+DEFAULT_REFRESH_DAYS = 30
+
+# 市场 -> (Tushare 接口, 接口参数, 时区, 收盘时间)
+MARKETS = {
+    'SSE': ('trade_cal', {'exchange': 'SSE'}, 'Asia/Shanghai', time(15, 0)),
+    'SZSE': ('trade_cal', {'exchange': 'SZSE'}, 'Asia/Shanghai', time(15, 0)),
+    'SGE': ('trade_cal', {'exchange': 'SGE'}, 'Asia/Shanghai', time(15, 30)),
+    'HK': ('hk_tradecal', {}, 'Asia/Hong_Kong', time(16, 10)),
+    'US': ('us_tradecal', {}, 'America/New_York', time(16, 0)),
+}
+
+# 金交所与 A股 的休市安排一致，trade_cal 不支持 SGE 时使用上交所日历
+FALLBACK_MARKETS = {'SGE': 'SSE'}
+
+
+def market_of(symbol: str) -> str:
+    """根据代码判断所属市场（与 DataFetcher 的接口路由规则一致，ETF 按交易所后缀）"""
+    if symbol.startswith('Au') or symbol.startswith('Ag'):
+        return 'SGE'
+    if symbol in ('IXIC', 'SPX', 'DJI', 'NDX'):
+        return 'US'
+    if symbol in ('HSI', 'HKTECH'):
+        return 'HK'
+    return 'SZSE' if symbol.endswith('.SZ') else 'SSE'
+
+
+class TradeCalendar:
+    """多市场交易日历（本地 JSON 缓存，线程安全）"""
+
+    def __init__(self, fetch: Callable[..., pd.DataFrame], root: Optional[str] = None,
+                 refresh_days: Optional[int] = None):
+        """
+        Args:
+            fetch: 调用 Tushare 接口的函数，签名 fetch(api_name, **kwargs)（通常为 DataFetcher._tushare）
+            root: 缓存目录
+            refresh_days: 缓存有效天数
+        """
+        self.fetch = fetch
+        self.root = root or os.getenv('TRADE_CAL_DIR') or DEFAULT_CALENDAR_DIR
+        self.refresh_days = refresh_days if refresh_days is not None else \
+            int(os.getenv('TRADE_CAL_REFRESH_DAYS', DEFAULT_REFRESH_DAYS))
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(self.root, 'trade_cal.json')
+        self._lock = threading.Lock()
+        self._calendars = self._load()
+
+    @classmethod
+    def from_env(cls, fetch: Callable[..., pd.DataFrame]) -> Optional['TradeCalendar']:
+        """根据环境变量创建交易日历，TRADE_CALENDAR=false 时返回 None"""
+        if os.getenv('TRADE_CALENDAR', 'true').lower() in ('0', 'false', 'no'):
+            return None
+        try:
+            return cls(fetch)
+        except OSError as e:
+            print(f"  ⚠️  交易日历缓存不可用: {str(e)}")
+            return None
+
+    # ------------------------------------------------
+    # 缓存读写
+    # ------------------------------------------------
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._calendars, f)
+        os.replace(tmp_path, self.path)
+
+    def _is_fresh(self, entry: Optional[Dict], today: date) -> bool:
+        if not entry:
+            return False
+        fetched_at = datetime.strptime(entry['fetched_at'], '%Y-%m-%d').date()
+        covers = entry['start'] <= (today - timedelta(days=30)).strftime('%Y%m%d') and \
+            entry['end'] >= (today + timedelta(days=7)).strftime('%Y%m%d')
+        return covers and (today - fetched_at).days < self.refresh_days
+
+    def _download(self, market: str, today: date) -> Optional[List[str]]:
+        """拉取去年年初至明年年末的交易日，失败或无数据时返回 None"""
+        api_name, params, _, _ = MARKETS[market]
+        start = f'{today.year - 1}0101'
+        end = f'{today.year + 1}1231'
+        try:
+            df = self.fetch(api_name, start_date=start, end_date=end, **params)
+        except Exception as e:
+            print(f"  ⚠️  交易日历 {market} 拉取失败: {str(e)}")
+            return None
+        if df is None or df.empty or 'cal_date' not in df.columns:
+            return None
+
+        open_dates = df[df['is_open'].astype(str) == '1']['cal_date'].astype(str)
+        return sorted(open_dates.tolist()) or None
+
+    def open_dates(self, market: str, today: Optional[date] = None) -> Optional[List[str]]:
+        """
+        获取某市场的交易日列表（YYYYMMDD，升序），必要时刷新缓存
+
+        Returns:
+            交易日列表；日历不可用时返回 None
+        """
+        today = today or date.today()
+        with self._lock:
+            entry = self._calendars.get(market)
+            if not self._is_fresh(entry, today):
+                dates = self._download(market, today)
+                if dates is None and market in FALLBACK_MARKETS:
+                    dates = self._download(FALLBACK_MARKETS[market], today)
+                if dates is not None:
+                    entry = {
+                        'start': f'{today.year - 1}0101',
+                        'end': f'{today.year + 1}1231',
+                        'fetched_at': today.strftime('%Y-%m-%d'),
+                        'open_dates': dates,
+                    }
+                    self._calendars[market] = entry
+                    try:
+                        self._save()
+                    except OSError as e:
+                        print(f"  ⚠️  交易日历缓存写入失败: {str(e)}")
+                # 拉取失败时继续使用过期的缓存（休市安排很少变化），但不能用于覆盖范围之外的日期
+            if not entry or entry['end'] < today.strftime('%Y%m%d'):
+                return None
+            return entry['open_dates']
+
+    # ------------------------------------------------
+    # 查询
+    # ------------------------------------------------
+    def latest_session(self, market: str, now: Optional[datetime] = None) -> Optional[date]:
+        """
+        某市场最近一个已收盘的交易日（按该市场本地时区和收盘时间判断）
+
+        Returns:
+            交易日；日历不可用时返回 None
+        """
+        _, _, tz_name, close_time = MARKETS[market]
+        now = now or datetime.now(ZoneInfo('Asia/Shanghai'))
+        local_now = now.astimezone(ZoneInfo(tz_name))
+        dates = self.open_dates(market, local_now.date())
+        if not dates:
+            return None
+
+        cutoff = local_now.date() if local_now.time() >= close_time else local_now.date() - timedelta(days=1)
+        cutoff_str = cutoff.strftime('%Y%m%d')
+        past = [d for d in dates if d <= cutoff_str]
+        if not past:
+            return None
+        return datetime.strptime(past[-1], '%Y%m%d').date()
@@ -19,13 +19,14 @@
 import os
 import sys
 import pandas as pd
-import tushare as ts
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-import time
+
+from data_sources import create_data_source
+from db_pool import get_pool, normalize_dsn
+from rate_limiter import get_rate_limiter
 
 # 设置标准输出编码为UTF-8（解决Windows编码问题）
 if sys.platform.startswith('win'):
@@ -42,27 +43,22 @@ class DatabaseConnection:
     """数据库连接管理"""
 
     def __init__(self):
-        self.connection_url = os.getenv('DATABASE_URL')
-        if not self.connection_url:
+        base_url = os.getenv('DATABASE_URL')
+        if not base_url:
             raise ValueError("环境变量 DATABASE_URL 未设置")
 
-    def get_connection(self):
-        """获取数据库连接"""
-        try:
-            return psycopg2.connect(self.connection_url)
-        except Exception as e:
-            print(f"❌ 数据库连接失败: {str(e)}")
-            raise
+        # v7.3: 与 etl.py 相同的连接串规范化（会话时区 Asia/Shanghai），两个脚本共用同一个连接池
+        self.connection_url = normalize_dsn(base_url)
+        self.pool = get_pool(self.connection_url)
 
     def query_data(self, sql: str, params: tuple = None) -> List[Dict]:
         """执行查询并返回数据"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(sql, params)
-            results = [dict(row) for row in cursor.fetchall()]
-            cursor.close()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute(sql, params)
+                results = [dict(row) for row in cursor.fetchall()]
+                cursor.close()
             return results
         except Exception as e:
             print(f"❌ 查询操作失败: {str(e)}")
@@ -71,12 +67,11 @@ class DatabaseConnection:
     def execute(self, sql: str, params: tuple = None) -> bool:
         """执行更新操作"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(sql, params)
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                conn.commit()
+                cursor.close()
             return True
         except Exception as e:
             print(f"❌ 执行操作失败: {str(e)}")
@@ -90,11 +85,12 @@ class HoldingsFetcher:
     """ETF 持仓数据获取器"""
 
     def __init__(self):
-        self.token = os.getenv('TUSHARE_TOKEN')
-        if not self.token:
-            raise ValueError("环境变量 TUSHARE_TOKEN 未设置")
-        ts.set_token(self.token)
-        self.pro = ts.pro_api()
+        # v7.3: 与 etl.py 相同的可插拔数据源（ETL_DATA_SOURCE）
+        self.source = create_data_source()
+        self.pro = self.source.pro_client()
+
+        # v7.3: 与 etl.py 共享的按接口限流器
+        self.limiter = get_rate_limiter()
         
         # 股票基础信息缓存 (用于获取股票中文名)
         self._stock_names_cache: Dict[str, str] = {}
@@ -113,7 +109,9 @@ class HoldingsFetcher:
         if not self._stock_names_cache:
             try:
                 print("📊 正在加载股票基础信息...")
-                df = self.pro.stock_basic(
+                df = self.limiter.call(
+                    'stock_basic',
+                    self.pro.stock_basic,
                     exchange='',
                     list_status='L',
                     fields='ts_code,name'
@@ -138,7 +136,7 @@ class HoldingsFetcher:
         """
         try:
             # 调用 Tushare fund_portfolio 接口
-            df = self.pro.fund_portfolio(ts_code=ts_code)
+            df = self.limiter.call('fund_portfolio', self.pro.fund_portfolio, ts_code=ts_code)
             
             if df is None or df.empty:
                 print(f"⚠️ {ts_code}: 无持仓数据")
@@ -310,9 +308,6 @@ class HoldingsUpdater:
             except Exception as e:
                 print(f"    ❌ 处理失败: {e}")
                 fail_count += 1
-            
-            # Tushare 接口频率限制：每分钟200次，这里保守设置
-            time.sleep(0.5)
         
         print()
         print("=" * 60)
@@ -0,0 +1,82 @@
+-- ================================================
+-- 迁移脚本 v7.3: 添加最新快照表
+-- 功能：每个标的一行，保存最新交易日的鱼盆数据和展示所需的配置字段，
+--       由 ETL 在发布事务内维护；看板和领涨先锋查询不再扫描整张 fishbowl_daily
+-- 执行：python scripts/migrate.py sql/migrations/add_fishbowl_latest.sql
+-- ================================================
+
+-- 1. 创建快照表
+CREATE TABLE IF NOT EXISTS fishbowl_latest (
+    symbol VARCHAR(20) PRIMARY KEY,        -- 指数代码（外键关联 monitor_config）
+    date DATE NOT NULL,                    -- 最新交易日期
+
+    -- 鱼盆指标（与 fishbowl_daily 同名同类型）
+    close_price DECIMAL(10, 2) NOT NULL,
+    ma20_price DECIMAL(10, 4) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    deviation_pct DECIMAL(10, 4) NOT NULL,
+    duration_days INT NOT NULL,
+    trend_rank INT,
+    signal_tag VARCHAR(20),
+    change_pct DECIMAL(10, 4),
+    trend_pct DECIMAL(10, 4),
+    sparkline_json JSONB,
+
+    -- 冗余的配置字段（每次发布时从 monitor_config 刷新，仅作快照记录；
+    -- 前端与领涨先锋查询联表 monitor_config 读取，修改配置后无需等待下次发布）
+    name VARCHAR(50) NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    industry_level VARCHAR(10),
+    dominant_etf VARCHAR(20),
+    sort_rank INT,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+-- 领涨先锋：按类别取当日涨幅前 N
+CREATE INDEX IF NOT EXISTS idx_latest_category_change ON fishbowl_latest(category, change_pct DESC);
+
+COMMENT ON TABLE fishbowl_latest IS '每个标的最新一日的鱼盆快照（由 ETL 维护，可随时从 fishbowl_daily 重建）';
+
+-- 2. 从 fishbowl_daily 初始化（重复执行时刷新为最新一行）
+INSERT INTO fishbowl_latest
+    (symbol, date, close_price, ma20_price, status, deviation_pct, duration_days, trend_rank,
+     signal_tag, change_pct, trend_pct, sparkline_json,
+     name, category, industry_level, dominant_etf, sort_rank, updated_at)
+SELECT DISTINCT ON (d.symbol)
+    d.symbol, d.date, d.close_price, d.ma20_price, d.status, d.deviation_pct, d.duration_days, d.trend_rank,
+    d.signal_tag, d.change_pct, d.trend_pct, d.sparkline_json,
+    c.name, c.category, c.industry_level, c.dominant_etf, c.sort_rank, CURRENT_TIMESTAMP
+FROM fishbowl_daily d
+JOIN monitor_config c ON d.symbol = c.symbol
+ORDER BY d.symbol, d.date DESC
+ON CONFLICT (symbol) DO UPDATE SET
+    date = EXCLUDED.date,
+    close_price = EXCLUDED.close_price,
+    ma20_price = EXCLUDED.ma20_price,
+    status = EXCLUDED.status,
+    deviation_pct = EXCLUDED.deviation_pct,
+    duration_days = EXCLUDED.duration_days,
+    trend_rank = EXCLUDED.trend_rank,
+    signal_tag = EXCLUDED.signal_tag,
+    change_pct = EXCLUDED.change_pct,
+    trend_pct = EXCLUDED.trend_pct,
+    sparkline_json = EXCLUDED.sparkline_json,
+    name = EXCLUDED.name,
+    category = EXCLUDED.category,
+    industry_level = EXCLUDED.industry_level,
+    dominant_etf = EXCLUDED.dominant_etf,
+    sort_rank = EXCLUDED.sort_rank,
+    updated_at = CURRENT_TIMESTAMP;
+
+-- 验证
+SELECT category, COUNT(*) AS symbols, MAX(date) AS latest_date
+FROM fishbowl_latest
+GROUP BY category;
+
+-- 3. 说明
+-- ETL 检测到该表后，在发布事务内刷新本次更新的标的；前端首页和领涨先锋从该表读取，
+-- 未执行本迁移的数据库仍从 fishbowl_daily 读取。
+-- 投资逻辑、核心持仓等由其他脚本维护的长文本仍留在 monitor_config，按主键关联读取。
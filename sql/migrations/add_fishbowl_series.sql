@@ -0,0 +1,82 @@
+-- ================================================
+-- 迁移脚本 v7.3: 添加规范化趋势图序列表
+-- 功能：每个标的每个交易日一行 (symbol, date, price, ma20, change)，
+--       取代 fishbowl_daily 每行重复存储的 250 点 sparkline_json
+-- 执行：python scripts/migrate.py sql/migrations/add_fishbowl_series.sql
+-- ================================================
+
+-- 1. 创建序列表（主键 (symbol, date) 同时支撑"最近 N 个点"的倒序索引扫描）
+CREATE TABLE IF NOT EXISTS fishbowl_series (
+    symbol VARCHAR(20) NOT NULL,                 -- 指数代码（外键关联 monitor_config）
+    date DATE NOT NULL,                          -- 交易日期
+    price DOUBLE PRECISION NOT NULL,             -- 收盘价（4位小数）
+    ma20 DOUBLE PRECISION NOT NULL,              -- 20日均线（4位小数）
+    change DOUBLE PRECISION NOT NULL DEFAULT 0,  -- 当日涨幅（百分比形式，2位小数）
+
+    PRIMARY KEY (symbol, date),
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+COMMENT ON TABLE fishbowl_series IS '迷你趋势图序列（每个交易日一行，只追加）';
+COMMENT ON COLUMN fishbowl_series.change IS '当日涨幅（百分比形式，如 1.52 表示 +1.52%）';
+
+-- 2. 从每个标的最新一行的 sparkline_json 迁移历史数据点
+INSERT INTO fishbowl_series (symbol, date, price, ma20, change)
+SELECT
+    latest.symbol,
+    (point->>'date')::date,
+    (point->>'price')::double precision,
+    (point->>'ma20')::double precision,
+    COALESCE((point->>'change')::double precision, 0)
+FROM (
+    SELECT DISTINCT ON (symbol) symbol, sparkline_json
+    FROM fishbowl_daily
+    WHERE sparkline_json IS NOT NULL
+      AND jsonb_typeof(sparkline_json) = 'array'
+    ORDER BY symbol, date DESC
+) latest
+CROSS JOIN LATERAL jsonb_array_elements(latest.sparkline_json) AS point
+WHERE point ? 'date' AND point ? 'price' AND point ? 'ma20'
+ON CONFLICT (symbol, date) DO NOTHING;
+
+-- 2b. 兼容 v2 列式格式的 sparkline_json（{"v": 2, "base", "d", "p", "m", "c"}，差分编码需累加还原）
+INSERT INTO fishbowl_series (symbol, date, price, ma20, change)
+SELECT
+    cols.symbol,
+    cols.base + (SUM(cols.d) OVER w)::int,
+    ROUND(SUM(cols.p) OVER w / 10000.0, 4)::double precision,
+    ROUND(SUM(cols.m) OVER w / 10000.0, 4)::double precision,
+    ROUND(cols.c / 100.0, 2)::double precision
+FROM (
+    SELECT
+        latest.symbol,
+        (latest.sparkline_json->>'base')::date AS base,
+        t.idx,
+        (latest.sparkline_json->'d'->>t.idx)::bigint AS d,
+        (latest.sparkline_json->'p'->>t.idx)::bigint AS p,
+        (latest.sparkline_json->'m'->>t.idx)::bigint AS m,
+        (latest.sparkline_json->'c'->>t.idx)::bigint AS c
+    FROM (
+        SELECT DISTINCT ON (symbol) symbol, sparkline_json
+        FROM fishbowl_daily
+        WHERE sparkline_json IS NOT NULL
+          AND jsonb_typeof(sparkline_json) = 'object'
+          AND sparkline_json->>'v' = '2'
+        ORDER BY symbol, date DESC
+    ) latest
+    CROSS JOIN LATERAL generate_series(0, jsonb_array_length(latest.sparkline_json->'d') - 1) AS t(idx)
+) cols
+WINDOW w AS (PARTITION BY cols.symbol ORDER BY cols.idx)
+ON CONFLICT (symbol, date) DO NOTHING;
+
+-- 3. 验证迁移结果
+SELECT symbol, COUNT(*)::text AS points, MAX(date)::text AS last_date
+FROM fishbowl_series
+GROUP BY symbol
+ORDER BY symbol;
+
+-- 4. 说明
+-- ETL 检测到该表后只写入新增交易日的数据点，不再写入 fishbowl_daily.sparkline_json。
+-- 确认前端显示正常后，可手动清理历史 JSON 释放空间：
+--   UPDATE fishbowl_daily SET sparkline_json = NULL WHERE sparkline_json IS NOT NULL;
+--   VACUUM FULL fishbowl_daily;
@@ -0,0 +1,22 @@
+-- ================================================
+-- 迁移脚本 v7.3: 添加增量计算状态表
+-- 功能：保存每个标的最近20个收盘价、当前状态和持续天数，
+--       ETL 每天只需用新 K 线 O(1) 推进，无需重算整段历史
+-- ================================================
+
+CREATE TABLE IF NOT EXISTS fishbowl_state (
+    symbol VARCHAR(20) PRIMARY KEY,              -- 指数代码（外键关联 monitor_config）
+    last_date DATE NOT NULL,                     -- 状态对应的最后交易日
+    closes JSONB NOT NULL,                       -- 最近20个收盘价（按日期升序）
+    running_sum DOUBLE PRECISION NOT NULL,       -- 最近20个收盘价之和（MA20 = running_sum / 窗口长度）
+    status VARCHAR(10) NOT NULL,                 -- 当前状态：'YES' / 'NO'
+    duration_days INT NOT NULL,                  -- 当前状态持续天数
+    regime_start_price DOUBLE PRECISION,         -- 当前状态起始点前一天的收盘价（区间涨幅基准）
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+-- 添加注释
+COMMENT ON TABLE fishbowl_state IS '鱼盆增量计算状态（由 ETL 维护，可随时清空，下次运行自动全量重建）';
+COMMENT ON COLUMN fishbowl_state.regime_start_price IS '当前状态起始点前一天的收盘价，无法追溯时为 NULL';
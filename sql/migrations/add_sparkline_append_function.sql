@@ -0,0 +1,126 @@
+-- ================================================
+-- 迁移脚本 v7.3: 服务端 sparkline 追加函数
+-- 功能：ETL 只发送当日数据点，由数据库完成"同日覆盖 / 追加 / 裁剪到最近 N 天"，
+--       逻辑与 FishbowlCalculator.append_to_sparkline 一致，保持原有格式（v1 对象数组 / v2 列式）
+-- 执行：python scripts/migrate.py sql/migrations/add_sparkline_append_function.sql
+-- ================================================
+
+-- 1. v2 列式格式（{"v": 2, "base", "d", "p", "m", "c"}，价格 / MA20 为 10^4 定点差分）
+CREATE OR REPLACE FUNCTION fishbowl_sparkline_append_v2(chart JSONB, new_point JSONB, max_days INT)
+RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    n INT := COALESCE(jsonb_array_length(chart->'d'), 0);
+    new_date DATE := (new_point->>'date')::date;
+    new_p BIGINT := ROUND((new_point->>'price')::numeric * 10000);
+    new_m BIGINT := ROUND((new_point->>'ma20')::numeric * 10000);
+    new_c BIGINT := ROUND(COALESCE((new_point->>'change')::numeric, 0) * 100);
+    d JSONB := chart->'d';
+    p JSONB := chart->'p';
+    m JSONB := chart->'m';
+    c JSONB := chart->'c';
+    base_date DATE;
+    last_date DATE;
+    last_p BIGINT;
+    last_m BIGINT;
+    first_p BIGINT;
+    first_m BIGINT;
+    k INT;
+BEGIN
+    IF n = 0 OR chart->>'base' IS NULL THEN
+        RETURN jsonb_build_object(
+            'v', 2, 'base', new_point->>'date',
+            'd', jsonb_build_array(0), 'p', jsonb_build_array(new_p),
+            'm', jsonb_build_array(new_m), 'c', jsonb_build_array(new_c)
+        );
+    END IF;
+
+    -- 累加差分得到最后一个点的日期与绝对值
+    base_date := (chart->>'base')::date;
+    SELECT base_date + SUM(e::int)::int INTO last_date FROM jsonb_array_elements_text(d) AS t(e);
+    SELECT SUM(e::bigint) INTO last_p FROM jsonb_array_elements_text(p) AS t(e);
+    SELECT SUM(e::bigint) INTO last_m FROM jsonb_array_elements_text(m) AS t(e);
+
+    IF new_date = last_date THEN
+        -- 同一天：覆盖最后一个点（差分改为相对倒数第二个点）
+        last_p := last_p - (p->>(n - 1))::bigint;
+        last_m := last_m - (m->>(n - 1))::bigint;
+        p := (p - (n - 1)) || to_jsonb(new_p - last_p);
+        m := (m - (n - 1)) || to_jsonb(new_m - last_m);
+        c := (c - (n - 1)) || to_jsonb(new_c);
+    ELSE
+        d := d || to_jsonb(new_date - last_date);
+        p := p || to_jsonb(new_p - last_p);
+        m := m || to_jsonb(new_m - last_m);
+        c := c || to_jsonb(new_c);
+        n := n + 1;
+    END IF;
+
+    -- 滑动窗口裁剪：丢弃前 k 个点，第 k+1 个点还原为绝对值作为新的首项
+    k := n - max_days;
+    IF k > 0 THEN
+        SELECT base_date + SUM(e::int)::int INTO base_date
+        FROM jsonb_array_elements_text(d) WITH ORDINALITY AS t(e, i) WHERE i <= k + 1;
+        SELECT SUM(e::bigint) INTO first_p
+        FROM jsonb_array_elements_text(p) WITH ORDINALITY AS t(e, i) WHERE i <= k + 1;
+        SELECT SUM(e::bigint) INTO first_m
+        FROM jsonb_array_elements_text(m) WITH ORDINALITY AS t(e, i) WHERE i <= k + 1;
+
+        d := jsonb_build_array(0) || COALESCE((
+            SELECT jsonb_agg(e ORDER BY i) FROM jsonb_array_elements(d) WITH ORDINALITY AS t(e, i) WHERE i > k + 1
+        ), '[]'::jsonb);
+        p := jsonb_build_array(first_p) || COALESCE((
+            SELECT jsonb_agg(e ORDER BY i) FROM jsonb_array_elements(p) WITH ORDINALITY AS t(e, i) WHERE i > k + 1
+        ), '[]'::jsonb);
+        m := jsonb_build_array(first_m) || COALESCE((
+            SELECT jsonb_agg(e ORDER BY i) FROM jsonb_array_elements(m) WITH ORDINALITY AS t(e, i) WHERE i > k + 1
+        ), '[]'::jsonb);
+        c := COALESCE((
+            SELECT jsonb_agg(e ORDER BY i) FROM jsonb_array_elements(c) WITH ORDINALITY AS t(e, i) WHERE i > k
+        ), '[]'::jsonb);
+    END IF;
+
+    RETURN jsonb_build_object('v', 2, 'base', to_char(base_date, 'YYYY-MM-DD'), 'd', d, 'p', p, 'm', m, 'c', c);
+END;
+$$;
+
+-- 2. 入口函数：按现有格式分发，v1 对象数组直接用 jsonb 运算完成
+CREATE OR REPLACE FUNCTION fishbowl_sparkline_append(current_chart JSONB, new_point JSONB, max_days INT DEFAULT 250)
+RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE AS $$
+DECLARE
+    chart JSONB;
+    n INT;
+BEGIN
+    IF jsonb_typeof(current_chart) = 'object' AND current_chart->>'v' = '2' THEN
+        RETURN fishbowl_sparkline_append_v2(current_chart, new_point, max_days);
+    END IF;
+
+    -- 空值或格式错误（非数组）时重置为空数组
+    IF current_chart IS NULL OR jsonb_typeof(current_chart) <> 'array' THEN
+        chart := '[]'::jsonb;
+    ELSE
+        chart := current_chart;
+    END IF;
+
+    n := jsonb_array_length(chart);
+    IF n > 0 AND chart->(n - 1)->>'date' = new_point->>'date' THEN
+        -- 同一天，覆盖最后一个点
+        chart := (chart - (n - 1)) || jsonb_build_array(new_point);
+    ELSE
+        chart := chart || jsonb_build_array(new_point);
+    END IF;
+
+    -- 只保留最近 max_days 个点
+    n := jsonb_array_length(chart);
+    IF n > max_days THEN
+        SELECT jsonb_agg(e ORDER BY i) INTO chart
+        FROM jsonb_array_elements(chart) WITH ORDINALITY AS t(e, i)
+        WHERE i > n - max_days;
+    END IF;
+
+    RETURN chart;
+END;
+$$;
+
+COMMENT ON FUNCTION fishbowl_sparkline_append(JSONB, JSONB, INT) IS 'sparkline 追加：同日覆盖 / 追加 / 裁剪到最近 N 天（兼容 v1 / v2 格式）';
@@ -32,11 +32,12 @@ CREATE INDEX idx_is_active ON monitor_config(is_active);
 CREATE INDEX idx_industry_level ON monitor_config(industry_level);
 
 
--- 2. 每日数据表
+-- 2. 每日数据表（v7.3: 按 date 年度范围分区，ETL 通过 ensure_partitions 自动预建下一年分区；
+--    已有数据库使用 scripts/partition_fishbowl_daily.py 迁移）
 DROP TABLE IF EXISTS fishbowl_daily CASCADE;
 
 CREATE TABLE fishbowl_daily (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     date DATE NOT NULL,                    -- 交易日期
     symbol VARCHAR(20) NOT NULL,           -- 指数代码（外键关联 monitor_config）
     close_price DECIMAL(10, 2) NOT NULL,   -- 收盘价
@@ -58,9 +59,21 @@ CREATE TABLE fishbowl_daily (
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    PRIMARY KEY (id, date),                -- 分区表的主键必须包含分区键
     UNIQUE(symbol, date),                  -- 确保每个指数每天只有一条记录
     FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
-);
+) PARTITION BY RANGE (date);
+
+-- 年度分区（2020 年至明年）
+DO $$
+BEGIN
+    FOR y IN 2020..EXTRACT(YEAR FROM CURRENT_DATE)::int + 1 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS fishbowl_daily_%s PARTITION OF fishbowl_daily FOR VALUES FROM (%L) TO (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
 
 -- 创建索引以优化查询
 CREATE INDEX idx_date ON fishbowl_daily(date);
@@ -100,6 +113,83 @@ CREATE TABLE market_overview (
 CREATE INDEX idx_market_overview_date ON market_overview(date DESC);
 
 
+-- ================================================
+-- 4. 增量计算状态表（v7.3）
+-- ================================================
+DROP TABLE IF EXISTS fishbowl_state CASCADE;
+
+CREATE TABLE fishbowl_state (
+    symbol VARCHAR(20) PRIMARY KEY,              -- 指数代码（外键关联 monitor_config）
+    last_date DATE NOT NULL,                     -- 状态对应的最后交易日
+    closes JSONB NOT NULL,                       -- 最近20个收盘价（按日期升序）
+    running_sum DOUBLE PRECISION NOT NULL,       -- 最近20个收盘价之和
+    status VARCHAR(10) NOT NULL,                 -- 当前状态：'YES' / 'NO'
+    duration_days INT NOT NULL,                  -- 当前状态持续天数
+    regime_start_price DOUBLE PRECISION,         -- 当前状态起始点前一天的收盘价（区间涨幅基准）
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+
+-- ================================================
+-- 5. 迷你趋势图序列表（v7.3，取代 sparkline_json）
+-- ================================================
+DROP TABLE IF EXISTS fishbowl_series CASCADE;
+
+CREATE TABLE fishbowl_series (
+    symbol VARCHAR(20) NOT NULL,                 -- 指数代码（外键关联 monitor_config）
+    date DATE NOT NULL,                          -- 交易日期
+    price DOUBLE PRECISION NOT NULL,             -- 收盘价（4位小数）
+    ma20 DOUBLE PRECISION NOT NULL,              -- 20日均线（4位小数）
+    change DOUBLE PRECISION NOT NULL DEFAULT 0,  -- 当日涨幅（百分比形式，2位小数）
+
+    PRIMARY KEY (symbol, date),
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+
+-- ================================================
+-- 6. 服务端 sparkline 追加函数（v7.3）
+-- 定义见 sql/migrations/add_sparkline_append_function.sql（新建数据库后执行一次）
+-- ================================================
+
+
+-- ================================================
+-- 7. 最新快照表（v7.3，每个标的一行，由 ETL 发布时维护）
+-- ================================================
+DROP TABLE IF EXISTS fishbowl_latest CASCADE;
+
+CREATE TABLE fishbowl_latest (
+    symbol VARCHAR(20) PRIMARY KEY,        -- 指数代码（外键关联 monitor_config）
+    date DATE NOT NULL,                    -- 最新交易日期
+    close_price DECIMAL(10, 2) NOT NULL,
+    ma20_price DECIMAL(10, 4) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    deviation_pct DECIMAL(10, 4) NOT NULL,
+    duration_days INT NOT NULL,
+    trend_rank INT,
+    signal_tag VARCHAR(20),
+    change_pct DECIMAL(10, 4),
+    trend_pct DECIMAL(10, 4),
+    sparkline_json JSONB,
+
+    -- 冗余的配置字段（每次发布时从 monitor_config 刷新，仅作快照记录；
+    -- 前端与领涨先锋查询联表 monitor_config 读取，修改配置后无需等待下次发布）
+    name VARCHAR(50) NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    industry_level VARCHAR(10),
+    dominant_etf VARCHAR(20),
+    sort_rank INT,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (symbol) REFERENCES monitor_config(symbol) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_latest_category_change ON fishbowl_latest(category, change_pct DESC);
+
+
 -- ================================================
 -- 说明：
 -- 行业指数数据将通过 Python 脚本 init_db.py 自动初始化